@@ -0,0 +1,139 @@
+"""
+Free-slot finder.
+
+Each doctor-day is represented as an integer bitmap where bit ``i`` is set when
+the ``i``-th SLOT_MINUTES slot of the day is unavailable (outside working hours,
+in the past or taken by an appointment). Searching for a free run of ``n``
+slots is then a handful of shifts and ANDs per day.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Appointment
+from .scheduling import ACTIVE_STATUSES
+
+
+# Granularity of the occupancy bitmap in minutes
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+# Working hours can be overridden in settings, e.g.
+# AVAILABILITY_WORKING_HOURS = {0: ('08:00', '18:00'), ..., 5: ('09:00', '13:00')}
+# Keys are weekdays (Monday = 0); missing days are closed.
+DEFAULT_WORKING_HOURS = {weekday: ('08:00', '18:00') for weekday in range(5)}
+
+
+def _slot_index(value):
+    """Return the slot index of a time of day (rounded down)"""
+    return (value.hour * 60 + value.minute) // SLOT_MINUTES
+
+
+def _range_mask(first, last):
+    """Bitmap with slots [first, last) set"""
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def working_mask(weekday):
+    """Return the bitmap of slots closed on a given weekday"""
+    hours = getattr(settings, 'AVAILABILITY_WORKING_HOURS', DEFAULT_WORKING_HOURS)
+    if weekday not in hours:
+        return FULL_DAY
+    opening, closing = (datetime.strptime(value, '%H:%M').time() for value in hours[weekday])
+    closing_slot = SLOTS_PER_DAY if closing == time(0, 0) else _slot_index(closing)
+    return FULL_DAY & ~_range_mask(_slot_index(opening), closing_slot)
+
+
+def occupancy_bitmaps(doctor, start, end, exclude_id=None):
+    """
+    Build {date: bitmap} for every day between start and end (inclusive)
+    from one query over the doctor's active appointments
+    """
+    tz = timezone.get_current_timezone()
+    range_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+    bitmaps = {}
+    day = start
+    while day <= end:
+        bitmaps[day] = working_mask(day.weekday())
+        day += timedelta(days=1)
+
+    # Block everything before the current time
+    now = timezone.localtime(timezone.now(), tz)
+    for day in bitmaps:
+        if day < now.date():
+            bitmaps[day] = FULL_DAY
+        elif day == now.date():
+            elapsed = -(-(now.hour * 60 + now.minute + (now.second > 0)) // SLOT_MINUTES)
+            bitmaps[day] |= _range_mask(0, elapsed)
+
+    appointments = Appointment.objects.filter(
+        doctor=doctor,
+        status__in=ACTIVE_STATUSES,
+        starts_at__lt=range_end,
+        ends_at__gt=range_start,
+    )
+    if exclude_id is not None:
+        appointments = appointments.exclude(id=exclude_id)
+
+    for starts_at, ends_at in appointments.values_list('starts_at', 'ends_at'):
+        starts_at = timezone.localtime(starts_at, tz)
+        ends_at = timezone.localtime(ends_at, tz)
+        # An appointment may spill over midnight; mark each day it touches
+        day = starts_at.date()
+        while day <= ends_at.date():
+            first = _slot_index(starts_at.time()) if day == starts_at.date() else 0
+            if day == ends_at.date():
+                end_minutes = ends_at.hour * 60 + ends_at.minute
+                last = -(-end_minutes // SLOT_MINUTES)
+            else:
+                last = SLOTS_PER_DAY
+            if day in bitmaps:
+                bitmaps[day] |= _range_mask(first, last)
+            day += timedelta(days=1)
+
+    return bitmaps
+
+
+def free_starts(bitmap, length):
+    """
+    Return a bitmap whose bit ``i`` is set when slots [i, i + length) are all free
+    """
+    free = ~bitmap & FULL_DAY
+    # Doubling trick: after each step, bit i means a run of `covered` free slots starts at i
+    covered = 1
+    while covered < length and free:
+        shift = min(covered, length - covered)
+        free &= free >> shift
+        covered += shift
+    return free
+
+
+def find_free_slots(doctor, start, end, duration, limit=10, step=None, exclude_id=None):
+    """
+    Return the first ``limit`` free slots of ``duration`` minutes between
+    start and end (dates, inclusive) as a list of (date, start_time, end_time).
+    Candidate start times are aligned on ``step`` minutes (defaults to the
+    bitmap granularity).
+    """
+    length = -(-duration // SLOT_MINUTES)
+    step_slots = max(1, (step or SLOT_MINUTES) // SLOT_MINUTES)
+    # Bits at every `step_slots` position
+    aligned = sum(1 << i for i in range(0, SLOTS_PER_DAY, step_slots))
+
+    slots = []
+    for day, bitmap in sorted(occupancy_bitmaps(doctor, start, end, exclude_id).items()):
+        candidates = free_starts(bitmap, length) & aligned
+        while candidates and len(slots) < limit:
+            index = (candidates & -candidates).bit_length() - 1
+            candidates &= candidates - 1
+            begin = datetime.combine(day, time.min) + timedelta(minutes=index * SLOT_MINUTES)
+            slots.append((day, begin.time(), (begin + timedelta(minutes=duration)).time()))
+        if len(slots) >= limit:
+            break
+    return slots
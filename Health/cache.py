@@ -0,0 +1,173 @@
+"""
+Tiered cache and per-doctor cache versions.
+
+TieredCache (the ``tiered`` cache alias) keeps recently used entries in
+process memory, an LRU with a short TTL, in front of the shared cache
+(``default``: files locally, Redis in production). Other processes cannot
+clear that memory tier, so it must only hold values that never change under
+their key, such as keys carrying a doctor's cache version.
+
+Each doctor has a version in the shared cache, replaced after any write to
+their patients, appointments, consultations or prescriptions (see
+signals.py): one cache write invalidates every key and template fragment
+built with the old version, which then simply expire.
+
+Template fragments are cached with ``{% cache fragment_timeout name doctor.id
+cache_version ... using='tiered' %}``; async views, which cannot let the
+template run queries, first look the fragment up with acached_fragment().
+"""
+import time
+
+from django.core.cache import caches, cache
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.safestring import mark_safe
+
+
+TIERED_CACHE = 'tiered'
+
+# Lifetime of per-doctor values and fragments (they are invalidated by
+# version changes, this only bounds the space they take)
+DOCTOR_CACHE_TIMEOUT = 60 * 60
+FRAGMENT_TIMEOUT = 10 * 60
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend: a LocMemCache in front of another configured cache.
+
+    OPTIONS: SHARED (alias of the shared cache, 'default' by default),
+    LOCAL_TIMEOUT (seconds an entry stays in memory, 60) and
+    LOCAL_MAX_ENTRIES (1000; the least recently used are dropped first).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'default')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self.local = LocMemCache(f'tiered:{location}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000)},
+        })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.local.set(key, value, self._local_ttl(timeout), version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version)
+        if value is _MISSING:
+            value = self.shared.get(key, _MISSING, version)
+            if value is _MISSING:
+                return default
+            self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.local.set(key, value, self._local_ttl(timeout), version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        # Only this process's memory tier can be cleared
+        self.local.delete(key, version)
+        return self.shared.delete(key, version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version) or self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def _version_key(doctor_id):
+    return f'doctor_cache_version:{doctor_id}'
+
+
+def doctor_cache_version(doctor_id):
+    """Current cache version of a doctor (always read from the shared cache)"""
+    version = cache.get(_version_key(doctor_id))
+    if version is None:
+        cache.add(_version_key(doctor_id), time.time_ns(), None)
+        version = cache.get(_version_key(doctor_id), 0)
+    return version
+
+
+async def adoctor_cache_version(doctor_id):
+    """Async version of doctor_cache_version()"""
+    version = await cache.aget(_version_key(doctor_id))
+    if version is None:
+        await cache.aadd(_version_key(doctor_id), time.time_ns(), None)
+        version = await cache.aget(_version_key(doctor_id), 0)
+    return version
+
+
+def bump_doctor_cache_version(doctor_id):
+    """Invalidate everything cached for a doctor"""
+    # A new unique value rather than incr(): atomic on every backend
+    cache.set(_version_key(doctor_id), time.time_ns(), None)
+
+
+def doctor_cache_key(doctor_id, version, name, *parts):
+    return ':'.join(['doctor', str(doctor_id), str(version), name, *map(str, parts)])
+
+
+def cached_for_doctor(doctor_id, name, compute, *parts, timeout=DOCTOR_CACHE_TIMEOUT):
+    """
+    Return the value cached for a doctor under ``name`` (and ``parts``),
+    calling ``compute()`` and caching its result on a miss
+    """
+    key = doctor_cache_key(doctor_id, doctor_cache_version(doctor_id), name, *parts)
+    tiered = caches[TIERED_CACHE]
+    value = tiered.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        tiered.set(key, value, timeout)
+    return value
+
+
+async def acached_for_doctor(doctor_id, name, compute, *parts, timeout=DOCTOR_CACHE_TIMEOUT):
+    """Async version of cached_for_doctor(); ``compute`` is a coroutine function"""
+    key = doctor_cache_key(doctor_id, await adoctor_cache_version(doctor_id), name, *parts)
+    tiered = caches[TIERED_CACHE]
+    value = await tiered.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await compute()
+        await tiered.aset(key, value, timeout)
+    return value
+
+
+def cached_fragment(name, *vary_on):
+    """HTML stored by ``{% cache ... name *vary_on using='tiered' %}``, or None"""
+    html = caches[TIERED_CACHE].get(make_template_fragment_key(name, vary_on))
+    return None if html is None else mark_safe(html)
+
+
+async def acached_fragment(name, *vary_on):
+    """Async version of cached_fragment()"""
+    html = await caches[TIERED_CACHE].aget(make_template_fragment_key(name, vary_on))
+    return None if html is None else mark_safe(html)
@@ -0,0 +1,155 @@
+"""
+Conversation threads for internal messages.
+
+A conversation keeps a pointer to its last message, and each participant a
+read cursor (``last_read_message_id``): the thread list and unread state are
+read from those rows instead of scanning messages.
+"""
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Message, Conversation, ConversationParticipant
+from . import inbox
+
+
+def direct_conversation(user, other):
+    """Return the one-to-one conversation between two users, if any"""
+    low, high = sorted((user.pk, other.pk))
+    return Conversation.objects.filter(direct_low_user_id=low, direct_high_user_id=high).first()
+
+
+def get_or_create_direct_conversation(user, other, subject=''):
+    """
+    Return the one-to-one conversation between two users, created with both
+    memberships on first use. The unique (direct_low_user, direct_high_user)
+    key makes a concurrent first message reuse the conversation it created.
+    """
+    low, high = sorted((user.pk, other.pk))
+    with transaction.atomic():
+        # get_or_create() retries the lookup when the insert hits the unique key
+        conversation, created = Conversation.objects.get_or_create(
+            direct_low_user_id=low, direct_high_user_id=high, defaults={'subject': subject})
+        if created:
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation=conversation, user_id=low),
+                ConversationParticipant(conversation=conversation, user_id=high),
+            ])
+    return conversation
+
+
+def send_message(sender, text, recipient=None, conversation=None, subject=''):
+    """
+    Post a message to an existing conversation (``conversation``, which the
+    sender must belong to) or to the direct conversation with ``recipient``,
+    created on first use. Returns the new messages (one per other participant).
+    """
+    text = (text or '').strip()
+    if not text:
+        raise ValidationError('Message text is required')
+
+    with transaction.atomic():
+        if conversation is None:
+            if recipient is None:
+                raise ValidationError('A recipient or a conversation is required')
+            if recipient.pk == sender.pk:
+                raise ValidationError('You cannot send a message to yourself')
+            conversation = get_or_create_direct_conversation(sender, recipient, subject)
+
+        # Lock the conversation so concurrent sends update last_message in order
+        conversation = Conversation.objects.select_for_update().get(pk=conversation.pk)
+        recipients = list(User.objects.filter(conversation_memberships__conversation=conversation)
+                          .exclude(pk=sender.pk))
+        if not ConversationParticipant.objects.filter(conversation=conversation, user=sender).exists():
+            raise ValidationError('You are not a participant of this conversation')
+
+        # Saved one by one so signals keep the unread counters and event streams current
+        messages = [
+            Message.objects.create(sender=sender, recipient=user, conversation=conversation,
+                                   subject=subject or conversation.subject, message=text)
+            for user in recipients
+        ]
+        last = messages[-1] if messages else None
+        now = timezone.now()
+        if last is not None:
+            conversation.last_message = last
+            conversation.updated_at = now
+            conversation.save(update_fields=['last_message', 'updated_at'])
+            ConversationParticipant.objects.filter(conversation=conversation).update(last_activity_at=now)
+            # Replying means the sender has read the thread up to their own message
+            mark_thread_read(sender, conversation, up_to_id=last.id)
+    return messages
+
+
+def thread_list(user):
+    """
+    Memberships of ``user`` ordered by latest activity, with the conversation,
+    its last message (and sender) and the per-thread unread count loaded;
+    participants are prefetched in one extra query
+    """
+    unread = (Message.objects
+              .filter(conversation=OuterRef('conversation'), recipient=user,
+                      id__gt=OuterRef('last_read_message_id'))
+              .order_by()
+              .values('conversation')
+              .annotate(n=Count('id'))
+              .values('n'))
+    return (ConversationParticipant.objects
+            .filter(user=user)
+            .select_related('conversation__last_message__sender')
+            .prefetch_related(Prefetch(
+                'conversation__memberships',
+                queryset=ConversationParticipant.objects.select_related('user'),
+            ))
+            .annotate(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
+            .order_by('-last_activity_at', '-id'))
+
+
+def serialize_thread(membership):
+    conversation = membership.conversation
+    last = conversation.last_message
+    participants = [
+        {
+            'id': other.user.id,
+            'name': f"{other.user.first_name} {other.user.last_name}".strip() or other.user.username,
+        }
+        for other in conversation.memberships.all()
+        if other.user_id != membership.user_id
+    ]
+    return {
+        'id': conversation.id,
+        'subject': conversation.subject,
+        'participants': participants,
+        'unread_count': membership.unread_count,
+        'updated_at': conversation.updated_at.isoformat(),
+        'last_message': {
+            'id': last.id,
+            'sender': f"{last.sender.first_name} {last.sender.last_name}",
+            'message': last.message[:100],
+            'time': last.get_time_since(),
+        } if last else None,
+    }
+
+
+def mark_thread_read(user, conversation, up_to_id=None):
+    """
+    Advance the user's read cursor (to the last message by default) and flag
+    the messages received up to it as read, adjusting the unread counters
+    """
+    membership = ConversationParticipant.objects.get(conversation=conversation, user=user)
+    if up_to_id is None:
+        up_to_id = conversation.last_message_id or 0
+    if up_to_id <= membership.last_read_message_id:
+        return 0
+
+    with transaction.atomic():
+        ConversationParticipant.objects.filter(pk=membership.pk).update(last_read_message_id=up_to_id)
+        changed = Message.objects.filter(
+            conversation=conversation, recipient=user, is_read=False, id__lte=up_to_id
+        ).update(is_read=True, read_at=timezone.now())
+        if changed:
+            inbox.messages_read(user.pk, changed)
+    return changed
@@ -0,0 +1,60 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+
+def async_login_required(view_func=None, *, login_url=None):
+    """
+    login_required for async views: the user is resolved off the event loop
+    (``request.user`` can then be read without blocking). Anonymous users are
+    redirected to the login page.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if not user.is_authenticated:
+                return redirect_to_login(request.get_full_path(), login_url)
+            return await view(request, *args, **kwargs)
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
+
+
+def doctor_required(view_func=None, *, api=False):
+    """
+    Ensure ``request.doctor`` resolves to a Doctor before running the view.
+
+    Page views redirect to the login page; with ``api=True`` a JSON 404 is
+    returned instead. Async views get ``request.doctor`` loaded with
+    ``request.adoctor()``.
+    """
+    def not_found():
+        if api:
+            return JsonResponse({'success': False, 'message': 'Doctor not found'}, status=404)
+        return redirect('login')
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not await request.adoctor():
+                    return not_found()
+                return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.doctor:
+                return not_found()
+            return view(request, *args, **kwargs)
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
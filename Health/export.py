@@ -0,0 +1,203 @@
+"""
+Bulk export of prescriptions as one zip archive or one merged PDF.
+
+Prescriptions are read in chunks; PDFs already in the on-disk cache are reused
+(the render_prescription_pdf job warms it when a prescription is created) and
+the others are rendered, then stored in the cache. Misses are rendered in a
+process pool of at most EXPORT_MAX_WORKERS processes, started by the request
+only once a chunk has several misses; without process support (serverless
+runtimes) they are rendered in the request's process.
+
+The zip archive is produced while it is being sent, so memory stays flat
+whatever the number of prescriptions; under ASGI wrap it in async_chunks()
+or Django buffers it whole. The merged PDF is assembled in memory by pypdf
+before being written out, so callers must cap the number of prescriptions.
+"""
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .pdf import (prescription_fingerprint, cached_pdf_path, store_prescription_pdf,
+                  prescription_snapshot, render_snapshot)
+
+
+# Prescriptions loaded (and rendered) per round trip
+EXPORT_CHUNK_SIZE = 50
+
+# Most render processes one export starts (PDF_EXPORT_WORKERS overrides it)
+EXPORT_MAX_WORKERS = 4
+
+# Bytes read from a PDF per streamed chunk
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def export_workers():
+    return getattr(settings, 'PDF_EXPORT_WORKERS', None) or min(os.cpu_count() or 1, EXPORT_MAX_WORKERS)
+
+
+def export_filename(prescription):
+    return f'prescription_{prescription.id}_{prescription.patient.last_name}.pdf'
+
+
+def iter_prescription_pdfs(prescriptions):
+    """
+    Yield (prescription, pdf path) in queryset order, rendering cache misses
+    in parallel. ``prescriptions`` should select_related patient and doctor__user.
+    """
+    queryset = prescriptions.prefetch_related('medicines')
+    renderer = _Renderer()
+    try:
+        chunk = []
+        for prescription in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(prescription)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield from _render_chunk(renderer, chunk)
+                chunk = []
+        if chunk:
+            yield from _render_chunk(renderer, chunk)
+    finally:
+        renderer.close()
+
+
+class _Renderer:
+    """Render snapshots inline, or in a process pool started on the first chunk worth it"""
+
+    def __init__(self):
+        self.pool = None
+        self.workers = export_workers()
+
+    def map(self, snapshots):
+        if self.pool is None and self.workers > 1 and len(snapshots) > 1:
+            try:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            except OSError:
+                # No semaphores (e.g. no /dev/shm): render in this process
+                self.workers = 1
+        if self.pool is None:
+            return map(render_snapshot, snapshots)
+        return self.pool.map(render_snapshot, snapshots)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def _render_chunk(renderer, prescriptions):
+    paths = {}
+    missing = []
+    for prescription in prescriptions:
+        medicines = list(prescription.medicines.all())
+        fingerprint = prescription_fingerprint(prescription, medicines)
+        path = cached_pdf_path(prescription, fingerprint)
+        if os.path.exists(path):
+            paths[prescription.id] = path
+        else:
+            missing.append((prescription, fingerprint, prescription_snapshot(prescription, medicines)))
+
+    rendered = renderer.map([snapshot for _, _, snapshot in missing])
+    for (prescription, fingerprint, _), pdf in zip(missing, rendered):
+        paths[prescription.id] = store_prescription_pdf(prescription, fingerprint, pdf)
+
+    for prescription in prescriptions:
+        yield prescription, paths[prescription.id]
+
+
+class _StreamBuffer:
+    """Write-only file object handing written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(prescriptions):
+    """Generate a zip archive of the prescription PDFs chunk by chunk"""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for prescription, path in iter_prescription_pdfs(prescriptions):
+            with open(path, 'rb') as source, archive.open(export_filename(prescription), mode='w') as target:
+                while True:
+                    block = source.read(STREAM_BLOCK_SIZE)
+                    if not block:
+                        break
+                    target.write(block)
+                    yield buffer.drain()
+            yield buffer.drain()
+    # Central directory
+    yield buffer.drain()
+
+
+def file_chunks(file):
+    """Generate the content of an open binary file block by block, then close it"""
+    try:
+        while True:
+            block = file.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+    finally:
+        file.close()
+
+
+async def async_chunks(chunks):
+    """
+    Async iterator over a sync iterator, advanced one item at a time in the
+    sync thread (which owns the database connection). Under ASGI Django
+    collects a sync streaming_content whole before sending anything.
+    """
+    iterator = iter(chunks)
+    done = object()
+    advance = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await advance(iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def merged_pdf(prescriptions):
+    """
+    Merge the prescription PDFs into one document written to a temporary file
+    (deleted on close) and return the open file, or None if nothing matched.
+    Every page is held in memory until the end: keep ``prescriptions`` small.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    count = 0
+    for prescription, path in iter_prescription_pdfs(prescriptions):
+        writer.append(path, outline_item=f'Prescription #{prescription.id}')
+        count += 1
+    if not count:
+        return None
+
+    output = tempfile.TemporaryFile()
+    writer.write(output)
+    writer.close()
+    output.seek(0)
+    return output
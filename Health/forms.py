@@ -61,6 +61,24 @@ class PatientForm(forms.ModelForm):
         }
 
 
+class PatientImportForm(PatientForm):
+    """
+    PatientForm for imported rows (see patient_import.py): email uniqueness is
+    checked per batch, and one form validates row after row with bind()
+    """
+
+    def bind(self, data):
+        """Rebind the form to another row: building a form copies all its fields, which costs more than validating"""
+        self.data = data
+        self.is_bound = True
+        self.instance = Patient()
+        self._errors = None
+        return self
+
+    def validate_unique(self):
+        pass
+
+
 class AppointmentForm(forms.ModelForm):
     class Meta:
         model = Appointment
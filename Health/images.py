@@ -0,0 +1,163 @@
+"""
+Profile picture processing.
+
+An uploaded picture is stored under the SHA-256 of its bytes,
+``doctor_profiles/<2 first hex digits>/<sha256>.<ext>``, so uploading the same
+image again (by anyone) reuses the stored file. Square variants for every
+width of settings.PROFILE_PICTURE_SIZES are written next to it, in JPEG and
+WebP: ``<sha256>_<width>.jpg`` and ``<sha256>_<width>.webp``.
+
+Variant URLs follow from the original's name, so templates build srcsets
+without touching the storage (see templatetags/profile_pictures.py).
+Pictures uploaded before this layout have no hash in their name and are
+shown as they are until process_profile_pictures converts them.
+"""
+import hashlib
+import posixpath
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+PROFILE_PICTURE_DIR = 'doctor_profiles'
+
+# Avatars are shown at 40px (top bar) and 120px (settings), at 1x and 2x
+DEFAULT_PROFILE_PICTURE_SIZES = (40, 80, 120, 240)
+
+# Larger images are refused before being decoded
+MAX_PIXELS = 40_000_000
+
+# Pillow format -> extension of the stored original
+ORIGINAL_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+# Variant extension -> Pillow format and save options
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+HASHED_NAME = re.compile(r'^(?P<directory>.*/)?(?P<digest>[0-9a-f]{64})\.[a-z]+$')
+
+
+def profile_picture_sizes():
+    return tuple(sorted(getattr(settings, 'PROFILE_PICTURE_SIZES', DEFAULT_PROFILE_PICTURE_SIZES)))
+
+
+def original_name(digest, extension):
+    return f'{PROFILE_PICTURE_DIR}/{digest[:2]}/{digest}.{extension}'
+
+
+def variant_name(name, size, extension):
+    """Name of a variant of the stored original ``name``, or None if it has none"""
+    match = HASHED_NAME.match(name or '')
+    if not match:
+        return None
+    return f"{match['directory'] or ''}{match['digest']}_{size}.{extension}"
+
+
+def _open_image(upload):
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        if image.format not in ORIGINAL_FORMATS:
+            raise ValidationError('Upload a JPEG, PNG, GIF or WebP image')
+        if image.width * image.height > MAX_PIXELS:
+            raise ValidationError('The image is too large')
+        image.load()
+    except ValidationError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid image')
+    return image
+
+
+def _save_as(storage, name, content):
+    saved = storage.save(name, content)
+    if saved != name:
+        # Saved concurrently by another request: same bytes, keep theirs
+        storage.delete(saved)
+
+
+def _render_variant(image, size, extension):
+    image_format, options = VARIANT_FORMATS[extension]
+    square = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    if image_format == 'JPEG':
+        background = Image.new('RGBA', square.size, (255, 255, 255, 255))
+        square = Image.alpha_composite(background, square).convert('RGB')
+    buffer = BytesIO()
+    square.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def store_profile_picture(upload, storage=None):
+    """
+    Store an uploaded picture and its variants, and return the name to assign
+    to ``Doctor.profile_picture``.
+
+    Raises ValidationError when the upload is not a supported image.
+    """
+    storage = storage or default_storage
+    image = _open_image(upload)
+
+    digest = hashlib.sha256()
+    upload.seek(0)
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    name = original_name(digest.hexdigest(), ORIGINAL_FORMATS[image.format])
+
+    if not storage.exists(name):
+        upload.seek(0)
+        _save_as(storage, name, upload)
+
+    # Camera pictures are often stored sideways with an EXIF orientation
+    image = ImageOps.exif_transpose(image).convert('RGBA')
+    for size in profile_picture_sizes():
+        for extension in VARIANT_FORMATS:
+            variant = variant_name(name, size, extension)
+            if not storage.exists(variant):
+                _save_as(storage, variant, _render_variant(image, size, extension))
+    return name
+
+
+def profile_picture_files(name):
+    """Every file stored for the original ``name`` (the original and its variants)"""
+    files = [name]
+    if HASHED_NAME.match(name or ''):
+        files += [variant_name(name, size, extension)
+                  for size in profile_picture_sizes() for extension in VARIANT_FORMATS]
+    return files
+
+
+def srcset(picture, extension='jpg'):
+    """``srcset`` value listing the variants of a picture field, or '' without variants"""
+    if not picture or not HASHED_NAME.match(picture.name):
+        return ''
+    return ', '.join(
+        f'{picture.storage.url(variant_name(picture.name, size, extension))} {size}w'
+        for size in profile_picture_sizes()
+    )
+
+
+def variant_url(picture, size, extension='jpg'):
+    """URL of the smallest variant at least ``size`` pixels wide (the original without variants)"""
+    if not HASHED_NAME.match(picture.name):
+        return picture.url
+    sizes = profile_picture_sizes()
+    size = next((s for s in sizes if s >= size), sizes[-1])
+    return picture.storage.url(variant_name(picture.name, size, extension))
+
+
+def directory_files(storage, directory=PROFILE_PICTURE_DIR):
+    """Names of every file under ``directory`` in ``storage``"""
+    if not storage.exists(directory):
+        return []
+    directories, files = storage.listdir(directory)
+    names = [posixpath.join(directory, name) for name in files]
+    for subdirectory in directories:
+        names += directory_files(storage, posixpath.join(directory, subdirectory))
+    return names
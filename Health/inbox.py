@@ -0,0 +1,206 @@
+"""
+Unread counters and latest ids shown in the header badges.
+
+Each user has one InboxCounter row updated with F() expressions, so reading
+the badges is a primary-key lookup. The helpers below flag rows read with a
+conditional ``update()`` and adjust the counter in the same transaction, by
+the number of rows that update changed, so concurrent requests cannot count a
+read twice. Single-row creates, deletes and saves go through signals, right
+after the write but not atomically with it: a plain ``save()`` that flips
+``is_read`` trusts the value it loaded. A missing row is rebuilt from the
+tables on first use; ``reconcile_inbox_counters`` repairs drift.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Notification, Message, InboxCounter
+
+
+def compute_counters(user_id):
+    """Return the counter values computed from the notification and message tables"""
+    notifications = Notification.objects.filter(user_id=user_id).aggregate(
+        unread=Count('id', filter=Q(is_read=False)), latest=Max('id'))
+    messages = Message.objects.filter(recipient_id=user_id).aggregate(
+        unread=Count('id', filter=Q(is_read=False)), latest=Max('id'))
+    return {
+        'unread_notifications': notifications['unread'],
+        'latest_notification_id': notifications['latest'] or 0,
+        'unread_messages': messages['unread'],
+        'latest_message_id': messages['latest'] or 0,
+    }
+
+
+def reconcile_user(user_id):
+    """Recompute a user's counters; returns (counter, changed)"""
+    values = compute_counters(user_id)
+    try:
+        with transaction.atomic():
+            counter, created = InboxCounter.objects.select_for_update().get_or_create(
+                user_id=user_id, defaults=values)
+    except IntegrityError:
+        # Created concurrently
+        counter, created = InboxCounter.objects.get(user_id=user_id), False
+    if created:
+        return counter, True
+
+    changed = any(getattr(counter, field) != value for field, value in values.items())
+    if changed:
+        for field, value in values.items():
+            setattr(counter, field, value)
+        counter.updated_at = timezone.now()
+        counter.save()
+    return counter, changed
+
+
+def get_counter(user_id):
+    counter = InboxCounter.objects.filter(user_id=user_id).first()
+    if counter is None:
+        counter, _ = reconcile_user(user_id)
+    return counter
+
+
+async def aget_counter(user_id):
+    """Async version of get_counter()"""
+    counter = await InboxCounter.objects.filter(user_id=user_id).afirst()
+    if counter is None:
+        counter, _ = await sync_to_async(reconcile_user)(user_id)
+    return counter
+
+
+def _apply(user_id, rebuild=True, **changes):
+    """
+    Update a user's counters in place, rebuilding the row if it is missing
+    (unless ``rebuild`` is False: the row is then rebuilt on first read)
+    """
+    updated = InboxCounter.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **changes)
+    if not updated and rebuild:
+        reconcile_user(user_id)
+
+
+def _unread_delta(field, delta):
+    if delta >= 0:
+        return F(field) + delta
+    return Greatest(F(field) + delta, 0)
+
+
+def notification_saved(notification, created):
+    changes = {}
+    if created:
+        changes['latest_notification_id'] = Greatest(F('latest_notification_id'), notification.id)
+        if not notification.is_read:
+            changes['unread_notifications'] = _unread_delta('unread_notifications', 1)
+    else:
+        was_read = getattr(notification, '_loaded_is_read', None)
+        if was_read is None or was_read == notification.is_read:
+            return
+        changes['unread_notifications'] = _unread_delta('unread_notifications', 1 if was_read else -1)
+    notification._loaded_is_read = notification.is_read
+    _apply(notification.user_id, **changes)
+
+
+def notification_deleted(notification):
+    # Never rebuild here: when the user is being deleted, their counter may
+    # already be gone and a new row would violate the foreign key at commit
+    if not notification.is_read:
+        _apply(notification.user_id, rebuild=False,
+               unread_notifications=_unread_delta('unread_notifications', -1))
+
+
+def message_saved(message, created):
+    changes = {}
+    if created:
+        changes['latest_message_id'] = Greatest(F('latest_message_id'), message.id)
+        if not message.is_read:
+            changes['unread_messages'] = _unread_delta('unread_messages', 1)
+    else:
+        was_read = getattr(message, '_loaded_is_read', None)
+        if was_read is None or was_read == message.is_read:
+            return
+        changes['unread_messages'] = _unread_delta('unread_messages', 1 if was_read else -1)
+    message._loaded_is_read = message.is_read
+    _apply(message.recipient_id, **changes)
+
+
+def message_deleted(message):
+    # Never rebuild here (see notification_deleted)
+    if not message.is_read:
+        _apply(message.recipient_id, rebuild=False, unread_messages=_unread_delta('unread_messages', -1))
+
+
+def read_notification(user, notification_id):
+    """Mark one of a user's notifications read; returns whether this call changed it"""
+    with transaction.atomic():
+        changed = Notification.objects.filter(id=notification_id, user=user, is_read=False).update(
+            is_read=True, read_at=timezone.now())
+        if changed:
+            _apply(user.pk, unread_notifications=_unread_delta('unread_notifications', -1))
+    return bool(changed)
+
+
+def read_message(user, message_id):
+    """Mark one message received by a user read; returns whether this call changed it"""
+    with transaction.atomic():
+        changed = Message.objects.filter(id=message_id, recipient=user, is_read=False).update(
+            is_read=True, read_at=timezone.now())
+        if changed:
+            messages_read(user.pk, changed)
+    return bool(changed)
+
+
+def mark_all_notifications_read(user):
+    """Bulk mark a user's notifications read and adjust the counter; returns the number changed"""
+    with transaction.atomic():
+        changed = Notification.objects.filter(user=user, is_read=False).update(
+            is_read=True, read_at=timezone.now())
+        if changed:
+            _apply(user.pk, unread_notifications=_unread_delta('unread_notifications', -changed))
+    return changed
+
+
+def refresh_notification_counters(user_ids):
+    """
+    Recompute the notification counters of many users in one UPDATE, after
+    rows were written with bulk_create() (no signals). Returns
+    {user_id: latest_notification_id} for the users that have a counter row;
+    missing rows are rebuilt on first use.
+    """
+    notifications = Notification.objects.filter(user_id=OuterRef('user_id')).order_by().values('user_id')
+    InboxCounter.objects.filter(user_id__in=user_ids).update(
+        unread_notifications=Coalesce(Subquery(
+            notifications.filter(is_read=False).annotate(n=Count('id')).values('n')), 0),
+        latest_notification_id=Coalesce(Subquery(
+            notifications.annotate(latest=Max('id')).values('latest')), 0),
+        updated_at=timezone.now(),
+    )
+    return dict(InboxCounter.objects.filter(user_id__in=user_ids).values_list('user_id', 'latest_notification_id'))
+
+
+def messages_read(user_id, count):
+    """Adjust the counter after ``count`` messages were flagged read with update()"""
+    _apply(user_id, unread_messages=_unread_delta('unread_messages', -count))
+
+
+def inbox_summary(user):
+    """
+    Return (summary, etag, last_modified) for a user's notifications and
+    messages from the counters row
+    """
+    counter = get_counter(user.pk)
+    summary = {
+        'notifications': {
+            'unread_count': counter.unread_notifications,
+            'latest_id': counter.latest_notification_id,
+        },
+        'messages': {
+            'unread_count': counter.unread_messages,
+            'latest_id': counter.latest_message_id,
+        },
+    }
+    key = '{notifications[unread_count]}:{notifications[latest_id]}:{messages[unread_count]}:{messages[latest_id]}'.format(**summary)
+    etag = '"%s"' % hashlib.md5(f'{user.pk}:{key}'.encode()).hexdigest()
+    return summary, etag, counter.updated_at
@@ -0,0 +1,159 @@
+"""
+Database-backed job queue.
+
+Decorate a function with ``@job`` and call ``func.delay(*args, **kwargs)`` to
+store a Job row instead of running it; ``python manage.py run_worker`` claims
+and executes queued jobs. Arguments must be JSON serializable (pass ids, not
+model instances).
+
+Workers claim jobs with a single conditional UPDATE (its subquery uses
+``FOR UPDATE SKIP LOCKED`` where the database supports it), so several workers
+can share one queue without running a job twice.
+"""
+import os
+import socket
+import traceback
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+# Seconds before a retry, doubled after every failed attempt
+JOB_RETRY_DELAY = 30
+
+# A running job not finished after this many seconds is assumed lost (worker killed)
+JOB_LOCK_TIMEOUT = 600
+
+
+def job(func=None, *, priority=0, max_attempts=3):
+    """
+    Register a function as a background job and add ``func.delay()``.
+    Calling the function directly still runs it inline.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        def delay(*args, **kwargs):
+            return enqueue(name, args, kwargs, priority=priority, max_attempts=max_attempts)
+
+        wrapper.delay = delay
+        wrapper.job_name = name
+        wrapper.is_job = True
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, max_attempts=3, run_at=None):
+    """
+    Queue a job. With JOB_QUEUE_EAGER enabled (no worker running, e.g. in
+    development) the job runs inline instead and None is returned.
+    """
+    if getattr(settings, 'JOB_QUEUE_EAGER', False):
+        resolve(name)(*args, **(kwargs or {}))
+        return None
+
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def resolve(name):
+    """Import a job function, refusing anything not decorated with @job"""
+    func = import_string(name)
+    if not getattr(func, 'is_job', False):
+        raise ValueError(f'{name} is not a registered job')
+    return func
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died while running them"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', JOB_LOCK_TIMEOUT))
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None, updated_at=timezone.now()
+    )
+
+
+def claim_job(worker):
+    """
+    Lock the next ready job (highest priority, then oldest) for ``worker``
+    and return it, or None when the queue is empty.
+
+    The job is picked and locked by one conditional UPDATE (``WHERE id =
+    (SELECT ... LIMIT 1) AND status = 'queued'``): SQLite takes its write lock
+    before running it, where a SELECT followed by an UPDATE would have to
+    upgrade a read lock and could fail with SQLITE_BUSY.
+    """
+    connection = connections[Job.objects.db]
+    # A few attempts in case another worker wins the race for the first job
+    for _ in range(5):
+        now = timezone.now()
+        ready = Job.objects.filter(status='queued', run_at__lte=now).order_by('-priority', 'run_at', 'id')
+        with transaction.atomic():
+            candidates = ready
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            claimed = Job.objects.filter(id=Subquery(candidates.values('id')[:1]), status='queued').update(
+                status='running', locked_by=worker, locked_at=now,
+                attempts=F('attempts') + 1, updated_at=now,
+            )
+        if claimed:
+            return Job.objects.get(status='running', locked_by=worker, locked_at=now)
+        if not ready.exists():
+            return None
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome (done, retry or failed)"""
+    try:
+        func = resolve(job.name)
+    except (ImportError, ValueError):
+        # Unknown job: retrying cannot help
+        func = None
+        job.attempts = job.max_attempts
+
+    try:
+        if func is None:
+            raise ValueError(f'{job.name} is not a registered job')
+        func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = getattr(settings, 'JOB_RETRY_DELAY', JOB_RETRY_DELAY) * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = 'failed'
+        job.locked_by = ''
+        job.locked_at = None
+        job.save(update_fields=['status', 'attempts', 'run_at', 'last_error', 'locked_by', 'locked_at', 'updated_at'])
+        return False
+
+    job.status = 'done'
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'locked_by', 'locked_at', 'updated_at'])
+    return True
@@ -0,0 +1,182 @@
+import re
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Health.inbox import compute_counters
+from Health.models import Appointment, Doctor, Notification, Message
+from Health.pagination import CursorPaginator, PartitionedCursorPaginator
+from Health.scheduling import (APPOINTMENT_PARTITION_ORDERING, appointment_list_partitions, appointments_in_range,
+                               check_slots, filter_appointments, overlapping_appointments)
+from Health.stats import compute_dashboard_stats, dashboard_lists
+from Health.views import filter_prescriptions
+
+
+def list_pages(name, queryset, per_page, ordering, **last_row):
+    """
+    The first page and a following page of a list, as CursorPaginator runs
+    them; ``last_row`` holds the ordering values of the row before that page
+    """
+    paginator = CursorPaginator(queryset, per_page, ordering)
+    cursor = paginator._encode(SimpleNamespace(**last_row), 'next')
+    return [
+        (f'{name}: first page', paginator._page_queryset(None)[0]),
+        (f'{name}: next page', paginator._page_queryset(cursor)[0]),
+    ]
+
+
+def partitioned_list_pages(name, partitions, per_page, ordering, **last_row):
+    """
+    The queries of a first page (one per partition, when the earlier ones run
+    out of rows) and of a following page of a PartitionedCursorPaginator list;
+    ``last_row`` holds the partition and ordering values of the row before it
+    """
+    paginator = PartitionedCursorPaginator(partitions, per_page, ordering)
+    cursor = paginator._encode(SimpleNamespace(**last_row), 'next')
+    first_page, _ = paginator._partition_queries(None)
+    next_page, _ = paginator._partition_queries(cursor)
+    _, next_queryset = next(next_page)
+    return [
+        *[(f'{name}: first page, part {index}', queryset[:per_page + 1]) for index, queryset in first_page],
+        (f'{name}: next page', next_queryset[:per_page + 1]),
+    ]
+
+
+def representative_queries():
+    """
+    The queries behind the hot views, built with the views' own helpers for
+    placeholder ids. Entries are querysets, or callables whose SELECTs are
+    captured (for helpers ending in aggregate() or list()). Only the query
+    plans matter, so no rows are needed.
+    """
+    doctor = Doctor(id=1)
+    user = User(id=1)
+    today = date.today()
+    now = timezone.now()
+    recent = {'created_at': now, 'id': 1}
+    todays_appointments, recent_patients = dashboard_lists(doctor, today)
+    appointments = Appointment.objects.filter(doctor=doctor).select_related('patient')
+    prescriptions = doctor.prescriptions.select_related('patient', 'doctor__user').order_by('-created_at', '-id')
+    next_appointment = {'cursor_partition': 0, 'scheduled_date': today, 'scheduled_time': time(9, 0), 'id': 1}
+
+    return [
+        ('dashboard: counters', lambda: compute_dashboard_stats(doctor, today)),
+        ('dashboard: today\'s appointments', todays_appointments),
+        ('dashboard: recent patients', recent_patients),
+        *list_pages('patients_list', doctor.patients.all().order_by('-created_at', '-id'),
+                    8, ['-created_at', '-id'], **recent),
+        *list_pages('patients_list: status filter', doctor.patients.filter(status='pending').order_by('-created_at', '-id'),
+                    8, ['-created_at', '-id'], **recent),
+        *partitioned_list_pages('appointments_list', appointment_list_partitions(appointments, today),
+                                10, APPOINTMENT_PARTITION_ORDERING, **next_appointment),
+        *partitioned_list_pages('appointments_list: status filter', appointment_list_partitions(
+            filter_appointments(appointments, {'status': 'scheduled'}, today), today)[:1],
+            10, APPOINTMENT_PARTITION_ORDERING, **next_appointment),
+        *partitioned_list_pages('appointments_list: date filter', appointment_list_partitions(
+            filter_appointments(appointments, {'date': 'week'}, today), today)[:1],
+            10, APPOINTMENT_PARTITION_ORDERING, **next_appointment),
+        ('calendar_view: month range', lambda: appointments_in_range(doctor, today, today + timedelta(days=41))),
+        ('validate_appointment_overlap', overlapping_appointments(
+            doctor, now, now + timedelta(minutes=30)).order_by('starts_at')[:1]),
+        ('check_appointment_slots', lambda: check_slots(doctor, [(today, time(9, 0), 30), (today, time(14, 0), 30)])),
+        *list_pages('consultations_list', doctor.consultations.all().select_related('patient', 'appointment')
+                    .order_by('-created_at', '-id'), 10, ['-created_at', '-id'], **recent),
+        *list_pages('prescription_list', prescriptions, 10, ['-created_at', '-id'], **recent),
+        ('patient_prescriptions', filter_prescriptions(prescriptions, {'patient': '1'})[:11]),
+        ('get_notifications: list', Notification.objects.filter(user_id=user.pk)[:20]),
+        ('get_messages: list', Message.objects.filter(recipient_id=user.pk).select_related('sender')[:20]),
+        ('inbox counters: rebuild', lambda: compute_counters(user.pk)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN on the querysets behind the hot views and fail when one of '
+        'them falls back to a full table scan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to audit')
+        parser.add_argument('--show-plans', action='store_true', help='Print every query plan')
+
+    def full_scans(self, vendor, plan):
+        """Return (failures, warnings) found in a query plan"""
+        failures, warnings = [], []
+        for line in plan.splitlines():
+            if vendor == 'sqlite':
+                if 'USE TEMP B-TREE FOR ORDER BY' in line:
+                    # Rows are sorted after the fact instead of read in index order
+                    warnings.append(line.strip())
+                    continue
+                match = re.search(r'\bSCAN (\S+)(.*)', line)
+                if not match or 'VIRTUAL TABLE' in match.group(2):
+                    continue
+                if 'USING' in match.group(2):
+                    # Walks a whole index (e.g. only used for ordering)
+                    warnings.append(line.strip())
+                else:
+                    failures.append(line.strip())
+            elif vendor == 'postgresql':
+                if 'Seq Scan on' in line:
+                    failures.append(line.strip())
+        return failures, warnings
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        failed = 0
+        with transaction.atomic(using=using):
+            if connection.vendor == 'postgresql':
+                # Small tables make sequential scans attractive; only fail when no index can be used
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, query in representative_queries():
+                plans = self.query_plans(connection, using, query)
+                if not plans:
+                    self.stdout.write(self.style.WARNING(f'NO QUERY   {name} (not run on {using})'))
+                for suffix, plan in plans:
+                    failed += self.report(f'{name}{suffix}', connection.vendor, plan, options['show_plans'])
+
+        if failed:
+            raise CommandError(f'{failed} query(ies) fall back to a full table scan.')
+        self.stdout.write(self.style.SUCCESS('All audited queries use an index.'))
+
+    def query_plans(self, connection, using, query):
+        """[(name suffix, plan)] for a queryset, or for every SELECT a callable runs"""
+        if not callable(query):
+            return [('', query.using(using).explain())]
+        with CaptureQueriesContext(connection) as captured:
+            query()
+        selects = [q['sql'] for q in captured.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        plans = []
+        for number, sql in enumerate(selects, 1):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+                plan = '\n'.join(str(row[-1]) for row in cursor.fetchall())
+            plans.append((f' #{number}' if len(selects) > 1 else '', plan))
+        return plans
+
+    def report(self, name, vendor, plan, show_plans):
+        """Print the verdict on a plan; returns 1 for a full scan, 0 otherwise"""
+        failures, warnings = self.full_scans(vendor, plan)
+        if failures:
+            self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}'))
+        elif warnings:
+            self.stdout.write(self.style.WARNING(f'WARNING    {name}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'OK         {name}'))
+
+        for line in failures + warnings:
+            self.stdout.write(f'    {line}')
+        if show_plans:
+            self.stdout.write('\n'.join(f'    | {line}' for line in plan.splitlines()))
+        return 1 if failures else 0
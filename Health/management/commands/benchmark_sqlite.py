@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Health.sqlite import apply_pragmas, sqlite_pragmas
+
+
+# SQLite defaults as Django connects without SQLITE_PRAGMAS (Python's
+# sqlite3 waits 5 seconds for a lock)
+BASELINE_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'busy_timeout': 5000,
+}
+
+# Rows in the benchmark table before the run starts
+SEED_ROWS = 20000
+# Doctors the rows are spread over
+DOCTORS = 50
+
+
+def create_database(path, pragmas):
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection.cursor(), pragmas)
+    connection.executescript('''
+        CREATE TABLE appointment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id INTEGER NOT NULL,
+            scheduled_date TEXT NOT NULL,
+            notes TEXT NOT NULL
+        );
+        CREATE INDEX appointment_doctor ON appointment (doctor_id, scheduled_date);
+    ''')
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO appointment (doctor_id, scheduled_date, notes) VALUES (?, ?, ?)',
+        ((i % DOCTORS, f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'x' * 200) for i in range(SEED_ROWS)),
+    )
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def read(connection, rng):
+    doctor_id = rng.randrange(DOCTORS)
+    connection.execute('SELECT COUNT(*) FROM appointment WHERE doctor_id = ?', (doctor_id,)).fetchone()
+    connection.execute(
+        'SELECT * FROM appointment WHERE doctor_id = ? ORDER BY scheduled_date DESC, id DESC LIMIT 20',
+        (doctor_id,),
+    ).fetchall()
+
+
+def write(connection, rng):
+    # Like create_prescription: a few rows in one transaction
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.executemany(
+            'INSERT INTO appointment (doctor_id, scheduled_date, notes) VALUES (?, ?, ?)',
+            [(rng.randrange(DOCTORS), '2025-06-01', 'y' * 200) for _ in range(5)],
+        )
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def worker(path, pragmas, kind, deadline, results):
+    latencies = []
+    errors = 0
+    try:
+        # The wait for locks comes from the busy_timeout pragma
+        connection = sqlite3.connect(path, isolation_level=None, timeout=0)
+        apply_pragmas(connection.cursor(), pragmas)
+        operation = read if kind == 'read' else write
+        rng = random.Random(os.getpid())
+
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(connection, rng)
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+    finally:
+        # Always report, or the parent would wait forever
+        results.put((kind, latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent multi-process reads and writes on a scratch SQLite '
+        'database with the default pragmas and with settings.SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reading processes')
+        parser.add_argument('--writers', type=int, default=2, help='Writing processes')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] == 0:
+            raise CommandError('At least one reader or writer is needed')
+
+        runs = [('default', BASELINE_PRAGMAS), ('SQLITE_PRAGMAS', sqlite_pragmas())]
+        self.stdout.write(f"{options['readers']} reader(s), {options['writers']} writer(s), "
+                          f"{options['duration']:g} s per run\n")
+        for label, pragmas in runs:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                create_database(path, pragmas)
+                stats = self._run(path, pragmas, options['readers'], options['writers'], options['duration'])
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for kind, (count, errors, p50, p95, worst) in stats.items():
+                self.stdout.write(
+                    f'  {kind:<6} {count / options["duration"]:9.1f} ops/s   p50 {p50:7.2f} ms   '
+                    f'p95 {p95:7.2f} ms   max {worst:8.2f} ms   locked errors {errors}'
+                )
+
+    def _run(self, path, pragmas, readers, writers, duration):
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + duration
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, pragmas, kind, deadline, results))
+            for kind in ['read'] * readers + ['write'] * writers
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        stats = {}
+        for kind in ('read', 'write'):
+            latencies = sorted(latency for k, values, _ in collected if k == kind for latency in values)
+            errors = sum(e for k, _, e in collected if k == kind)
+            if not latencies and not errors:
+                continue
+            if latencies:
+                p50 = latencies[len(latencies) // 2] * 1000
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+                worst = latencies[-1] * 1000
+            else:
+                p50 = p95 = worst = 0
+            stats[kind] = (len(latencies), errors, p50, p95, worst)
+        return stats
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+
+DEFAULT_PATHS = [
+    '/api/notifications/',
+    '/api/messages/',
+    '/patients/',
+    '/appointments/',
+    '/prescriptions/',
+]
+
+
+async def asgi_get(app, path, cookie):
+    """Send a GET through the ASGI application; returns the status code"""
+    url = urlsplit(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    request_sent = False
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the throughput of views served through the ASGI application '
+        'with concurrent in-process requests (signed in as --user)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help=f'Paths to request (default: {", ".join(DEFAULT_PATHS)})')
+        parser.add_argument('--user', required=True, help='Username the requests are made as')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'Unknown user: {options["user"]}')
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+
+        # A real session, removed when done
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        try:
+            app = get_asgi_application()
+            for path in options['paths'] or DEFAULT_PATHS:
+                self._run(app, path, cookie, options['concurrency'], options['requests'])
+        finally:
+            client.logout()
+
+    def _run(self, app, path, cookie, concurrency, total):
+        latencies = []
+        statuses = {}
+
+        async def one(semaphore):
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_get(app, path, cookie)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*(one(semaphore) for _ in range(total)))
+
+        started = time.perf_counter()
+        asyncio.run(run_all())
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        codes = ', '.join(f'{status}: {count}' for status, count in sorted(statuses.items(), key=str))
+        self.stdout.write(
+            f'{path:<40} {total / elapsed:8.1f} req/s   p50 {p50:7.1f} ms   p95 {p95:7.1f} ms   ({codes})'
+        )
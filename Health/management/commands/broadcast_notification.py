@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Health.models import Notification
+from Health.notifications import broadcast_to_doctors
+
+
+class Command(BaseCommand):
+    help = 'Send a notification to every active doctor (e.g. a system announcement)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('title')
+        parser.add_argument('message')
+        parser.add_argument('--type', default='system', dest='notification_type',
+                            choices=[choice for choice, _ in Notification.NOTIFICATION_TYPES])
+        parser.add_argument('--link', default=None)
+        parser.add_argument('--dedupe-key', default=None,
+                            help='Makes the broadcast safe to re-run: users who already got this key are skipped')
+
+    def handle(self, *args, **options):
+        if not options['title'].strip():
+            raise CommandError('A title is required')
+        created = broadcast_to_doctors(
+            options['notification_type'], options['title'], options['message'],
+            link=options['link'], dedupe_key=options['dedupe_key'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {created} notification(s).'))
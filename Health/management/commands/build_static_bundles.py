@@ -0,0 +1,91 @@
+import re
+import textwrap
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Inline blocks without attributes (a <style> inside a script's string is
+# part of the script, as the regex consumes blocks left to right)
+INLINE_BLOCK = re.compile(r'^([ \t]*)<(style|script)>(.*?)</\2>[ \t]*$', re.S | re.M)
+TEMPLATE_SYNTAX = re.compile(r'\{[{%#]')
+LOAD_STATIC = re.compile(r'\{%\s*load\s[^%]*\bstatic\b[^%]*%\}')
+EXTENDS = re.compile(r'^\{%\s*extends\s[^%]*%\}[ \t]*\n?', re.M)
+
+# Documents rendered on their own (printed or converted to PDF), which must
+# stay self-contained
+STANDALONE_TEMPLATES = {'Prescriptions/presription_pdf.html'}
+
+BUNDLES = {
+    'style': ('css', '<link rel="stylesheet" href="{% static \'{path}\' %}">'),
+    'script': ('js', '<script src="{% static \'{path}\' %}"></script>'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the inline <style> and <script> blocks of the Health templates into '
+        'static/Health/css and static/Health/js, replacing them with links to the files. '
+        'collectstatic then fingerprints and compresses them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only list the inline blocks left and fail if there are any',
+        )
+
+    def handle(self, *args, **options):
+        app = apps.get_app_config('Health')
+        templates_dir = Path(app.path) / 'templates'
+        static_dir = Path(app.path) / 'static'
+
+        left, kept = [], []
+        for template in sorted(templates_dir.rglob('*.html')):
+            name = template.relative_to(templates_dir).as_posix()
+            if name in STANDALONE_TEMPLATES:
+                continue
+            source = template.read_text(encoding='utf-8')
+            blocks = list(INLINE_BLOCK.finditer(source))
+            movable = [block for block in blocks if not TEMPLATE_SYNTAX.search(block.group(3))]
+            kept += [f'{name} <{block.group(2)}>' for block in blocks if block not in movable]
+            if not movable:
+                continue
+            if options['check']:
+                left += [f'{name} <{block.group(2)}>' for block in movable]
+                continue
+
+            output, position, counts = [], 0, {}
+            for block in movable:
+                indent, tag, body = block.groups()
+                folder, link = BUNDLES[tag]
+                counts[tag] = counts.get(tag, 0) + 1
+                suffix = f'-{counts[tag]}' if counts[tag] > 1 else ''
+                path = f'Health/{folder}/{name[:-len(".html")]}{suffix}.{folder}'
+
+                target = static_dir / path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(textwrap.dedent(body).strip('\n') + '\n', encoding='utf-8')
+
+                output += [source[position:block.start()], indent, link.replace('{path}', path)]
+                position = block.end()
+                self.stdout.write(f'{name}: <{tag}> -> {path}')
+            output.append(source[position:])
+            template.write_text(self._load_static(''.join(output)), encoding='utf-8')
+
+        for block in kept:
+            self.stdout.write(self.style.WARNING(f'{block} uses template syntax, left inline'))
+        if left:
+            raise CommandError('Inline blocks to move (run build_static_bundles):\n  ' + '\n  '.join(left))
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS('No inline blocks to move.'))
+
+    def _load_static(self, source):
+        if LOAD_STATIC.search(source):
+            return source
+        extends = EXTENDS.search(source)
+        if extends:
+            # {% extends %} must stay the first tag
+            return source[:extends.end()] + '{% load static %}\n' + source[extends.end():]
+        return '{% load static %}\n' + source
@@ -0,0 +1,56 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from Health.models import Doctor
+from Health.patient_import import IMPORT_BATCH_SIZE, import_format, import_patients, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import patients for a doctor from a CSV or XLSX file whose first row '
+        'names the columns (the patient form fields)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv or .xlsx file')
+        parser.add_argument('--doctor', required=True, help="Username of the patients' doctor")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Rows validated and inserted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the rows')
+        parser.add_argument('--show-errors', type=int, default=20, help='Failed rows to print')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        doctor = Doctor.objects.select_related('user').filter(user__username=options['doctor']).first()
+        if doctor is None:
+            raise CommandError(f"No doctor with the username {options['doctor']}")
+
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{result.processed} row(s) read, {result.created} created, {result.failed} failed '
+                f'({result.processed / elapsed if elapsed else 0:.0f} rows/s)'
+            )
+
+        try:
+            rows = read_rows(options['path'], import_format(options['path']))
+            result = import_patients(doctor, rows, batch_size=options['batch_size'],
+                                     progress=progress, dry_run=options['dry_run'])
+        except (ValidationError, OSError) as e:
+            raise CommandError(getattr(e, 'message', None) or str(e))
+
+        for failure in result.errors[:options['show_errors']]:
+            details = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in failure['errors'].items())
+            self.stdout.write(self.style.WARNING(f"Line {failure['line']}: {details}"))
+        if result.failed > options['show_errors']:
+            self.stdout.write(self.style.WARNING(f"... and {result.failed - options['show_errors']} more"))
+
+        summary = f'{result.created} patient(s) created, {result.failed} row(s) rejected in {time.monotonic() - started:.1f} s.'
+        if options['dry_run']:
+            summary = f'{result.processed - result.failed} valid row(s), {result.failed} rejected (dry run).'
+        self.stdout.write(self.style.SUCCESS(summary))
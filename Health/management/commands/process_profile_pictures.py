@@ -0,0 +1,58 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from Health.images import directory_files, profile_picture_files, store_profile_picture
+from Health.models import Doctor
+
+
+class Command(BaseCommand):
+    help = (
+        'Store existing doctor profile pictures under their content hash with '
+        'their resized variants; --prune then deletes the files no doctor uses'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete the files under doctor_profiles/ no doctor refers to')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+
+    def handle(self, *args, **options):
+        storage = Doctor._meta.get_field('profile_picture').storage
+        converted = 0
+        for doctor in Doctor.objects.exclude(profile_picture='').exclude(profile_picture=None):
+            picture = doctor.profile_picture
+            files = profile_picture_files(picture.name)
+            if len(files) > 1 and all(storage.exists(name) for name in files):
+                continue
+            if not storage.exists(picture.name):
+                self.stdout.write(self.style.WARNING(f'{doctor}: {picture.name} is missing'))
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'{doctor}: {picture.name} would be converted')
+                converted += 1
+                continue
+            try:
+                with storage.open(picture.name, 'rb') as upload:
+                    name = store_profile_picture(upload, storage)
+            except ValidationError as e:
+                self.stdout.write(self.style.WARNING(f'{doctor}: {picture.name}: {e.message}'))
+                continue
+            self.stdout.write(f'{doctor}: {picture.name} -> {name}')
+            doctor.profile_picture = name
+            doctor.save(update_fields=['profile_picture', 'updated_at'])
+            converted += 1
+        self.stdout.write(self.style.SUCCESS(f'{converted} picture(s) converted.'))
+
+        if options['prune']:
+            used = {
+                name
+                for picture in Doctor.objects.exclude(profile_picture='').values_list('profile_picture', flat=True)
+                if picture
+                for name in profile_picture_files(picture)
+            }
+            unused = [name for name in directory_files(storage) if name not in used]
+            for name in unused:
+                if not options['dry_run']:
+                    storage.delete(name)
+            verb = 'would be deleted' if options['dry_run'] else 'deleted'
+            self.stdout.write(self.style.SUCCESS(f'{len(unused)} unused file(s) {verb}.'))
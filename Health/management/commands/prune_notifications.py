@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Health.retention import prune_notifications, retention_days, RETENTION_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete read notifications older than the per-type retention '
+        '(settings.NOTIFICATION_RETENTION_DAYS), optionally archiving them first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive', choices=['none', 'table', 'ndjson'],
+                            help='Archive pruned rows (defaults to settings.NOTIFICATION_ARCHIVE)')
+        parser.add_argument('--batch-size', type=int, default=RETENTION_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired notifications')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        archive = False if options['archive'] == 'none' else options['archive']
+        policy = ', '.join(f'{kind}: {days} days' for kind, days in retention_days().items())
+        self.stdout.write(f'Retention: {policy}')
+
+        count = prune_notifications(
+            archive=archive,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{count} notification(s) would be pruned.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Pruned {count} notification(s).'))
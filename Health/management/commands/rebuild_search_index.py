@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Health.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recompute patient search documents and rebuild the full-text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        rebuild_search_index(options['database'])
+        self.stdout.write(self.style.SUCCESS('Patient search index rebuilt.'))
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from Health.inbox import reconcile_user
+
+
+class Command(BaseCommand):
+    help = 'Recompute the unread notification/message counters of every user and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only reconcile this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        if options['users']:
+            users = users.filter(id__in=options['users'])
+
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            batch = list(users.filter(id__gt=last_id)[:1000])
+            if not batch:
+                break
+            for user_id in batch:
+                _, changed = reconcile_user(user_id)
+                checked += 1
+                if changed:
+                    fixed += 1
+                    self.stdout.write(self.style.WARNING(f'Fixed counters of user #{user_id}'))
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} user(s), fixed {fixed}.'))
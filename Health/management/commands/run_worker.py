@@ -0,0 +1,61 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Health.jobs import claim_job, requeue_stale_jobs, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs until stopped (or until the queue is empty with --burst)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help='Exit after this many jobs (0 = no limit)')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = worker_name()
+        self.stdout.write(f'Worker {worker} started.')
+        processed = 0
+        last_requeue = 0
+
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_requeue > 60:
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s).'))
+                last_requeue = time.monotonic()
+
+            job = claim_job(worker)
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            started = time.monotonic()
+            if run_job(job):
+                self.stdout.write(self.style.SUCCESS(
+                    f'Done    {job} in {time.monotonic() - started:.2f}s'))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f'Failed  {job} (attempt {job.attempts}/{job.max_attempts})'))
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f'Worker {worker} stopped after {processed} job(s).')
+
+    def stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
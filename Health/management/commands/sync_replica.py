@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from Health.routers import PRIMARY, REPLICA, replica_configured
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary database onto the SQLite replica '
+        '(stands in for replication when trying the replica router locally)'
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database configured (set DATABASE_REPLICA_URL)')
+        primary, replica = connections[PRIMARY], connections[REPLICA]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Only SQLite databases can be synced; use your database replication otherwise')
+
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            # Online backup: consistent even while the primary is being written
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}."
+        ))
@@ -0,0 +1,178 @@
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .models import Doctor
+from .routers import request_state, replica_configured, STICKY_COOKIE, DEFAULT_STICKY_SECONDS
+
+
+def _version_key(user_id):
+    return f'request_doctor_version:{user_id}'
+
+
+def invalidate_request_doctor(user_id):
+    """Orphan every cached copy of the doctor profile of a user"""
+    cache.set(_version_key(user_id), uuid4().hex, None)
+
+
+def _with_user(doctor, user):
+    # Only the Doctor row is cached (never the User and its password hash):
+    # the user comes from the request
+    doctor.user = user
+    return doctor
+
+
+def load_doctor(user):
+    """
+    Return the Doctor of an authenticated user (with ``doctor.user`` set to
+    ``user``) or None. When DOCTOR_CACHE_TIMEOUT is set, the Doctor row is cached
+    under a versioned key that is bumped whenever the Doctor or its User is saved.
+    """
+    if not user.is_authenticated:
+        return None
+
+    timeout = getattr(settings, 'DOCTOR_CACHE_TIMEOUT', 0)
+    if timeout:
+        version = cache.get(_version_key(user.pk))
+        if version is None:
+            version = uuid4().hex
+            cache.set(_version_key(user.pk), version, None)
+        key = f'request_doctor:{user.pk}:{version}'
+        doctor = cache.get(key)
+        if doctor is not None:
+            return _with_user(doctor, user)
+
+    try:
+        doctor = Doctor.objects.get(user_id=user.pk)
+    except Doctor.DoesNotExist:
+        return None
+
+    if timeout:
+        cache.set(key, doctor, timeout)
+    return _with_user(doctor, user)
+
+
+async def aload_doctor(user):
+    """Async version of load_doctor() (the same cache keys are used)"""
+    if not user.is_authenticated:
+        return None
+
+    timeout = getattr(settings, 'DOCTOR_CACHE_TIMEOUT', 0)
+    if timeout:
+        version = await cache.aget(_version_key(user.pk))
+        if version is None:
+            version = uuid4().hex
+            await cache.aset(_version_key(user.pk), version, None)
+        key = f'request_doctor:{user.pk}:{version}'
+        doctor = await cache.aget(key)
+        if doctor is not None:
+            return _with_user(doctor, user)
+
+    try:
+        doctor = await Doctor.objects.aget(user_id=user.pk)
+    except Doctor.DoesNotExist:
+        return None
+
+    if timeout:
+        await cache.aset(key, doctor, timeout)
+    return _with_user(doctor, user)
+
+
+def _resolve_user(request):
+    # Evaluates the lazy request.user (session and user lookups)
+    request.user.is_authenticated
+    return request.user
+
+
+class DoctorMiddleware:
+    """
+    Attach a lazily evaluated ``request.doctor`` (None for anonymous users and
+    users without a doctor profile). Must come after AuthenticationMiddleware.
+
+    Async views cannot evaluate it (nor ``request.user``) without blocking the
+    event loop; they await ``request.auser()`` and ``request.adoctor()`` instead.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        return await self.get_response(request)
+
+    def process_request(self, request):
+        request.doctor = SimpleLazyObject(lambda: load_doctor(request.user))
+
+        async def auser():
+            return await sync_to_async(_resolve_user)(request)
+
+        async def adoctor():
+            doctor = await aload_doctor(await auser())
+            # Later (sync) reads of request.doctor reuse it
+            request.doctor = doctor
+            return doctor
+
+        if not hasattr(request, 'auser'):
+            request.auser = auser
+        request.adoctor = adoctor
+
+
+class ReplicaPinningMiddleware:
+    """
+    Track the writes of each request for routers.PrimaryReplicaRouter and
+    keep users who wrote on the primary for a while (see routers.py). Must
+    come before SessionMiddleware so that session writes are seen too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.process_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = request_state.get()
+            request_state.reset(token)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        token = self.process_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = request_state.get()
+            request_state.reset(token)
+        return self.process_response(state, response)
+
+    def process_request(self, request):
+        pinned = request.method not in ('GET', 'HEAD') or STICKY_COOKIE in request.COOKIES
+        return request_state.set({'pinned': pinned, 'wrote': False})
+
+    def process_response(self, state, response):
+        if state['wrote'] and replica_configured():
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS),
+                httponly=True, samesite='Lax',
+            )
+        return response
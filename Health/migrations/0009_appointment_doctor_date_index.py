@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Health', '0008_notification_message'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'scheduled_date', 'scheduled_time'], name='Health_appo_doctor__8378d2_idx'),
+        ),
+    ]
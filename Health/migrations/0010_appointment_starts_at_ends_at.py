@@ -0,0 +1,48 @@
+# Generated by Django 4.2.25 on 2026-10-18 06:10
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils.timezone import make_aware
+
+
+def backfill_bounds(apps, schema_editor):
+    Appointment = apps.get_model('Health', 'Appointment')
+    last_id = 0
+    while True:
+        batch = list(
+            Appointment.objects.filter(id__gt=last_id).order_by('id')
+            .only('scheduled_date', 'scheduled_time', 'duration')[:1000]
+        )
+        if not batch:
+            break
+        for appointment in batch:
+            appointment.starts_at = make_aware(datetime.combine(appointment.scheduled_date, appointment.scheduled_time))
+            appointment.ends_at = appointment.starts_at + timedelta(minutes=appointment.duration)
+        Appointment.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Health', '0009_appointment_doctor_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_bounds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'starts_at', 'ends_at'], name='Health_appo_doctor__176d31_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.25 on 2026-10-18 06:14
+
+from django.db import migrations, models
+
+
+def backfill_search_document(apps, schema_editor):
+    from Health.search import build_search_document
+
+    Patient = apps.get_model('Health', 'Patient')
+    last_id = 0
+    while True:
+        batch = list(Patient.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not batch:
+            break
+        for patient in batch:
+            patient.search_document = build_search_document(patient)
+        Patient.objects.bulk_update(batch, ['search_document'])
+        last_id = batch[-1].id
+
+
+def install_index(apps, schema_editor):
+    from Health.search import install_search_index
+
+    install_search_index(schema_editor.connection)
+
+
+def remove_index(apps, schema_editor):
+    from Health.search import remove_search_index
+
+    remove_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Health', '0010_appointment_starts_at_ends_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(install_index, remove_index),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.25 on 2026-10-18 06:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_conversations(apps, schema_editor):
+    """Group existing messages into one conversation per pair of users"""
+    Message = apps.get_model('Health', 'Message')
+    Conversation = apps.get_model('Health', 'Conversation')
+    ConversationParticipant = apps.get_model('Health', 'ConversationParticipant')
+
+    conversations = {}
+    messages = Message.objects.order_by('id')
+    last_id = 0
+    while True:
+        batch = list(messages.filter(id__gt=last_id)[:1000])
+        if not batch:
+            break
+        for message in batch:
+            pair = tuple(sorted((message.sender_id, message.recipient_id)))
+            if pair not in conversations:
+                conversations[pair] = Conversation.objects.create(subject=message.subject)
+            message.conversation_id = conversations[pair].id
+        Message.objects.bulk_update(batch, ['conversation'])
+        last_id = batch[-1].id
+
+    for pair, conversation in conversations.items():
+        thread = Message.objects.filter(conversation=conversation)
+        last_message = thread.order_by('-id').first()
+        conversation.last_message = last_message
+        conversation.updated_at = last_message.created_at
+        conversation.save(update_fields=['last_message', 'updated_at'])
+        for user_id in set(pair):
+            # Read up to the first unread message received by this user
+            first_unread = thread.filter(recipient_id=user_id, is_read=False).order_by('id').first()
+            ConversationParticipant.objects.create(
+                conversation=conversation,
+                user_id=user_id,
+                last_read_message_id=first_unread.id - 1 if first_unread else last_message.id,
+                last_activity_at=last_message.created_at,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Health', '0015_inboxcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the last message')),
+            ],
+            options={
+                'ordering': ['-updated_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.BigIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='Health.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Health.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participants',
+            field=models.ManyToManyField(related_name='conversations', through='Health.ConversationParticipant', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='Health.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-id'], name='Health_mess_convers_e95b40_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_activity_at', '-id'], name='Health_conv_user_id_2f8949_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationparticipant',
+            constraint=models.UniqueConstraint(fields=('conversation', 'user'), name='unique_conversation_participant'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Health', '0018_notificationarchive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'status', 'scheduled_date', 'scheduled_time', 'id'], name='Health_appo_doctor__701a62_idx'),
+        ),
+    ]
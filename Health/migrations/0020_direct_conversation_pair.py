@@ -0,0 +1,51 @@
+# Generated by Django 4.2.25 on 2026-10-18 07:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_direct_pairs(apps, schema_editor):
+    """Key the conversations of two users; only the oldest one of a duplicated pair is keyed"""
+    Conversation = apps.get_model('Health', 'Conversation')
+    ConversationParticipant = apps.get_model('Health', 'ConversationParticipant')
+
+    members = {}
+    for conversation_id, user_id in ConversationParticipant.objects.values_list('conversation_id', 'user_id'):
+        members.setdefault(conversation_id, []).append(user_id)
+
+    keyed = set()
+    for conversation_id in sorted(members):
+        if len(members[conversation_id]) != 2:
+            continue
+        pair = tuple(sorted(members[conversation_id]))
+        if pair in keyed:
+            continue
+        keyed.add(pair)
+        Conversation.objects.filter(id=conversation_id).update(direct_low_user_id=pair[0], direct_high_user_id=pair[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Health', '0019_appointment_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_high_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_low_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_direct_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('direct_low_user', 'direct_high_user'), name='unique_direct_conversation'),
+        ),
+    ]
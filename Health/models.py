@@ -72,12 +72,23 @@ class Patient(models.Model):
     medical_history = models.TextField(null=True, blank=True)
     allergies = models.TextField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    # Normalized names/email/phone digits, indexed for full-text search (see search.py)
+    search_document = models.TextField(default='', blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    def save(self, *args, **kwargs):
+        from .search import build_search_document
+
+        self.search_document = build_search_document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'search_document'}
+        super().save(*args, **kwargs)
+
     @property
     def age(self):
         from datetime import date
@@ -90,6 +101,10 @@ class Patient(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['doctor', 'status']),
+            models.Index(fields=['doctor', '-created_at']),
+        ]
 
 
 class Appointment(models.Model):
@@ -115,54 +130,69 @@ class Appointment(models.Model):
     duration = models.IntegerField(default=30, help_text="Duration in minutes")
     notes = models.TextField(null=True, blank=True)
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='scheduled')
+    # Denormalized from scheduled_date/scheduled_time/duration for overlap queries
+    starts_at = models.DateTimeField(null=True, blank=True, editable=False)
+    ends_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.patient.first_name} - {self.appointment_type} on {self.scheduled_date}"
+
+    @staticmethod
+    def slot_bounds(scheduled_date, scheduled_time, duration):
+        """Return the timezone-aware (start, end) of a slot"""
+        from django.utils.timezone import make_aware
+
+        start = make_aware(datetime.combine(scheduled_date, scheduled_time))
+        return start, start + timedelta(minutes=duration)
+
+    def compute_bounds(self):
+        """Refresh starts_at/ends_at from the scheduled date, time and duration"""
+        self.starts_at, self.ends_at = self.slot_bounds(
+            self.scheduled_date, self.scheduled_time, self.duration
+        )
     
     def validate_appointment_overlap(self):
         """Validate that the appointment doesn't overlap with existing appointments"""
         from django.utils import timezone
+        from .scheduling import overlapping_appointments
         
-        # Convert to datetime for easier calculation
-        appointment_start = datetime.combine(self.scheduled_date, self.scheduled_time)
-        appointment_end = appointment_start + timedelta(minutes=self.duration)
+        self.compute_bounds()
         
         # Check if appointment is in the past
-        now = timezone.now()
-        # Convert appointment_start to be timezone-aware for comparison
-        from django.utils.timezone import make_aware
-        appointment_start_aware = make_aware(appointment_start) if appointment_start.tzinfo is None else appointment_start
-        
-        if appointment_start_aware < now:
+        if self.starts_at < timezone.now():
             raise ValidationError('Cannot schedule appointments in the past.')
         
-        # Query overlapping appointments
-        overlapping = Appointment.objects.filter(
-            doctor=self.doctor,
-            scheduled_date=self.scheduled_date,
-            status__in=['scheduled', 'completed']  # Don't check cancelled appointments
-        ).exclude(id=self.id)  # Exclude current appointment when editing
+        # Single indexed lookup on (doctor, starts_at, ends_at)
+        existing = overlapping_appointments(
+            self.doctor, self.starts_at, self.ends_at, exclude_id=self.id
+        ).order_by('starts_at').values('scheduled_date', 'scheduled_time', 'ends_at').first()
         
-        for existing in overlapping:
-            existing_start = datetime.combine(existing.scheduled_date, existing.scheduled_time)
-            existing_end = existing_start + timedelta(minutes=existing.duration)
-            
-            # Check if there's any overlap
-            if not (appointment_end <= existing_start or appointment_start >= existing_end):
-                raise ValidationError(
-                    f'This time slot is not available. There is already an appointment from '
-                    f'{existing.scheduled_time.strftime("%H:%M")} to '
-                    f'{existing_end.time().strftime("%H:%M")} on {existing.scheduled_date}.'
-                )
+        if existing:
+            existing_end = timezone.localtime(existing['ends_at'])
+            raise ValidationError(
+                f'This time slot is not available. There is already an appointment from '
+                f'{existing["scheduled_time"].strftime("%H:%M")} to '
+                f'{existing_end.strftime("%H:%M")} on {existing["scheduled_date"]}.'
+            )
 
     def save(self, *args, **kwargs):
         # self.validate_appointment_overlap()
+        self.compute_bounds()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'starts_at', 'ends_at'}
         super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-scheduled_date', '-scheduled_time']
+        indexes = [
+            models.Index(fields=['doctor', 'scheduled_date', 'status']),
+            models.Index(fields=['doctor', 'starts_at', 'ends_at']),
+            # Pages of the appointments list, one status at a time (see scheduling.py)
+            models.Index(fields=['doctor', 'status', 'scheduled_date', 'scheduled_time', 'id']),
+        ]
 
 
 class Consultation(models.Model):
@@ -189,6 +219,9 @@ class Consultation(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['doctor', '-created_at']),
+        ]
 
 
 class Prescription(models.Model):
@@ -253,10 +286,20 @@ class Notification(models.Model):
     message = models.TextField()
     link = models.CharField(max_length=500, blank=True, null=True)  # Optional link to related object
     is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    # Set by fan-outs so that re-running one does not notify a user twice
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'is_read', '-created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'dedupe_key'], name='unique_notification_dedupe_key'),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.user.username}"
@@ -272,11 +315,31 @@ class Notification(models.Model):
         }
         return icons.get(self.notification_type, '📌')
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read state as loaded, so the unread counters only move on real changes
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
     def get_time_since(self):
         """Return human-readable time since creation"""
         from django.utils.timesince import timesince
         return f"{timesince(self.created_at)} ago"
 
+    def as_dict(self):
+        """JSON representation used by the notifications API and event stream"""
+        return {
+            'id': self.id,
+            'type': self.notification_type,
+            'icon': self.get_icon(),
+            'title': self.title,
+            'message': self.message,
+            'time': self.get_time_since(),
+            'unread': not self.is_read,
+            'link': self.link or '#'
+        }
+
 
 class Message(models.Model):
     """
@@ -284,25 +347,99 @@ class Message(models.Model):
     """
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_messages')
+    conversation = models.ForeignKey('Conversation', on_delete=models.CASCADE, related_name='messages',
+                                     null=True, blank=True)
     subject = models.CharField(max_length=200, blank=True)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', 'is_read', '-created_at']),
+            models.Index(fields=['conversation', '-id']),
+        ]
         
     def __str__(self):
         return f"From {self.sender.username} to {self.recipient.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read state as loaded, so the unread counters only move on real changes
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
     def get_time_since(self):
         """Return human-readable time since creation"""
         from django.utils.timesince import timesince
         return f"{timesince(self.created_at)} ago"
 
+    def as_dict(self):
+        """JSON representation used by the messages API and event stream"""
+        return {
+            'id': self.id,
+            'sender': f"{self.sender.first_name} {self.sender.last_name}",
+            'initials': f"{self.sender.first_name[:1]}{self.sender.last_name[:1]}".upper(),
+            'message': self.message[:100],  # Truncate long messages
+            'time': self.get_time_since(),
+            'unread': not self.is_read,
+            'conversation': self.conversation_id
+        }
+
+
+class Conversation(models.Model):
+    """
+    Thread of messages between users
+    """
+    participants = models.ManyToManyField(User, through='ConversationParticipant', related_name='conversations')
+    subject = models.CharField(max_length=200, blank=True)
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # The two users of a one-to-one conversation, lower id first: a pair has one at most
+    direct_low_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    direct_high_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now, help_text='Time of the last message')
+
+    class Meta:
+        ordering = ['-updated_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['direct_low_user', 'direct_high_user'], name='unique_direct_conversation'),
+        ]
+
+    def __str__(self):
+        return f"Conversation #{self.id} {self.subject}".strip()
+
+
+class ConversationParticipant(models.Model):
+    """
+    Membership of a user in a conversation, with the user's read cursor
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    # Every message up to this id has been read by the user
+    last_read_message_id = models.BigIntegerField(default=0)
+    # Copy of conversation.updated_at so the thread list is one index range per user
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_activity_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in conversation #{self.conversation_id}"
+
 
 # Helper function to create notifications
-def create_notification(user, notification_type, title, message, link=None):
+def create_notification(user, notification_type, title, message, link=None, dedupe_key=None):
     """
     Helper function to create a notification
     
@@ -314,7 +451,20 @@ def create_notification(user, notification_type, title, message, link=None):
         message='You have an appointment with John Doe at 2:00 PM',
         link='/appointments/123/'
     )
+    
+    With a dedupe_key, an existing notification with the same key is
+    returned instead of creating a second one.
+    For many users at once use Health.notifications.create_notifications.
     """
+    if dedupe_key:
+        notification, _ = Notification.objects.get_or_create(
+            user=user,
+            dedupe_key=dedupe_key,
+            defaults={'notification_type': notification_type, 'title': title,
+                      'message': message, 'link': link}
+        )
+        return notification
+    
     notification = Notification.objects.create(
         user=user,
         notification_type=notification_type,
@@ -323,3 +473,79 @@ def create_notification(user, notification_type, title, message, link=None):
         link=link
     )
     return notification
+
+
+class Job(models.Model):
+    """
+    Background job stored in the database and executed by the run_worker command
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=255, help_text='Dotted path of the job function')
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    priority = models.IntegerField(default=0, help_text='Higher runs first')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now, help_text='Not started before this time')
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            # Next job to claim
+            models.Index(fields=['status', '-priority', 'run_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.name} ({self.status})"
+
+
+class InboxCounter(models.Model):
+    """
+    Denormalized unread counters and latest ids of a user's notifications and
+    messages, kept up to date by Health.inbox (see reconcile_inbox_counters)
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='inbox_counter')
+    unread_notifications = models.PositiveIntegerField(default=0)
+    unread_messages = models.PositiveIntegerField(default=0)
+    latest_notification_id = models.BigIntegerField(default=0)
+    latest_message_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Inbox of {self.user_id}: {self.unread_notifications} notification(s), {self.unread_messages} message(s)"
+
+
+class NotificationArchive(models.Model):
+    """
+    Cold storage for notifications removed from the hot table by the
+    retention policy (see prune_notifications)
+    """
+    original_id = models.BigIntegerField(unique=True)
+    user_id = models.IntegerField(db_index=True)
+    notification_type = models.CharField(max_length=20)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.CharField(max_length=500, blank=True, null=True)
+    is_read = models.BooleanField(default=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Archived notification #{self.original_id} - {self.title}"
@@ -0,0 +1,132 @@
+"""
+Bulk notification fan-out.
+
+``create_notifications`` writes many notifications with one INSERT per batch
+instead of one per row. Rows carrying a ``dedupe_key`` are unique per user, so
+re-running a fan-out (e.g. a retried job) only adds what is missing.
+
+bulk_create() sends no signals: the unread counters are recomputed per batch
+and the open event streams are notified once per user.
+"""
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .events import broker
+from .inbox import refresh_notification_counters
+from .models import Notification
+
+
+# Rows per INSERT
+NOTIFICATION_BATCH_SIZE = 500
+
+NotificationSpec = namedtuple('NotificationSpec', 'user notification_type title message link dedupe_key',
+                              defaults=(None, None))
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def create_notifications(specs, batch_size=NOTIFICATION_BATCH_SIZE):
+    """
+    Create notifications from an iterable of (user, notification_type, title,
+    message[, link[, dedupe_key]]) tuples, NotificationSpec or dicts with the
+    same keys; ``user`` may be a User or a user id.
+    Returns the number of notifications created (rows skipped because their
+    dedupe_key already exists are not counted).
+    """
+    created = 0
+    batch = []
+    for spec in specs:
+        spec = NotificationSpec(**spec) if isinstance(spec, dict) else NotificationSpec(*spec)
+        batch.append(spec)
+        if len(batch) >= batch_size:
+            created += _write_batch(batch)
+            batch = []
+    if batch:
+        created += _write_batch(batch)
+    return created
+
+
+def _write_batch(specs):
+    keyed = {(_user_id(spec.user), spec.dedupe_key) for spec in specs if spec.dedupe_key}
+    existing = set()
+    if keyed:
+        existing = set(Notification.objects.filter(
+            user_id__in={user_id for user_id, _ in keyed},
+            dedupe_key__in={key for _, key in keyed},
+        ).values_list('user_id', 'dedupe_key'))
+
+    rows = []
+    for spec in specs:
+        key = (_user_id(spec.user), spec.dedupe_key)
+        if spec.dedupe_key:
+            if key in existing:
+                continue
+            # Duplicates inside the same batch
+            existing.add(key)
+        rows.append(Notification(
+            user_id=key[0],
+            notification_type=spec.notification_type,
+            title=spec.title,
+            message=spec.message,
+            link=spec.link,
+            dedupe_key=spec.dedupe_key,
+        ))
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        # ignore_conflicts covers a concurrent fan-out inserting the same keys
+        Notification.objects.bulk_create(rows, ignore_conflicts=True)
+        inserted = _inserted_rows(rows)
+        if not inserted:
+            return 0
+        user_ids = {user_id for user_id, _ in inserted}
+        latest_ids = refresh_notification_counters(user_ids)
+
+    def publish():
+        for user_id in user_ids:
+            broker.publish(user_id, 'notification', {'id': latest_ids.get(user_id, 0), 'bulk': True})
+    transaction.on_commit(publish)
+    return len(inserted)
+
+
+def _inserted_rows(rows):
+    """
+    [(user_id, dedupe_key)] of the rows bulk_create() actually inserted: rows
+    without a key never conflict; a keyed row was inserted when the stored row
+    with its key has the created_at bulk_create() gave it (a row written by
+    another fan-out carries its own timestamp).
+    """
+    inserted = [(row.user_id, None) for row in rows if not row.dedupe_key]
+    keyed = {(row.user_id, row.dedupe_key): row.created_at for row in rows if row.dedupe_key}
+    if keyed:
+        stored = Notification.objects.filter(
+            user_id__in={user_id for user_id, _ in keyed},
+            dedupe_key__in={key for _, key in keyed},
+        ).values_list('user_id', 'dedupe_key', 'created_at')
+        inserted.extend((user_id, key) for user_id, key, created_at in stored
+                        if keyed.get((user_id, key)) == created_at)
+    return inserted
+
+
+def notify_users(user_ids, notification_type, title, message, link=None, dedupe_key=None):
+    """Send the same notification to many users"""
+    return create_notifications(
+        NotificationSpec(user_id, notification_type, title, message, link, dedupe_key)
+        for user_id in user_ids
+    )
+
+
+def broadcast_to_doctors(notification_type, title, message, link=None, dedupe_key=None):
+    """
+    Send a notification to every active doctor (system announcements, mass
+    reminders). Pass a dedupe_key to make the broadcast safe to re-run.
+    """
+    user_ids = (User.objects.filter(doctor__isnull=False, is_active=True)
+                .order_by('id').values_list('id', flat=True)
+                .iterator(chunk_size=NOTIFICATION_BATCH_SIZE))
+    return notify_users(user_ids, notification_type, title, message, link, dedupe_key)
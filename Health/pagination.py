@@ -0,0 +1,272 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are located with a WHERE clause on the ordering columns instead of
+OFFSET, so every page costs the same as the first one. No COUNT(*) is run:
+cursor pages have no total (list templates only show it with page numbers).
+"""
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+CURSOR_SALT = 'Health.pagination.cursor'
+
+
+def is_cursor_mode(request):
+    """Cursor pagination is used when a cursor is given or explicitly requested"""
+    return 'cursor' in request.GET or request.GET.get('pagination') == 'cursor'
+
+
+def cursor_query_string(request):
+    """Current query string without paging parameters, in cursor mode"""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    params['pagination'] = 'cursor'
+    return params.urlencode()
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    def __init__(self, paginator, object_list, next_cursor, previous_cursor):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` on ``ordering`` (e.g. ['-created_at', '-id']).
+    The last ordering field must be unique (usually the primary key).
+    Fields may be model fields or annotations present on the queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def _cursor_data(self, obj, direction):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return {'v': values, 'd': direction}
+
+    def _encode(self, obj, direction):
+        return signing.dumps(self._cursor_data(obj, direction), salt=CURSOR_SALT, compress=True)
+
+    def _load(self, cursor):
+        try:
+            return signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature as e:
+            raise InvalidCursor(str(e))
+
+    def _decode(self, cursor):
+        data = self._load(cursor)
+        try:
+            values, direction = data['v'], data['d']
+        except (KeyError, TypeError) as e:
+            raise InvalidCursor(str(e))
+        if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Malformed cursor')
+
+        opts = self.queryset.model._meta
+        decoded = []
+        for field, value in zip(self.fields, values):
+            try:
+                model_field = opts.get_field(field)
+            except FieldDoesNotExist:
+                # Annotation: stored as-is
+                decoded.append(value)
+                continue
+            decoded.append(model_field.to_python(value))
+        return decoded, direction
+
+    def _keyset_filter(self, values, reverse):
+        """Rows strictly after ``values`` in the ordering (before when ``reverse``)"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            clause = Q(**{f'{name}__lt' if descending else f'{name}__gt': values[index]})
+            for previous, value in zip(self.fields[:index], values[:index]):
+                clause &= Q(**{previous: value})
+            condition |= clause
+        return condition
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def _page_queryset(self, cursor):
+        """Queryset of the page rows (plus one to detect more) and whether it runs backwards"""
+        reverse = False
+        queryset = self.queryset
+        if cursor:
+            values, direction = self._decode(cursor)
+            reverse = direction == 'prev'
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        return queryset.order_by(*ordering)[:self.per_page + 1], reverse
+
+    def _build_page(self, rows, cursor, reverse):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(self, rows, None, None)
+
+        if reverse:
+            next_cursor = self._encode(rows[-1], 'next')
+            previous_cursor = self._encode(rows[0], 'prev') if has_more else None
+        else:
+            next_cursor = self._encode(rows[-1], 'next') if has_more else None
+            previous_cursor = self._encode(rows[0], 'prev') if cursor else None
+        return CursorPage(self, rows, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        """Return the page after (or before) ``cursor``; the first page without one"""
+        queryset, reverse = self._page_queryset(cursor)
+        return self._build_page(list(queryset), cursor, reverse)
+
+    async def apage(self, cursor=None):
+        """Async version of page()"""
+        queryset, reverse = self._page_queryset(cursor)
+        return self._build_page([row async for row in queryset], cursor, reverse)
+
+    def get_page(self, cursor=None):
+        """Like page() but falls back to the first page on an invalid cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    async def aget_page(self, cursor=None):
+        """Async version of get_page()"""
+        try:
+            return await self.apage(cursor)
+        except InvalidCursor:
+            return await self.apage()
+
+
+class PartitionedCursorPaginator(CursorPaginator):
+    """
+    Keyset pagination over a list made of consecutive partitions: querysets
+    in display order, each one ordered on ``ordering`` (e.g. scheduled, then
+    completed appointments, each by date). A page is read partition after
+    partition with range queries an index can serve, instead of sorting the
+    whole list on computed values. Cursors also record the partition.
+    """
+
+    def __init__(self, partitions, per_page, ordering):
+        super().__init__(partitions[0], per_page, ordering)
+        self.partitions = list(partitions)
+
+    def _cursor_data(self, obj, direction):
+        data = super()._cursor_data(obj, direction)
+        data['p'] = obj.cursor_partition
+        return data
+
+    def _decode(self, cursor):
+        values, direction = super()._decode(cursor)
+        partition = self._load(cursor).get('p')
+        if not isinstance(partition, int) or not 0 <= partition < len(self.partitions):
+            raise InvalidCursor('Malformed cursor')
+        return values, direction, partition
+
+    def _partition_queries(self, cursor):
+        """
+        Yield (partition index, queryset reading it from the cursor on) in
+        reading order, and whether the page is read backwards
+        """
+        values, reverse, start = None, False, 0
+        if cursor:
+            values, direction, start = self._decode(cursor)
+            reverse = direction == 'prev'
+        indexes = range(start, -1, -1) if reverse else range(start, len(self.partitions))
+        ordering = self._reversed_ordering() if reverse else self.ordering
+
+        def queries():
+            for index in indexes:
+                queryset = self.partitions[index]
+                if values is not None and index == start:
+                    queryset = queryset.filter(self._keyset_filter(values, reverse))
+                yield index, queryset.order_by(*ordering)
+        return queries(), reverse
+
+    def _collect(self, rows, index, batch):
+        for row in batch:
+            row.cursor_partition = index
+        rows.extend(batch)
+        # One row more than a page tells whether there is a next one
+        return len(rows) > self.per_page
+
+    def page(self, cursor=None):
+        queries, reverse = self._partition_queries(cursor)
+        rows = []
+        for index, queryset in queries:
+            if self._collect(rows, index, list(queryset[:self.per_page + 1 - len(rows)])):
+                break
+        return self._build_page(rows, cursor, reverse)
+
+    async def apage(self, cursor=None):
+        queries, reverse = self._partition_queries(cursor)
+        rows = []
+        for index, queryset in queries:
+            batch = [row async for row in queryset[:self.per_page + 1 - len(rows)]]
+            if self._collect(rows, index, batch):
+                break
+        return self._build_page(rows, cursor, reverse)
+
+
+def paginate(request, queryset, per_page, ordering, allow_cursor=True):
+    """
+    Return (page, cursor_mode) for a list view: keyset pagination on
+    ``ordering`` in cursor mode, Django's Paginator (?page=N) otherwise.
+    ``queryset`` must already be ordered by ``ordering``.
+    """
+    if allow_cursor and is_cursor_mode(request):
+        paginator = CursorPaginator(queryset, per_page, ordering)
+        return paginator.get_page(request.GET.get('cursor')), True
+    return Paginator(queryset, per_page).get_page(request.GET.get('page', 1)), False
+
+
+async def apaginate(request, queryset, per_page, ordering, allow_cursor=True):
+    """
+    Async version of paginate(): the page rows (and the count, with page
+    numbers) are fetched here, so rendering the page runs no query.
+    """
+    if allow_cursor and is_cursor_mode(request):
+        paginator = CursorPaginator(queryset, per_page, ordering)
+        return await paginator.aget_page(request.GET.get('cursor')), True
+
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()
+    page = paginator.get_page(request.GET.get('page', 1))
+    page.object_list = [obj async for obj in page.object_list]
+    return page, False
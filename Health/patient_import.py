@@ -0,0 +1,257 @@
+"""
+Bulk patient import from CSV and XLSX files.
+
+Rows are read one at a time (csv module, openpyxl in read-only mode), so a
+file is never loaded whole. They are validated with the PatientForm rules in
+chunks of IMPORT_BATCH_SIZE: email uniqueness, the one rule needing the
+database, is checked with one query per chunk instead of one per row. The
+valid rows of a chunk are inserted with one bulk INSERT in their own
+transaction; invalid rows are reported with their line number and errors.
+
+The first row holds the column names: the PatientForm field names, matched
+case-insensitively with spaces or dashes for underscores. Unknown columns
+are ignored; gender and status accept their labels ("Female", "Active") and
+a blank status means active.
+"""
+import csv
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .cache import bump_doctor_cache_version
+from .forms import PatientImportForm
+from .models import Patient
+from .search import build_search_document
+
+
+IMPORT_BATCH_SIZE = 1000
+
+# Failed rows kept in the result (all of them are counted)
+MAX_REPORTED_ERRORS = 1000
+
+# Seconds the progress of an import stays readable
+PROGRESS_TIMEOUT = 24 * 60 * 60
+
+IMPORT_FIELDS = PatientImportForm._meta.fields
+REQUIRED_COLUMNS = [name for name in IMPORT_FIELDS if PatientImportForm.base_fields[name].required
+                    and name != 'status']
+
+SUPPORTED_FORMATS = ('csv', 'xlsx')
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'processed': self.processed, 'created': self.created,
+                'failed': self.failed, 'errors': self.errors}
+
+
+def import_format(filename):
+    """'csv' or 'xlsx' from a file name; ValidationError for anything else"""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension not in SUPPORTED_FORMATS:
+        raise ValidationError('Import a .csv or .xlsx file')
+    return extension
+
+
+def _column(name):
+    return str(name or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _check_columns(columns):
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValidationError(f'Missing column(s): {", ".join(missing)}')
+
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        try:
+            columns = [_column(name) for name in next(reader, [])]
+            _check_columns(columns)
+            for row in reader:
+                if any(value.strip() for value in row):
+                    yield reader.line_num, dict(zip(columns, row))
+        except UnicodeDecodeError:
+            # Decoded by blocks: the line number would not be the faulty one
+            raise ValidationError('The file is not UTF-8 encoded (save it as "CSV UTF-8")')
+        except csv.Error as e:
+            raise ValidationError(f'Line {reader.line_num}: {e}')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'date'):
+        # Excel dates arrive as datetimes
+        return value.date()
+    if isinstance(value, float) and value.is_integer():
+        # Phone numbers and zip codes typed as numbers
+        return str(int(value))
+    return value if hasattr(value, 'isoformat') else str(value)
+
+
+def _xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValidationError('Importing .xlsx files requires openpyxl')
+
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception:
+        raise ValidationError('The file is not a valid .xlsx workbook')
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = [_column(name) for name in next(rows, ())]
+        _check_columns(columns)
+        for line, row in enumerate(rows, 2):
+            if any(value not in (None, '') for value in row):
+                yield line, dict(zip(columns, map(_cell, row)))
+    finally:
+        workbook.close()
+
+
+def read_rows(path, file_format=None):
+    """
+    Iterate over (line number, {column: value}) for the rows of a CSV or XLSX
+    file. Raises ValidationError when a required column is missing.
+    """
+    file_format = file_format or import_format(path)
+    return _csv_rows(path) if file_format == 'csv' else _xlsx_rows(path)
+
+
+def _choice_value(field, value):
+    """Accept a choice's label as well as its value"""
+    value = str(value).strip()
+    for choice, label in Patient._meta.get_field(field).choices:
+        if value.lower() in (choice.lower(), str(label).lower()):
+            return choice
+    return value
+
+
+def _form_data(row):
+    data = {name: row.get(name, '') for name in IMPORT_FIELDS}
+    for name, value in data.items():
+        if isinstance(value, str):
+            data[name] = value.strip()
+    data['gender'] = _choice_value('gender', data['gender'])
+    data['status'] = _choice_value('status', data['status']) if data['status'] else 'active'
+    return data
+
+
+def _form_errors(form):
+    return {field: [str(message) for message in messages] for field, messages in form.errors.items()}
+
+
+def _duplicate_email_error():
+    return {'email': Patient(email='').unique_error_message(Patient, ('email',)).messages}
+
+
+def _validate_chunk(doctor, chunk, seen_emails, result):
+    """The valid rows of a chunk as (line, unsaved Patient) pairs; errors go to ``result``"""
+    valid = []
+    form = PatientImportForm()
+    for line, row in chunk:
+        form.bind(_form_data(row))
+        if not form.is_valid():
+            result.add_error(line, _form_errors(form))
+            continue
+        patient = form.save(commit=False)
+        if patient.email in seen_emails:
+            result.add_error(line, _duplicate_email_error())
+            continue
+        seen_emails.add(patient.email)
+        patient.doctor = doctor
+        # bulk_create() bypasses Patient.save()
+        patient.search_document = build_search_document(patient)
+        valid.append((line, patient))
+
+    taken = set(Patient.objects.filter(email__in=[patient.email for _, patient in valid])
+                .values_list('email', flat=True))
+    if taken:
+        for line, patient in valid:
+            if patient.email in taken:
+                result.add_error(line, _duplicate_email_error())
+        valid = [(line, patient) for line, patient in valid if patient.email not in taken]
+    return valid
+
+
+def _insert(doctor, valid, result):
+    try:
+        with transaction.atomic():
+            Patient.objects.bulk_create([patient for _, patient in valid])
+            # bulk_create() sends no signals
+            transaction.on_commit(lambda: bump_doctor_cache_version(doctor.id))
+        result.created += len(valid)
+        return
+    except IntegrityError:
+        pass
+
+    # An email was taken after the chunk was checked: insert row by row
+    for line, patient in valid:
+        patient.pk = None
+        patient._state.adding = True
+        try:
+            with transaction.atomic():
+                patient.save()
+            result.created += 1
+        except IntegrityError:
+            result.add_error(line, _duplicate_email_error())
+
+
+def import_patients(doctor, rows, batch_size=IMPORT_BATCH_SIZE, progress=None, dry_run=False):
+    """
+    Validate and create patients for ``doctor`` from (line, {column: value})
+    rows (see read_rows()). ``progress(result)`` is called after every batch.
+    With ``dry_run`` the rows are only validated. Returns an ImportResult.
+    """
+    result = ImportResult()
+    seen_emails = set()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        valid = _validate_chunk(doctor, chunk, seen_emails, result)
+        if valid and not dry_run:
+            _insert(doctor, valid, result)
+        result.processed += len(chunk)
+        if progress is not None:
+            progress(result)
+    return result
+
+
+# Progress of imports run by the job worker, shared through the cache
+
+def import_dir():
+    return getattr(settings, 'PATIENT_IMPORT_DIR', os.path.join(settings.BASE_DIR, 'cache', 'imports'))
+
+
+def _progress_key(import_id):
+    return f'patient_import:{import_id}'
+
+
+def set_import_progress(import_id, doctor_id, status, result=None, message=''):
+    state = {'doctor_id': doctor_id, 'status': status, 'message': message}
+    state.update((result or ImportResult()).as_dict())
+    cache.set(_progress_key(import_id), state, PROGRESS_TIMEOUT)
+
+
+def get_import_progress(import_id):
+    return cache.get(_progress_key(import_id))
@@ -0,0 +1,339 @@
+"""
+Prescription PDF rendering and on-disk cache.
+
+Rendered PDFs are stored under PRESCRIPTION_PDF_CACHE_DIR as
+``<prescription id>/<fingerprint>.pdf`` where the fingerprint hashes every
+value printed on the document (prescription, patient, doctor and medicines).
+Any change produces a new file name, so a stale PDF is never served; the
+signals in signals.py remove the old files when a prescription or one of its
+medicines changes.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.conf import settings
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.enums import TA_CENTER
+
+
+# Bump when the layout below changes so cached PDFs are rendered again
+PDF_LAYOUT_VERSION = 1
+
+
+def cache_dir():
+    return getattr(settings, 'PRESCRIPTION_PDF_CACHE_DIR',
+                   os.path.join(settings.BASE_DIR, 'cache', 'prescriptions'))
+
+
+def prescription_fingerprint(prescription, medicines=None):
+    """
+    Return a hash of everything rendered on the prescription PDF.
+    Used as the cache file name and as the download ETag.
+    """
+    if medicines is None:
+        medicines = prescription.medicines.all()
+    patient = prescription.patient
+    user = prescription.doctor.user
+    parts = [
+        PDF_LAYOUT_VERSION,
+        prescription.id, prescription.updated_at.isoformat(), prescription.created_at.isoformat(),
+        prescription.notes,
+        patient.id, patient.first_name, patient.last_name, patient.email, patient.phone,
+        user.first_name, user.last_name, prescription.doctor.specialty,
+    ]
+    for med in medicines:
+        parts.extend([med.name, med.dosage, med.frequency, med.duration])
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+def cached_pdf_path(prescription, fingerprint):
+    return os.path.join(cache_dir(), str(prescription.id), f'{fingerprint}.pdf')
+
+
+def store_prescription_pdf(prescription, fingerprint, pdf):
+    """Write a rendered PDF to the cache and return its path"""
+    path = cached_pdf_path(prescription, fingerprint)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so concurrent downloads never read a partial PDF
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(pdf)
+    os.replace(tmp_path, path)
+
+    # Older renderings of this prescription can no longer be requested
+    for name in os.listdir(directory):
+        if name != os.path.basename(path) and name.endswith('.pdf'):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def cached_prescription_pdf(prescription, medicines=None, fingerprint=None):
+    """
+    Return the path of the rendered PDF, rendering it only on a cache miss
+    """
+    if medicines is None:
+        medicines = list(prescription.medicines.all())
+    fingerprint = fingerprint or prescription_fingerprint(prescription, medicines)
+    path = cached_pdf_path(prescription, fingerprint)
+    if os.path.exists(path):
+        return path
+    return store_prescription_pdf(prescription, fingerprint, build_prescription_pdf(prescription, medicines))
+
+
+def open_prescription_pdf(prescription, medicines=None, fingerprint=None):
+    """
+    Open the cached PDF for reading. The file can be removed between the
+    lookup and open() (a newer version replaced it, or the cache was pruned):
+    it is then rendered again, once.
+    """
+    if medicines is None:
+        medicines = list(prescription.medicines.all())
+    fingerprint = fingerprint or prescription_fingerprint(prescription, medicines)
+    try:
+        return open(cached_prescription_pdf(prescription, medicines, fingerprint), 'rb')
+    except FileNotFoundError:
+        pdf = build_prescription_pdf(prescription, medicines)
+        return open(store_prescription_pdf(prescription, fingerprint, pdf), 'rb')
+
+
+def prescription_snapshot(prescription, medicines):
+    """
+    Copy the values rendered on the PDF into plain objects that can be sent to
+    a worker process (no database access or app registry needed there)
+    """
+    patient = prescription.patient
+    user = prescription.doctor.user
+    return SimpleNamespace(
+        id=prescription.id,
+        created_at=prescription.created_at,
+        notes=prescription.notes,
+        patient=SimpleNamespace(
+            id=patient.id, first_name=patient.first_name, last_name=patient.last_name,
+            email=patient.email, phone=patient.phone,
+        ),
+        doctor=SimpleNamespace(
+            specialty=prescription.doctor.specialty,
+            user=SimpleNamespace(first_name=user.first_name, last_name=user.last_name),
+        ),
+        medicines=[
+            SimpleNamespace(name=med.name, dosage=med.dosage, frequency=med.frequency, duration=med.duration)
+            for med in medicines
+        ],
+    )
+
+
+def render_snapshot(snapshot):
+    """Process pool entry point: render a prescription_snapshot()"""
+    return build_prescription_pdf(snapshot, snapshot.medicines)
+
+
+def invalidate_prescription_pdf(prescription_id):
+    """Remove every cached PDF of a prescription"""
+    shutil.rmtree(os.path.join(cache_dir(), str(prescription_id)), ignore_errors=True)
+
+
+def build_prescription_pdf(prescription, medicines=None):
+    """
+    Render a prescription as PDF with ReportLab and return the bytes
+    """
+    # Create PDF in memory
+    buffer = BytesIO()
+    
+    # Create the PDF object using ReportLab
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    
+    # Container for PDF elements
+    elements = []
+    
+    # Define styles
+    styles = getSampleStyleSheet()
+    
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1abc9c'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12,
+        fontName='Helvetica-Bold'
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=6
+    )
+    
+    # Add clinic/hospital header
+    clinic_name = Paragraph("<b>MedCare Clinic</b>", title_style)
+    elements.append(clinic_name)
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Add prescription title
+    prescription_title = Paragraph("MEDICAL PRESCRIPTION", heading_style)
+    elements.append(prescription_title)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Patient and Doctor Information
+    info_data = [
+        ['Prescription ID:', f'#{prescription.id}', 'Date:', prescription.created_at.strftime('%B %d, %Y')],
+        ['Patient Name:', f'{prescription.patient.first_name} {prescription.patient.last_name}', 
+         'Patient ID:', f'#{prescription.patient.id}'],
+        ['Email:', prescription.patient.email, 'Phone:', getattr(prescription.patient, 'phone', 'N/A')],
+        ['Doctor:', f'Dr. {prescription.doctor.user.first_name} {prescription.doctor.user.last_name}', 
+         'Specialty:', getattr(prescription.doctor, 'specialty', 'General Medicine')],
+    ]
+    
+    info_table = Table(info_data, colWidths=[1.5*inch, 2.5*inch, 1.5*inch, 2*inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
+        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#ecf0f1')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7'))
+    ]))
+    
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.4*inch))
+    
+    # Medicines Section
+    medicines_header = Paragraph("PRESCRIBED MEDICATIONS", heading_style)
+    elements.append(medicines_header)
+    elements.append(Spacer(1, 0.1*inch))
+    
+    if medicines is None:
+        medicines = prescription.medicines.all()
+    
+    # Create medicines table
+    medicine_data = [['#', 'Medicine Name', 'Dosage', 'Frequency', 'Duration']]
+    
+    for idx, med in enumerate(medicines, 1):
+        medicine_data.append([
+            str(idx),
+            med.name,
+            med.dosage,
+            med.frequency,
+            med.duration
+        ])
+    
+    medicine_table = Table(medicine_data, colWidths=[0.5*inch, 2.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+    medicine_table.setStyle(TableStyle([
+        # Header row
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1abc9c')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        
+        # Data rows
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2c3e50')),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+        ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
+        ('TOPPADDING', (0, 1), (-1, -1), 10),
+        
+        # Grid
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
+        
+        # Alternating row colors
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+    ]))
+    
+    elements.append(medicine_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Instructions/Notes
+    if prescription.notes:
+        notes_header = Paragraph("INSTRUCTIONS & NOTES", heading_style)
+        elements.append(notes_header)
+        elements.append(Spacer(1, 0.1*inch))
+        
+        notes_text = Paragraph(prescription.notes, normal_style)
+        elements.append(notes_text)
+        elements.append(Spacer(1, 0.3*inch))
+    
+    # Footer with signature
+    elements.append(Spacer(1, 0.5*inch))
+    
+    signature_data = [
+        ['', ''],
+        ['_________________________', '_________________________'],
+        ['Doctor Signature', 'Date & Stamp'],
+    ]
+    
+    signature_table = Table(signature_data, colWidths=[3.5*inch, 3*inch])
+    signature_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#7f8c8d')),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    
+    elements.append(signature_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Disclaimer
+    disclaimer = Paragraph(
+        "<i>This is a computer-generated prescription. "
+        "Please consult your doctor before taking any medication.</i>",
+        ParagraphStyle(
+            'Disclaimer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.HexColor('#95a5a6'),
+            alignment=TA_CENTER
+        )
+    )
+    elements.append(disclaimer)
+    
+    # Build PDF
+    doc.build(elements)
+    
+    # Get the value of the BytesIO buffer and return it
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
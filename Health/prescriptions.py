@@ -0,0 +1,93 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_doctor_cache_version
+from .models import Patient, Prescription, Medicine
+
+
+MEDICINE_FIELDS = ('name', 'dosage', 'frequency', 'duration')
+
+# Rows per INSERT statement for bulk writes
+BULK_BATCH_SIZE = 500
+
+
+def build_medicines(prescription, medicines_data):
+    """Return unsaved Medicine rows for a prescription from a list of dicts"""
+    medicines = []
+    for index, med in enumerate(medicines_data, 1):
+        missing = [field for field in MEDICINE_FIELDS if not med.get(field)]
+        if missing:
+            raise ValidationError(f'Medicine #{index}: missing {", ".join(missing)}')
+        medicines.append(Medicine(
+            prescription=prescription,
+            name=med['name'],
+            dosage=med['dosage'],
+            frequency=med['frequency'],
+            duration=med['duration'],
+        ))
+    return medicines
+
+
+def create_prescription(doctor, patient, prescription_date, notes, medicines_data):
+    """
+    Create a prescription and its medicines atomically
+    (one INSERT for the prescription, one for all medicines)
+    """
+    with transaction.atomic():
+        prescription = Prescription.objects.create(
+            doctor=doctor,
+            patient=patient,
+            prescription_date=prescription_date,
+            notes=notes
+        )
+        Medicine.objects.bulk_create(
+            build_medicines(prescription, medicines_data), batch_size=BULK_BATCH_SIZE
+        )
+    return prescription
+
+
+def create_prescriptions_batch(doctor, entries):
+    """
+    Create many prescriptions in one transaction with a constant number of
+    statements: one lookup of the patients, one bulk INSERT of prescriptions
+    and one bulk INSERT of medicines (per BULK_BATCH_SIZE rows).
+
+    ``entries`` is a list of dicts with ``patient`` (id), ``prescription_date``,
+    optional ``instructions`` and ``medicines`` (list of dicts).
+    Raises ValidationError without writing anything if any entry is invalid.
+    """
+    patient_ids = set()
+    for index, entry in enumerate(entries, 1):
+        if not entry.get('patient'):
+            raise ValidationError(f'Prescription #{index}: missing patient')
+        if not entry.get('medicines'):
+            raise ValidationError(f'Prescription #{index}: at least one medicine is required')
+        patient_ids.add(int(entry['patient']))
+
+    patients = Patient.objects.filter(doctor=doctor, id__in=patient_ids).in_bulk()
+    unknown = patient_ids - set(patients)
+    if unknown:
+        raise ValidationError(f'Patient(s) not found: {", ".join(str(pk) for pk in sorted(unknown))}')
+
+    prescriptions = []
+    for entry in entries:
+        prescription = Prescription(
+            doctor=doctor,
+            patient=patients[int(entry['patient'])],
+            notes=entry.get('instructions', ''),
+        )
+        if entry.get('prescription_date'):
+            prescription.prescription_date = entry['prescription_date']
+        prescriptions.append(prescription)
+
+    with transaction.atomic():
+        # Primary keys are returned by the INSERT on PostgreSQL and SQLite >= 3.35
+        Prescription.objects.bulk_create(prescriptions, batch_size=BULK_BATCH_SIZE)
+        medicines = []
+        for prescription, entry in zip(prescriptions, entries):
+            medicines.extend(build_medicines(prescription, entry['medicines']))
+        Medicine.objects.bulk_create(medicines, batch_size=BULK_BATCH_SIZE)
+        # bulk_create() sends no signals
+        transaction.on_commit(lambda: bump_doctor_cache_version(doctor.id))
+
+    return prescriptions
@@ -0,0 +1,125 @@
+"""
+Retention policy for notifications.
+
+Read notifications older than their type's TTL (NOTIFICATION_RETENTION_DAYS)
+are removed from the hot table in small batches, each in its own short
+transaction, and optionally archived first:
+
+- ``'table'``: copied to NotificationArchive
+- ``'ndjson'``: appended to a gzip-compressed NDJSON file in
+  NOTIFICATION_ARCHIVE_DIR (one file per run)
+
+Unread notifications are never pruned.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+
+DEFAULT_RETENTION_DAYS = {'default': 90}
+
+# Rows archived and deleted per transaction
+RETENTION_BATCH_SIZE = 500
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'notification_type', 'title', 'message', 'link',
+                  'is_read', 'read_at', 'dedupe_key', 'created_at']
+
+
+def retention_days():
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def expired_filter(now=None):
+    """Q matching read notifications past the TTL of their type"""
+    now = now or timezone.now()
+    days = dict(retention_days())
+    default = days.pop('default', None)
+
+    condition = Q()
+    for notification_type, ttl in days.items():
+        if ttl is not None:
+            condition |= Q(notification_type=notification_type, created_at__lt=now - timedelta(days=ttl))
+    if default is not None:
+        condition |= Q(created_at__lt=now - timedelta(days=default)) & ~Q(notification_type__in=list(days))
+    if not condition:
+        # Nothing has a TTL
+        return None
+    return Q(is_read=True) & condition
+
+
+class NdjsonArchive:
+    """Gzip-compressed NDJSON file written batch by batch"""
+
+    def __init__(self, directory=None, now=None):
+        directory = directory or getattr(settings, 'NOTIFICATION_ARCHIVE_DIR',
+                                         os.path.join(settings.BASE_DIR, 'archive', 'notifications'))
+        os.makedirs(directory, exist_ok=True)
+        stamp = (now or timezone.now()).strftime('%Y%m%dT%H%M%S')
+        self.path = os.path.join(directory, f'notifications-{stamp}.ndjson.gz')
+
+    def write(self, rows):
+        with gzip.open(self.path, 'at', encoding='utf-8') as archive:
+            for row in rows:
+                archive.write(json.dumps(row, default=str) + '\n')
+
+
+def _archive_to_table(rows):
+    NotificationArchive.objects.bulk_create([
+        NotificationArchive(original_id=row['id'], **{field: row[field] for field in ARCHIVE_FIELDS[1:]})
+        for row in rows
+    ], ignore_conflicts=True)
+
+
+def prune_notifications(archive=None, batch_size=RETENTION_BATCH_SIZE, pause=0, dry_run=False, now=None):
+    """
+    Delete expired notifications; ``archive`` is 'table', 'ndjson' or False
+    (defaults to settings.NOTIFICATION_ARCHIVE). Returns the number of rows
+    deleted (or that would be deleted with ``dry_run``).
+    """
+    now = now or timezone.now()
+    condition = expired_filter(now)
+    if condition is None:
+        return 0
+    expired = Notification.objects.filter(condition)
+    if dry_run:
+        return expired.count()
+
+    if archive is None:
+        archive = getattr(settings, 'NOTIFICATION_ARCHIVE', None)
+    if archive not in (None, False, 'table', 'ndjson'):
+        raise ValueError(f'Unknown notification archive: {archive}')
+    ndjson = NdjsonArchive(now=now) if archive == 'ndjson' else None
+
+    deleted = 0
+    last_id = 0
+    while True:
+        # Walk the primary key so every batch starts where the previous one ended
+        rows = list(expired.filter(id__gt=last_id).order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        ids = [row['id'] for row in rows]
+
+        if ndjson is not None:
+            # Written before deleting: a failure leaves extra archived rows, never lost ones
+            ndjson.write(rows)
+        with transaction.atomic():
+            if archive == 'table':
+                _archive_to_table(rows)
+            # Only rows still read are deleted (one may have been flagged unread meanwhile)
+            count, _ = Notification.objects.filter(id__in=ids, is_read=True).delete()
+            deleted += count
+
+        if pause:
+            # Give other writers a chance between batches
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,61 @@
+"""
+Primary/replica database routing.
+
+When a ``replica`` database is configured, reads made while serving a request
+go to it and everything else (writes, reads inside a transaction, sessions,
+management commands, the job worker) goes to ``default``.
+
+A replica lags behind the primary, so a user who just wrote would not see
+their own change: a request that writes (or is not a GET/HEAD) is pinned to
+the primary from then on, and its response sets a cookie keeping the user's
+next requests on the primary for REPLICA_STICKY_SECONDS.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+STICKY_COOKIE = 'pin_primary'
+
+# Default for settings.REPLICA_STICKY_SECONDS
+DEFAULT_STICKY_SECONDS = 10
+
+# {'pinned': bool, 'wrote': bool} while a request is being served
+# (set by middleware.ReplicaPinningMiddleware)
+request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if state is None or state['pinned'] or not replica_configured():
+            return PRIMARY
+        if model._meta.app_label == 'sessions':
+            # A stale session read and saved back would undo a newer change
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            # Reads inside a transaction must see its writes
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state['pinned'] = state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return obj1._state.db in (PRIMARY, REPLICA) and obj2._state.db in (PRIMARY, REPLICA)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db == PRIMARY
@@ -0,0 +1,219 @@
+from bisect import bisect_left
+from calendar import Calendar
+from datetime import timedelta
+import hashlib
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import Appointment
+
+
+# Statuses that occupy a slot on the calendar
+ACTIVE_STATUSES = ['scheduled', 'completed']
+
+# Statuses in the order the appointments list shows them
+APPOINTMENT_LIST_STATUSES = ['scheduled', 'completed', 'cancelled', 'no-show']
+
+# Ordering of the appointments list (annotations of appointment_list_queryset())
+APPOINTMENT_LIST_ORDERING = [
+    'status_priority',   # scheduled → completed → cancelled → no-show
+    'is_past',           # future first
+    'scheduled_date',    # closest date
+    'scheduled_time',    # closest time
+    'id',                # stable tie-breaker for cursor pagination
+]
+
+# Ordering inside each partition of appointment_list_partitions()
+APPOINTMENT_PARTITION_ORDERING = ['scheduled_date', 'scheduled_time', 'id']
+
+
+def visible_range(year, month):
+    """
+    Return the first and last date shown on the month grid
+    (including the leading/trailing days of neighbouring months)
+    """
+    weeks = Calendar().monthdatescalendar(year, month)
+    return weeks[0][0], weeks[-1][-1]
+
+
+def appointments_in_range(doctor, start, end):
+    """
+    Load all active appointments of a doctor between two dates (inclusive)
+    with a single range query on the (doctor, scheduled_date, status) index
+    """
+    return list(
+        Appointment.objects.filter(
+            doctor=doctor,
+            scheduled_date__range=(start, end),
+            status__in=ACTIVE_STATUSES,
+        ).select_related('patient').order_by('scheduled_date', 'scheduled_time')
+    )
+
+
+def appointment_list_queryset(doctor, today):
+    """The doctor's appointments annotated and ordered for the appointments list"""
+    return Appointment.objects.filter(doctor=doctor).select_related('patient').annotate(
+        # 1️⃣ Status priority
+        status_priority=Case(
+            *[When(status=status, then=Value(priority)) for priority, status in enumerate(APPOINTMENT_LIST_STATUSES)],
+            default=Value(len(APPOINTMENT_LIST_STATUSES)),
+            output_field=IntegerField(),
+        ),
+        # 2️⃣ Past vs future
+        is_past=Case(
+            When(scheduled_date__lt=today, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    ).order_by(*APPOINTMENT_LIST_ORDERING)
+
+
+def appointment_list_partitions(appointments, today):
+    """
+    Split the appointments list into its consecutive parts (each status,
+    upcoming then past), in the order of APPOINTMENT_LIST_ORDERING. Each part
+    is read by date on the (doctor, status, scheduled_date, scheduled_time, id)
+    index, where sorting on the annotations would sort all the rows.
+    """
+    partitions = []
+    for status in APPOINTMENT_LIST_STATUSES:
+        partitions.append(appointments.filter(status=status, scheduled_date__gte=today))
+        partitions.append(appointments.filter(status=status, scheduled_date__lt=today))
+    return partitions
+
+
+def filter_appointments(appointments, params, today):
+    """Apply the appointments list filters (status, date, search)"""
+    status_filter = params.get('status', '')
+    date_filter = params.get('date', '')
+    search_query = params.get('search', '')
+
+    if status_filter:
+        appointments = appointments.filter(status=status_filter)
+
+    if date_filter == 'today':
+        appointments = appointments.filter(scheduled_date=today)
+    elif date_filter == 'tomorrow':
+        appointments = appointments.filter(scheduled_date=today + timedelta(days=1))
+    elif date_filter == 'week':
+        appointments = appointments.filter(scheduled_date__range=[today, today + timedelta(days=7)])
+    elif date_filter == 'month':
+        appointments = appointments.filter(scheduled_date__range=[today, today + timedelta(days=30)])
+
+    if search_query:
+        appointments = appointments.filter(
+            Q(patient__first_name__icontains=search_query) |
+            Q(patient__last_name__icontains=search_query)
+        )
+    return appointments
+
+
+def group_by_day(appointments):
+    """Group an ordered list of appointments into {date: [appointments]}"""
+    days = {}
+    for appointment in appointments:
+        days.setdefault(appointment.scheduled_date, []).append(appointment)
+    return days
+
+
+def month_appointments(doctor, year, month):
+    """
+    Return the appointments of the whole visible month grid grouped by date,
+    together with the grid bounds
+    """
+    start, end = visible_range(year, month)
+    return group_by_day(appointments_in_range(doctor, start, end)), start, end
+
+
+def appointments_etag(appointments):
+    """
+    Build a strong ETag from the ids and modification times of appointments
+    and of their patients (the payload carries the patient names), so load
+    them with select_related('patient')
+    """
+    digest = hashlib.md5()
+    for appointment in appointments:
+        digest.update(
+            f"{appointment.id}:{appointment.updated_at.isoformat()}:"
+            f"{appointment.patient_id}:{appointment.patient.updated_at.isoformat()};".encode()
+        )
+    return f'"{digest.hexdigest()}"'
+
+
+def serialize_appointment(appointment):
+    """Return the JSON representation of an appointment used by the calendar feed"""
+    return {
+        'id': appointment.id,
+        'date': appointment.scheduled_date.isoformat(),
+        'time': appointment.scheduled_time.strftime('%H:%M'),
+        'duration': appointment.duration,
+        'type': appointment.appointment_type,
+        'type_display': appointment.get_appointment_type_display(),
+        'status': appointment.status,
+        'patient_id': appointment.patient_id,
+        'patient_name': f"{appointment.patient.first_name} {appointment.patient.last_name}",
+        'url': f'/appointment/{appointment.id}/',
+    }
+
+
+
+def overlapping_appointments(doctor, starts_at, ends_at, exclude_id=None):
+    """
+    Return the active appointments of a doctor overlapping [starts_at, ends_at)
+    """
+    appointments = Appointment.objects.filter(
+        doctor=doctor,
+        status__in=ACTIVE_STATUSES,
+        starts_at__lt=ends_at,
+        ends_at__gt=starts_at,
+    )
+    if exclude_id is not None:
+        appointments = appointments.exclude(id=exclude_id)
+    return appointments
+
+
+def has_overlap(doctor, starts_at, ends_at, exclude_id=None):
+    """Return True when the slot collides with an existing appointment (one EXISTS query)"""
+    return overlapping_appointments(doctor, starts_at, ends_at, exclude_id).exists()
+
+
+def check_slots(doctor, slots):
+    """
+    Check many proposed slots against the doctor's schedule in one query.
+
+    ``slots`` is an iterable of (scheduled_date, scheduled_time, duration).
+    Returns a list (same order) of dicts with ``starts_at``, ``ends_at``,
+    ``available`` and ``conflict_id`` (id of the first clashing appointment).
+    Proposed slots are not checked against each other.
+    """
+    bounds = [Appointment.slot_bounds(*slot) for slot in slots]
+    if not bounds:
+        return []
+
+    condition = Q()
+    for starts_at, ends_at in bounds:
+        condition |= Q(starts_at__lt=ends_at, ends_at__gt=starts_at)
+
+    # Only the appointments clashing with at least one slot come back
+    existing = list(
+        Appointment.objects.filter(condition, doctor=doctor, status__in=ACTIVE_STATUSES)
+        .order_by('starts_at')
+        .values_list('id', 'starts_at', 'ends_at')
+    )
+    existing_starts = [row[1] for row in existing]
+
+    results = []
+    for starts_at, ends_at in bounds:
+        conflict_id = None
+        # Only appointments starting before the slot ends can clash with it
+        for appointment_id, other_start, other_end in existing[:bisect_left(existing_starts, ends_at)]:
+            if other_end > starts_at:
+                conflict_id = appointment_id
+                break
+        results.append({
+            'starts_at': starts_at,
+            'ends_at': ends_at,
+            'available': conflict_id is None,
+            'conflict_id': conflict_id,
+        })
+    return results
@@ -0,0 +1,212 @@
+"""
+Patient search index.
+
+Every patient carries a normalized ``search_document`` (names, email and phone
+digits, lowercased and without accents) which is indexed by the database:
+
+- SQLite: an external-content FTS5 table kept in sync by triggers
+- PostgreSQL: a GIN index on ``to_tsvector('simple', search_document)`` plus a
+  pg_trgm index used for similarity ranking
+
+Other backends fall back to ``LIKE`` over ``search_document``, which is also
+how phone digits and email fragments are found in the middle of a word.
+"""
+import re
+import unicodedata
+
+from django.db import connections, OperationalError, ProgrammingError
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'Health_patient_fts'
+
+SQLITE_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5(
+        search_document, content='Health_patient', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "Health_patient" BEGIN
+        INSERT INTO "{FTS_TABLE}"(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "Health_patient" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_document) VALUES ('delete', old.id, old.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE OF search_document ON "Health_patient" BEGIN
+        INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, search_document) VALUES ('delete', old.id, old.search_document);
+        INSERT INTO "{FTS_TABLE}"(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+]
+
+# Rank of the current patient row; the CTE runs the full-text query once
+# (a plain correlated subquery would run it again for every row)
+SQLITE_RANK_SQL = (
+    f'WITH ranks AS MATERIALIZED (SELECT rowid, bm25("{FTS_TABLE}") AS rank FROM "{FTS_TABLE}" '
+    f'WHERE "{FTS_TABLE}" MATCH %s) SELECT rank FROM ranks WHERE ranks.rowid = "Health_patient"."id"'
+)
+
+POSTGRES_INDEX_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """CREATE INDEX IF NOT EXISTS "Health_patient_search_tsv"
+        ON "Health_patient" USING gin (to_tsvector('simple', search_document))""",
+    """CREATE INDEX IF NOT EXISTS "Health_patient_search_trgm"
+        ON "Health_patient" USING gin (search_document gin_trgm_ops)""",
+]
+
+# Queries made only of digits and phone punctuation are searched as phone numbers
+PHONE_QUERY = re.compile(r'^[\d\s\-+().]+$')
+TOKEN = re.compile(r'\w+')
+# Queries typed like part of an email address
+EMAIL_FRAGMENT = re.compile(r'[@.]')
+
+
+def normalize(value):
+    """Lowercase and strip accents"""
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in value if not unicodedata.combining(char)).lower()
+
+
+def phone_digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def build_search_document(patient):
+    """Return the text indexed for a patient"""
+    return ' '.join(filter(None, [
+        normalize(patient.first_name),
+        normalize(patient.last_name),
+        normalize(patient.email),
+        phone_digits(patient.phone),
+    ]))
+
+
+def query_tokens(query):
+    """Split a user query into normalized search tokens"""
+    if PHONE_QUERY.match(query) and phone_digits(query):
+        return [phone_digits(query)]
+    return TOKEN.findall(normalize(query))
+
+
+def _has_fts_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def install_search_index(connection):
+    """
+    Create the search index objects for the given connection (idempotent).
+    Also restores the SQLite triggers dropped when Django rebuilds the table.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            columns = connection.introspection.get_table_description(cursor, 'Health_patient')
+        if 'search_document' not in {column.name for column in columns}:
+            # Migrated back before the search_document column existed
+            return
+        created = not _has_fts_table(connection)
+        try:
+            with connection.cursor() as cursor:
+                for statement in SQLITE_INDEX_SQL:
+                    cursor.execute(statement)
+                if created:
+                    cursor.execute(f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'rebuild\')')
+        except OperationalError:
+            # SQLite built without FTS5: searches use the LIKE fallback
+            pass
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for statement in POSTGRES_INDEX_SQL:
+                cursor.execute(statement)
+
+
+def remove_search_index(connection):
+    """Drop the search index objects created by install_search_index"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_{suffix}"')
+            cursor.execute(f'DROP TABLE IF EXISTS "{FTS_TABLE}"')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS "Health_patient_search_tsv"')
+            cursor.execute('DROP INDEX IF EXISTS "Health_patient_search_trgm"')
+
+
+def rebuild_search_index(using='default'):
+    """Recompute every search_document and resynchronize the index"""
+    from .models import Patient
+
+    patients = Patient.objects.using(using).order_by('id')
+    last_id = 0
+    while True:
+        batch = list(patients.filter(id__gt=last_id)[:1000])
+        if not batch:
+            break
+        for patient in batch:
+            patient.search_document = build_search_document(patient)
+        Patient.objects.using(using).bulk_update(batch, ['search_document'])
+        last_id = batch[-1].id
+
+    connection = connections[using]
+    install_search_index(connection)
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'rebuild\')')
+
+
+def _contains_all(tokens):
+    condition = Q()
+    for token in tokens:
+        condition &= Q(search_document__contains=token)
+    return condition
+
+
+def search_patients(patients, query):
+    """
+    Filter a Patient queryset with the search index and order it by relevance
+    (best match first). Every token is matched as a prefix of a word; phone
+    digits ("5678") and email fragments ("mail.com") also match anywhere,
+    ranked after the index matches.
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        return patients
+
+    connection = connections[patients.db]
+
+    if connection.vendor == 'sqlite':
+        try:
+            available = _has_fts_table(connection)
+        except (OperationalError, ProgrammingError):
+            available = False
+        if available:
+            match = ' '.join(f'"{token}"*' for token in tokens)
+            condition = Q(id__in=RawSQL(f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s', [match]))
+            if any(token.isdigit() for token in tokens) or EMAIL_FRAGMENT.search(query):
+                # Not word prefixes: scan the (doctor's) rows for them
+                condition |= _contains_all(tokens)
+            patients = patients.filter(condition)
+            if connection.Database.sqlite_version_info < (3, 35):
+                # No MATERIALIZED: ranking would run the MATCH again for every row
+                return patients.order_by('-created_at')
+            # Lower is better; rows only found by the fallback have no rank
+            rank = RawSQL(SQLITE_RANK_SQL, [match], output_field=FloatField())
+            return patients.annotate(search_rank=rank).order_by(F('search_rank').asc(nulls_last=True), '-created_at')
+
+    if connection.vendor == 'postgresql':
+        ts_query = ' & '.join(f'{token}:*' for token in tokens)
+        # The simple parser keeps emails and phone numbers whole: the
+        # substring match (served by the trigram index) finds their fragments
+        matches = RawSQL(
+            "to_tsvector('simple', \"Health_patient\".\"search_document\") @@ to_tsquery('simple', %s)",
+            [ts_query], output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            "ts_rank(to_tsvector('simple', \"Health_patient\".\"search_document\"), "
+            "to_tsquery('simple', %s)) + similarity(\"Health_patient\".\"search_document\", %s)",
+            [ts_query, ' '.join(tokens)], output_field=FloatField(),
+        )
+        return patients.filter(Q(matches) | _contains_all(tokens)).annotate(
+            search_rank=rank).order_by('-search_rank', '-created_at')
+
+    return patients.filter(_contains_all(tokens))
@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .middleware import invalidate_request_doctor
+from .search import install_search_index
+from .sqlite import apply_pragmas
+from . import inbox
+from .events import broker
+from .models import (Doctor, Patient, Appointment, Consultation, Prescription, Medicine,
+                     Notification, Message)
+from .pdf import invalidate_prescription_pdf
+from .cache import bump_doctor_cache_version
+
+
+def _reset_doctor_cache(doctor_id):
+    # After commit, so that nothing is recomputed from the old rows under the new version
+    transaction.on_commit(lambda: bump_doctor_cache_version(doctor_id))
+
+
+@receiver([post_save, post_delete], sender=Patient)
+@receiver([post_save, post_delete], sender=Appointment)
+@receiver([post_save, post_delete], sender=Consultation)
+@receiver([post_save, post_delete], sender=Prescription)
+def reset_doctor_cache(sender, instance, **kwargs):
+    """
+    Invalidate everything cached for the doctor owning the changed row
+    (dashboard counters, list page fragments)
+    """
+    _reset_doctor_cache(instance.doctor_id)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def reset_request_doctor(sender, instance, **kwargs):
+    """Profile updates invalidate the doctor cached for request.doctor"""
+    invalidate_request_doctor(instance.user_id)
+    _reset_doctor_cache(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reset_request_doctor_user(sender, instance, update_fields=None, **kwargs):
+    invalidate_request_doctor(instance.pk)
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        # Logging in changes nothing that is displayed
+        return
+    # The doctor's name appears on cached pages
+    for doctor_id in Doctor.objects.filter(user_id=instance.pk).values_list('id', flat=True):
+        _reset_doctor_cache(doctor_id)
+
+
+@receiver([post_save, post_delete], sender=Prescription)
+def reset_prescription_pdf(sender, instance, **kwargs):
+    """Drop the cached PDFs of a changed prescription"""
+    invalidate_prescription_pdf(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Medicine)
+def reset_medicine_prescription_pdf(sender, instance, **kwargs):
+    invalidate_prescription_pdf(instance.prescription_id)
+
+
+@receiver(post_save, sender=Notification)
+def count_notification(sender, instance, created, **kwargs):
+    """Keep the user's unread counters in step with the saved notification"""
+    inbox.notification_saved(instance, created)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_notification(sender, instance, **kwargs):
+    inbox.notification_deleted(instance)
+
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, **kwargs):
+    inbox.message_saved(instance, created)
+
+
+@receiver(post_delete, sender=Message)
+def uncount_message(sender, instance, **kwargs):
+    inbox.message_deleted(instance)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    """Push new notifications to the user's open event streams once committed"""
+    if created:
+        data = instance.as_dict()
+        transaction.on_commit(lambda: broker.publish(instance.user_id, 'notification', data))
+
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created, **kwargs):
+    if created:
+        data = instance.as_dict()
+        transaction.on_commit(lambda: broker.publish(instance.recipient_id, 'message', data))
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using='default', **kwargs):
+    """
+    SQLite drops triggers when a migration rebuilds the patient table;
+    recreate the search index objects after every migrate
+    """
+    # Databases without the Health tables (e.g. a replica) are skipped
+    if sender.name == 'Health' and router.allow_migrate(using, 'Health'):
+        install_search_index(connections[using])
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor)
@@ -0,0 +1,59 @@
+"""
+SQLite connection setup.
+
+Every new SQLite connection runs the pragmas of settings.SQLITE_PRAGMAS
+(see signals.configure_sqlite_connection):
+
+- ``journal_mode=wal``: readers no longer block behind a writer (and the
+  other way round); only writers queue behind each other
+- ``synchronous=normal``: safe with WAL, fsyncs at checkpoints only
+- ``busy_timeout``: milliseconds a connection waits for a lock before
+  failing with "database is locked"
+- ``mmap_size`` / ``cache_size``: memory-mapped I/O and page cache
+  (a negative cache_size is in KiB)
+
+A pragma set to None is left at SQLite's default.
+"""
+from django.conf import settings
+
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+}
+
+# Accepted values, checked because pragmas cannot take query parameters
+PRAGMA_CHOICES = {
+    'journal_mode': {'delete', 'truncate', 'persist', 'memory', 'wal', 'off'},
+    'synchronous': {'off', 'normal', 'full', 'extra'},
+}
+
+
+def sqlite_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+
+
+def pragma_statements(pragmas):
+    """The PRAGMA statements for a {name: value} dict (None values skipped)"""
+    statements = []
+    # busy_timeout first: switching the journal mode may have to wait for a lock
+    for name, value in sorted(pragmas.items(), key=lambda item: item[0] != 'busy_timeout'):
+        if value is None:
+            continue
+        if name in PRAGMA_CHOICES:
+            value = str(value).lower()
+            if value not in PRAGMA_CHOICES[name]:
+                raise ValueError(f'Invalid value for PRAGMA {name}: {value}')
+        else:
+            value = int(value)
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(cursor, pragmas=None):
+    """Run the pragmas on a DB-API cursor of an SQLite connection"""
+    for statement in pragma_statements(sqlite_pragmas() if pragmas is None else pragmas):
+        cursor.execute(statement)
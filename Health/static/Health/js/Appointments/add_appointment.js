@@ -0,0 +1,40 @@
+document.getElementById('findSlotsBtn').addEventListener('click', function () {
+    const list = document.getElementById('freeSlotList');
+    const params = new URLSearchParams({
+        duration: document.getElementById('id_duration').value || 30,
+        step: 15,
+        limit: 12,
+    });
+    const date = document.getElementById('id_scheduled_date').value;
+    if (date) {
+        params.set('start', date);
+    }
+    if (this.dataset.exclude) {
+        params.set('exclude', this.dataset.exclude);
+    }
+
+    list.textContent = 'Searching...';
+    fetch(this.dataset.url + '?' + params.toString())
+        .then(response => response.json())
+        .then(data => {
+            list.innerHTML = '';
+            if (!data.success || data.slots.length === 0) {
+                list.textContent = data.message || 'No free slot in the next 7 days.';
+                return;
+            }
+            data.slots.forEach(slot => {
+                const button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'free-slot';
+                button.textContent = slot.date + ' ' + slot.start + ' - ' + slot.end;
+                button.addEventListener('click', function () {
+                    document.getElementById('id_scheduled_date').value = slot.date;
+                    document.getElementById('id_scheduled_time').value = slot.start;
+                });
+                list.appendChild(button);
+            });
+        })
+        .catch(() => {
+            list.textContent = 'Could not load free slots.';
+        });
+});
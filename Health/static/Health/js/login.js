@@ -0,0 +1,16 @@
+// Auto-hide messages after 5 seconds
+setTimeout(function() {
+    const messages = document.querySelectorAll('.message');
+    messages.forEach(msg => {
+        msg.style.animation = 'slideOut 0.3s ease forwards';
+        setTimeout(() => msg.remove(), 300);
+    });
+}, 5000);
+
+// Allow manual close of messages
+document.querySelectorAll('.close-message').forEach(btn => {
+    btn.addEventListener('click', function() {
+        this.parentElement.style.animation = 'slideOut 0.3s ease forwards';
+        setTimeout(() => this.parentElement.remove(), 300);
+    });
+});
@@ -0,0 +1,272 @@
+let allNotifications = [];
+let currentFilter = 'all';
+
+// Fetch notifications on page load
+async function fetchNotifications() {
+    try {
+        const response = await fetch('/api/notifications/');
+        const data = await response.json();
+
+        if (data.success) {
+            allNotifications = data.notifications;
+            displayNotifications();
+            updateUnreadBadge();
+        } else {
+            showEmptyState();
+        }
+    } catch (error) {
+        console.error('Error fetching notifications:', error);
+        showEmptyState();
+    } finally {
+        document.getElementById('loadingState').style.display = 'none';
+    }
+}
+
+// Display notifications
+function displayNotifications() {
+    const container = document.getElementById('notificationsList');
+    const emptyState = document.getElementById('emptyState');
+
+    // Filter notifications
+    let filtered = allNotifications;
+    if (currentFilter === 'unread') {
+        filtered = allNotifications.filter(n => n.unread);
+    } else if (currentFilter !== 'all') {
+        filtered = allNotifications.filter(n => n.type === currentFilter);
+    }
+
+    if (filtered.length === 0) {
+        container.style.display = 'none';
+        emptyState.style.display = 'block';
+        return;
+    }
+
+    container.style.display = 'block';
+    emptyState.style.display = 'none';
+
+    container.innerHTML = filtered.map(notif => `
+        <div class="notification-card ${notif.unread ? 'unread' : ''}" onclick="handleNotificationClick(${notif.id}, '${notif.link}')">
+            <div class="notification-icon-wrapper">
+                <div class="notification-icon-large ${notif.type}">
+                    ${notif.icon}
+                </div>
+            </div>
+            <div class="notification-content">
+                <div class="notification-header">
+                    <div>
+                        <div class="notification-title">${notif.title}</div>
+                        <div class="notification-time">${notif.time}</div>
+                    </div>
+                </div>
+                <div class="notification-message">${notif.message}</div>
+                <div class="notification-actions">
+                    ${notif.unread ? `
+                        <button class="notification-action-btn" onclick="event.stopPropagation(); markAsRead(${notif.id})">
+                            Mark as read
+                        </button>
+                    ` : ''}
+                    <button class="notification-action-btn delete" onclick="event.stopPropagation(); deleteNotification(${notif.id})">
+                        Delete
+                    </button>
+                </div>
+            </div>
+            ${notif.unread ? '<div class="unread-indicator"></div>' : ''}
+        </div>
+    `).join('');
+}
+
+// Filter notifications
+function filterNotifications(filter) {
+    currentFilter = filter;
+
+    // Update active tab
+    document.querySelectorAll('.filter-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelector(`[data-filter="${filter}"]`).classList.add('active');
+
+    displayNotifications();
+}
+
+// Update unread badge
+function updateUnreadBadge() {
+    const unreadCount = allNotifications.filter(n => n.unread).length;
+    const badge = document.getElementById('unreadBadge');
+
+    if (unreadCount > 0) {
+        badge.textContent = `${unreadCount} Unread`;
+        badge.style.display = 'inline-block';
+    } else {
+        badge.style.display = 'none';
+    }
+}
+
+// Handle notification click
+async function handleNotificationClick(id, link) {
+    await markAsRead(id);
+    if (link && link !== '#') {
+        window.location.href = link;
+    }
+}
+
+// Mark single notification as read
+async function markAsRead(id) {
+    try {
+        const response = await fetch(`/api/notifications/${id}/read/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken')
+            }
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            const notification = allNotifications.find(n => n.id === id);
+            if (notification) {
+                notification.unread = false;
+                displayNotifications();
+                updateUnreadBadge();
+            }
+        }
+    } catch (error) {
+        console.error('Error marking as read:', error);
+    }
+}
+
+// Mark all as read
+async function markAllAsRead() {
+    try {
+        const response = await fetch('/api/notifications/mark-all-read/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken')
+            }
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            allNotifications.forEach(n => n.unread = false);
+            displayNotifications();
+            updateUnreadBadge();
+            showToast('All notifications marked as read', 'success');
+        }
+    } catch (error) {
+        console.error('Error marking all as read:', error);
+        showToast('Failed to mark all as read', 'error');
+    }
+}
+
+// Delete notification
+async function deleteNotification(id) {
+    if (!confirm('Are you sure you want to delete this notification?')) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/notifications/${id}/delete/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken')
+            }
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            allNotifications = allNotifications.filter(n => n.id !== id);
+            displayNotifications();
+            updateUnreadBadge();
+            showToast('Notification deleted', 'success');
+        }
+    } catch (error) {
+        console.error('Error deleting notification:', error);
+        showToast('Failed to delete notification', 'error');
+    }
+}
+
+// Clear all read notifications
+async function clearAllRead() {
+    const readNotifications = allNotifications.filter(n => !n.unread);
+
+    if (readNotifications.length === 0) {
+        showToast('No read notifications to clear', 'info');
+        return;
+    }
+
+    if (!confirm(`Are you sure you want to delete ${readNotifications.length} read notification(s)?`)) {
+        return;
+    }
+
+    // Delete each read notification
+    for (const notif of readNotifications) {
+        try {
+            await fetch(`/api/notifications/${notif.id}/delete/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken')
+                }
+            });
+        } catch (error) {
+            console.error('Error deleting notification:', error);
+        }
+    }
+
+    // Refresh list
+    await fetchNotifications();
+    showToast('Read notifications cleared', 'success');
+}
+
+// Show empty state
+function showEmptyState() {
+    document.getElementById('loadingState').style.display = 'none';
+    document.getElementById('notificationsList').style.display = 'none';
+    document.getElementById('emptyState').style.display = 'block';
+}
+
+// Show toast
+function showToast(message, type = 'info') {
+    const toast = document.createElement('div');
+    toast.className = `toast-message ${type}`;
+    toast.style.cssText = `
+        position: fixed;
+        top: 90px;
+        right: 20px;
+        padding: 15px 20px;
+        background: ${type === 'success' ? '#27ae60' : type === 'error' ? '#e74c3c' : '#3498db'};
+        color: white;
+        border-radius: 5px;
+        font-weight: 600;
+        z-index: 10000;
+        animation: slideIn 0.3s ease;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+    `;
+    toast.textContent = message;
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => toast.remove(), 300);
+    }, 3000);
+}
+
+// Get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Load notifications on page load
+document.addEventListener('DOMContentLoaded', function() {
+    fetchNotifications();
+    // Refreshed when the event stream opened in base.html reports new items
+    onInboxChange('notifications', fetchNotifications);
+});
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from django.db.models import Count, Q
+
+from .cache import cached_for_doctor, bump_doctor_cache_version
+from .models import Patient, Appointment, Consultation
+
+
+def compute_dashboard_stats(doctor, today):
+    """Compute the dashboard counters with one aggregate query per model"""
+    patients = Patient.objects.filter(doctor=doctor).aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+    appointments = Appointment.objects.filter(doctor=doctor).aggregate(
+        total=Count('id'),
+        today=Count('id', filter=Q(scheduled_date=today)),
+    )
+    consultations = Consultation.objects.filter(doctor=doctor).aggregate(
+        total=Count('id'),
+    )
+    return {
+        'date': today,
+        'total_patients': patients['total'],
+        'pending_follow_ups': patients['pending'],
+        'total_appointments': appointments['total'],
+        'appointments_today': appointments['today'],
+        'total_consultations': consultations['total'],
+    }
+
+
+def dashboard_lists(doctor, today):
+    """Today's scheduled appointments and the recent patients shown on the dashboard (lazy querysets)"""
+    todays_appointments = doctor.appointments.filter(
+        scheduled_date=today,
+        status='scheduled'
+    ).select_related('patient')[:4]
+    recent_patients = doctor.patients.all()[:5]
+    return todays_appointments, recent_patients
+
+
+def get_dashboard_stats(doctor):
+    """Return the cached dashboard counters of a doctor, computing them if needed"""
+    today = datetime.now().date()
+    # Keyed by day: the "today" counters go stale at midnight
+    return cached_for_doctor(doctor.id, 'dashboard_stats', lambda: compute_dashboard_stats(doctor, today), today)
+
+
+def invalidate_dashboard_stats(doctor_id):
+    """Drop the dashboard counters (with everything else cached for the doctor)"""
+    bump_doctor_cache_version(doctor_id)
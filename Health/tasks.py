@@ -0,0 +1,85 @@
+"""
+Background jobs (see jobs.py); queue them with ``func.delay(...)``.
+"""
+import os
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .jobs import job
+from .models import Doctor, Prescription, create_notification
+from .notifications import broadcast_to_doctors
+from .pdf import cached_prescription_pdf
+from .patient_import import import_patients, read_rows, set_import_progress
+from .retention import prune_notifications
+
+
+@job(priority=10)
+def send_notification(user_id, notification_type, title, message, link=None, dedupe_key=None):
+    """Create a notification for a user"""
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
+        return
+    create_notification(user=user, notification_type=notification_type, title=title,
+                        message=message, link=link, dedupe_key=dedupe_key)
+
+
+@job(priority=5)
+def render_prescription_pdf(prescription_id):
+    """Render a prescription PDF ahead of time so the first download is served from the cache"""
+    prescription = (Prescription.objects.select_related('patient', 'doctor__user')
+                    .prefetch_related('medicines').filter(id=prescription_id).first())
+    if prescription is not None:
+        cached_prescription_pdf(prescription)
+
+
+@job(priority=0, max_attempts=5)
+def delete_user_account(user_id):
+    """Delete an account with all its patients, appointments and records"""
+    with transaction.atomic():
+        Doctor.objects.filter(user_id=user_id).delete()
+        User.objects.filter(id=user_id).delete()
+
+
+@job(priority=5)
+def broadcast_notification(notification_type, title, message, link=None, dedupe_key=None):
+    """Notify every active doctor (see notifications.broadcast_to_doctors)"""
+    broadcast_to_doctors(notification_type, title, message, link=link, dedupe_key=dedupe_key)
+
+
+@job(priority=0)
+def prune_expired_notifications():
+    """Apply the notification retention policy (see retention.py)"""
+    return prune_notifications()
+
+
+@job(priority=0, max_attempts=1)
+def import_patients_file(import_id, doctor_id, path, file_format):
+    """
+    Import an uploaded patient file (see patient_import.py), publishing the
+    progress under ``import_id``; the file is deleted afterwards.
+    Not retried: the rows of a failed run would come back as duplicates.
+    """
+    last = {}
+
+    def progress(result):
+        last['result'] = result
+        set_import_progress(import_id, doctor_id, 'running', result)
+
+    try:
+        doctor = Doctor.objects.get(id=doctor_id)
+        set_import_progress(import_id, doctor_id, 'running')
+        result = import_patients(doctor, read_rows(path, file_format), progress=progress)
+    except ValidationError as e:
+        set_import_progress(import_id, doctor_id, 'failed', last.get('result'), message=e.message)
+    except Exception:
+        # The batches already committed stay imported
+        set_import_progress(import_id, doctor_id, 'failed', last.get('result'),
+                            message='The import stopped unexpectedly')
+        raise
+    else:
+        set_import_progress(import_id, doctor_id, 'done', result)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,33 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from Health import images
+
+
+register = template.Library()
+
+
+@register.filter
+def srcset(picture, extension='jpg'):
+    """``{{ doctor.profile_picture|srcset:"webp" }}``: the variants as a srcset value"""
+    return images.srcset(picture, extension)
+
+
+@register.simple_tag
+def profile_picture(picture, size, **attrs):
+    """
+    ``{% profile_picture doctor.profile_picture 40 alt="Profile" %}``: a
+    <picture> showing the picture at ``size`` CSS pixels, letting the browser
+    pick the WebP or JPEG variant matching its pixel density. Extra keyword
+    arguments become attributes of the <img>.
+    """
+    attrs.setdefault('alt', '')
+    if not images.srcset(picture):
+        return format_html('<img src="{}"{}>', picture.url, flatatt(attrs))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}px">'
+        '<img src="{}" srcset="{}" sizes="{}px" width="{}" height="{}"{}></picture>',
+        images.srcset(picture, 'webp'), size,
+        images.variant_url(picture, size), images.srcset(picture), size, size, size, flatatt(attrs),
+    )
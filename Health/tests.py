@@ -1,3 +1,653 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+from datetime import date, datetime, time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import inbox, notifications
+from .export import async_chunks
+from .middleware import ReplicaPinningMiddleware, aload_doctor, load_doctor
+from .conversations import direct_conversation, get_or_create_direct_conversation, send_message
+from .jobs import claim_job
+from .models import Appointment, Conversation, Doctor, InboxCounter, Job, Message, Notification, Patient
+from .pagination import CursorPaginator, InvalidCursor, PartitionedCursorPaginator
+from .patient_import import import_patients, read_rows
+from .prescriptions import create_prescription
+from .routers import PRIMARY, REPLICA, STICKY_COOKIE, PrimaryReplicaRouter, request_state
+from .scheduling import (APPOINTMENT_PARTITION_ORDERING, appointment_list_partitions, appointment_list_queryset,
+                         check_slots, has_overlap)
+from .search import search_patients
+
+
+def make_doctor(username='doctor'):
+    user = User.objects.create_user(username, password='pw')
+    return Doctor.objects.create(user=user, license_number=f'L-{username}', specialty='general', phone='+123456789')
+
+
+def make_patient(doctor, first_name='John', **fields):
+    values = dict(first_name=first_name, last_name='Smith', email=f'{first_name.lower()}.{doctor.id}@example.com',
+                  phone='+15551234567', date_of_birth=date(1990, 1, 1), gender='M', address='1 Main St',
+                  city='Springfield', state='IL', zip_code='62701', emergency_contact='Jane Smith',
+                  emergency_phone='+15557654321')
+    values.update(fields)
+    return Patient.objects.create(doctor=doctor, **values)
+
+
+def notify(user, is_read=False):
+    return Notification.objects.create(user=user, notification_type='system', title='Title',
+                                       message='Message', is_read=is_read)
+
+
+class InboxCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('doctor', password='pw')
+        self.other = User.objects.create_user('colleague', password='pw')
+
+    def test_missing_counter_is_rebuilt_on_read(self):
+        notify(self.user)
+        notify(self.user, is_read=True)
+        InboxCounter.objects.filter(user=self.user).delete()
+
+        counter = inbox.get_counter(self.user.pk)
+        self.assertEqual(counter.unread_notifications, 1)
+        self.assertEqual(counter.latest_notification_id, Notification.objects.latest('id').id)
+
+    def test_counters_follow_creates_reads_and_deletes(self):
+        first, second = notify(self.user), notify(self.user)
+        message = Message.objects.create(sender=self.other, recipient=self.user, message='Hello')
+        counter = inbox.get_counter(self.user.pk)
+        self.assertEqual((counter.unread_notifications, counter.unread_messages), (2, 1))
+        self.assertEqual(counter.latest_message_id, message.id)
+
+        first.is_read = True
+        first.save()
+        second.delete()
+        message.delete()
+        counter.refresh_from_db()
+        self.assertEqual((counter.unread_notifications, counter.unread_messages), (0, 0))
+        self.assertEqual(inbox.compute_counters(self.user.pk)['unread_notifications'], 0)
+
+    def test_mark_all_read(self):
+        notify(self.user)
+        notify(self.user)
+        self.assertEqual(inbox.mark_all_notifications_read(self.user), 2)
+        self.assertEqual(inbox.get_counter(self.user.pk).unread_notifications, 0)
+
+    def test_concurrent_reads_are_counted_once(self):
+        notification = notify(self.user)
+        notify(self.user)
+        message = Message.objects.create(sender=self.other, recipient=self.user, message='Hello')
+        # Two requests that both loaded the item unread: only the first update flips it
+        self.assertEqual([inbox.read_notification(self.user, notification.id) for _ in range(2)], [True, False])
+        self.assertEqual([inbox.read_message(self.user, message.id) for _ in range(2)], [True, False])
+        self.assertFalse(inbox.read_message(self.other, message.id))
+        counter = inbox.get_counter(self.user.pk)
+        self.assertEqual((counter.unread_notifications, counter.unread_messages), (1, 0))
+
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('mark_notification_read', args=[notification.id]))
+        self.assertTrue(response.json()['success'])
+        counter.refresh_from_db()
+        self.assertEqual(counter.unread_notifications, 1)
+
+    def test_delete_does_not_recreate_a_missing_counter(self):
+        notification = notify(self.user)
+        InboxCounter.objects.filter(user=self.user).delete()
+        notification.delete()
+        self.assertFalse(InboxCounter.objects.filter(user=self.user).exists())
+
+    def test_deleting_user_with_unread_items(self):
+        notify(self.user)
+        Message.objects.create(sender=self.other, recipient=self.user, message='Hello')
+        Message.objects.create(sender=self.user, recipient=self.other, message='Hi')
+        inbox.get_counter(self.user.pk)
+
+        self.user.delete()
+
+        self.assertFalse(InboxCounter.objects.filter(user_id=self.user.pk).exists())
+        # Raised at commit before the fix: a counter was recreated for the deleted user
+        connection.check_constraints()
+        self.assertEqual(inbox.get_counter(self.other.pk).unread_messages, 0)
+
+
+class NotificationFanOutTests(TestCase):
+    def test_rows_skipped_on_a_conflict_are_not_counted(self):
+        first, second = User.objects.create_user('first'), User.objects.create_user('second')
+        bulk_create = Notification.objects.bulk_create
+
+        def racing_bulk_create(rows, **kwargs):
+            # Another fan-out inserts the same key after this one checked for it
+            Notification.objects.filter(id=notify(first).id).update(dedupe_key='reminder')
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(Notification.objects, 'bulk_create', racing_bulk_create), \
+                mock.patch.object(notifications.broker, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            created = notifications.notify_users([first.pk, second.pk], 'system', 'Title', 'Message',
+                                                 dedupe_key='reminder')
+
+        self.assertEqual(created, 1)
+        # The racing notification was published by its own signal
+        self.assertEqual([call.args[0] for call in publish.call_args_list if call.args[2].get('bulk')], [second.pk])
+        self.assertEqual(Notification.objects.filter(dedupe_key='reminder').count(), 2)
+        self.assertEqual(notifications.notify_users([first.pk, second.pk], 'system', 'Title', 'Message',
+                                                    dedupe_key='reminder'), 0)
+
+
+class DeleteAccountTests(TestCase):
+    def test_account_is_deleted_before_success_is_reported(self):
+        doctor = make_doctor()
+        make_patient(doctor)
+        notify(doctor.user)
+        self.client.force_login(doctor.user)
+
+        response = self.client.post(reverse('delete_account'))
+
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(User.objects.filter(id=doctor.user_id).exists())
+        self.assertFalse(Patient.objects.exists())
+        connection.check_constraints()
+
+
+class AsyncChunksTests(TestCase):
+    def test_yields_items_one_at_a_time_and_closes_the_generator(self):
+        state = {'produced': 0, 'closed': False}
+
+        def chunks():
+            try:
+                for i in range(3):
+                    state['produced'] += 1
+                    yield f'chunk {i}'.encode()
+            finally:
+                state['closed'] = True
+
+        async def first_then_close():
+            stream = async_chunks(chunks())
+            first = await anext(stream)
+            produced = state['produced']
+            await stream.aclose()
+            return first, produced
+
+        self.assertEqual(asyncio.run(first_then_close()), (b'chunk 0', 1))
+        self.assertTrue(state['closed'])
+
+
+class AppointmentOverlapTests(TestCase):
+    day = date(2030, 6, 3)
+
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.patient = make_patient(self.doctor)
+        # 10:00-10:30
+        self.appointment = self.book(time(10, 0))
+
+    def book(self, at, duration=30, status='scheduled', doctor=None):
+        doctor = doctor or self.doctor
+        patient = self.patient if doctor == self.doctor else make_patient(doctor, 'Other')
+        return Appointment.objects.create(doctor=doctor, patient=patient, appointment_type='checkup',
+                                          scheduled_date=self.day, scheduled_time=at, duration=duration,
+                                          status=status)
+
+    def overlaps(self, at, duration=30, exclude_id=None):
+        return has_overlap(self.doctor, *Appointment.slot_bounds(self.day, at, duration), exclude_id=exclude_id)
+
+    def test_adjacent_slots_do_not_overlap(self):
+        self.assertFalse(self.overlaps(time(9, 30)))
+        self.assertFalse(self.overlaps(time(10, 30)))
+
+    def test_partial_and_enclosing_slots_overlap(self):
+        self.assertTrue(self.overlaps(time(9, 45)))
+        self.assertTrue(self.overlaps(time(10, 15), duration=5))
+        self.assertTrue(self.overlaps(time(9, 0), duration=120))
+
+    def test_ignores_excluded_cancelled_and_other_doctors(self):
+        self.assertFalse(self.overlaps(time(10, 0), exclude_id=self.appointment.id))
+        self.book(time(11, 0), status='cancelled')
+        self.book(time(12, 0), doctor=make_doctor('colleague'))
+        self.assertFalse(self.overlaps(time(11, 0)))
+        self.assertFalse(self.overlaps(time(12, 0)))
+
+    def test_check_slots_reports_the_clashing_appointment(self):
+        later = self.book(time(14, 0), duration=60)
+        with self.assertNumQueries(1):
+            results = check_slots(self.doctor, [(self.day, time(10, 15), 30), (self.day, time(10, 30), 30),
+                                                (self.day, time(14, 59), 1)])
+        self.assertEqual([result['conflict_id'] for result in results], [self.appointment.id, None, later.id])
+        self.assertEqual([result['available'] for result in results], [False, True, False])
+
+    def test_cancel_requires_login(self):
+        url = reverse('cancel_appointment', args=[self.appointment.id])
+        response = self.client.get(url)
+        self.assertRedirects(response, f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, 'scheduled')
+
+        self.client.force_login(self.doctor.user)
+        self.client.get(url)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, 'cancelled')
+
+    def test_calendar_feed_etag_follows_patient_renames(self):
+        self.client.force_login(self.doctor.user)
+        url = reverse('calendar_feed') + '?start=2030-06-01&end=2030-06-30'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.patient.last_name = 'Smyth'
+        self.patient.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('John Smyth', response.content.decode())
+
+    def test_check_slots_endpoint_validates_the_payload(self):
+        self.client.force_login(self.doctor.user)
+        url = reverse('check_appointment_slots')
+        for payload in ([], {'slots': {}}, {'slots': ['10:00']}, {'slots': [{'time': '10:00'}]},
+                        {'slots': [{'date': '2030-06-03', 'time': '10:00', 'duration': 0}]}):
+            response = self.client.post(url, json.dumps(payload), content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+
+        response = self.client.post(url, json.dumps({'slots': [{'date': '2030-06-03', 'time': '10:15'}]}),
+                                    content_type='application/json')
+        self.assertEqual(response.json()['slots'][0]['conflict_id'], self.appointment.id)
+
+
+class CursorPaginatorTests(TestCase):
+    ordering = ['-date_of_birth', 'id']
+
+    def setUp(self):
+        doctor = make_doctor()
+        # Pairs of patients share a birth date: the id breaks the tie
+        for i in range(7):
+            make_patient(doctor, f'Patient{i}', date_of_birth=date(1990, 1, 1 + i // 2))
+        self.queryset = Patient.objects.order_by(*self.ordering)
+        self.expected = list(self.queryset.values_list('id', flat=True))
+
+    def paginator(self, per_page=3):
+        return CursorPaginator(self.queryset, per_page, self.ordering)
+
+    def ids(self, page):
+        return [patient.id for patient in page]
+
+    def test_walks_forward_then_back(self):
+        paginator = self.paginator()
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(self.ids(previous), self.expected[3:6])
+        self.assertEqual(self.ids(paginator.page(previous.previous_cursor)), self.expected[:3])
+        self.assertFalse(paginator.page(previous.previous_cursor).has_previous())
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        paginator = self.paginator(per_page=7)
+        page = paginator.page()
+        self.assertEqual(self.ids(page), self.expected)
+        self.assertFalse(page.has_next())
+
+    def test_cursor_round_trip(self):
+        paginator = self.paginator()
+        patient = self.queryset[2]
+        values, direction = paginator._decode(paginator._encode(patient, 'next'))
+        self.assertEqual(values, [patient.date_of_birth, patient.id])
+        self.assertEqual(direction, 'next')
+
+    def test_invalid_cursors(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        other = CursorPaginator(self.queryset, 3, ['id'])
+        for bad in ('garbage', cursor[:-2], other._encode(self.queryset[0], 'next')):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(bad)
+        self.assertEqual(self.ids(paginator.get_page('garbage')), self.expected[:3])
+
+    def test_empty_queryset(self):
+        page = CursorPaginator(Patient.objects.none(), 3, self.ordering).page()
+        self.assertEqual(len(page), 0)
+        self.assertFalse(page.has_other_pages())
+
+    def test_cursor_mode_list_runs_no_count(self):
+        doctor = Doctor.objects.get()
+        self.client.force_login(doctor.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointments_list'), {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if 'COUNT(' in query['sql']])
+
+
+class AppointmentListPagingTests(TestCase):
+    def setUp(self):
+        self.doctor = make_doctor()
+        patient = make_patient(self.doctor)
+        self.today = date(2030, 6, 3)
+        for i, status in enumerate(['completed', 'scheduled', 'no-show', 'scheduled', 'cancelled', 'completed',
+                                    'scheduled', 'cancelled', 'scheduled', 'completed']):
+            # Past and upcoming days, with a shared slot to exercise the id tie-breaker
+            Appointment.objects.create(doctor=self.doctor, patient=patient, appointment_type='checkup',
+                                       scheduled_date=date(2030, 6, 1 + i % 5), scheduled_time=time(9 + i % 2, 0),
+                                       status=status)
+        self.expected = list(appointment_list_queryset(self.doctor, self.today).values_list('id', flat=True))
+
+    def paginator(self):
+        partitions = appointment_list_partitions(Appointment.objects.filter(doctor=self.doctor), self.today)
+        return PartitionedCursorPaginator(partitions, 3, APPOINTMENT_PARTITION_ORDERING)
+
+    def test_pages_follow_the_list_order_across_partitions(self):
+        paginator = self.paginator()
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([appointment.id for page in pages for appointment in page], self.expected)
+
+        previous = [paginator.page(pages[-1].previous_cursor)]
+        while previous[-1].has_previous():
+            previous.append(paginator.page(previous[-1].previous_cursor))
+        self.assertEqual([[appointment.id for appointment in page] for page in reversed(previous)],
+                         [list(self.expected[i:i + 3]) for i in range(0, 9, 3)])
+
+    def test_rejects_a_cursor_without_a_valid_partition(self):
+        paginator = self.paginator()
+        appointment = Appointment.objects.first()
+        appointment.cursor_partition = 8
+        with self.assertRaises(InvalidCursor):
+            paginator.page(paginator._encode(appointment, 'next'))
+        with self.assertRaises(InvalidCursor):
+            paginator.page(CursorPaginator(Appointment.objects.all(), 3, APPOINTMENT_PARTITION_ORDERING)
+                           ._encode(appointment, 'next'))
+
+
+IMPORT_HEADER = ('First Name,Last Name,Email,Phone,Date of birth,Gender,Address,City,State,Zip code,'
+                 'Emergency contact,Emergency phone,Status')
+
+
+def import_row(first_name, email, date_of_birth='1990-01-01', gender='M', status=''):
+    return (f'{first_name},Smith,{email},+15551234567,{date_of_birth},{gender},1 Main St,Springfield,IL,62701,'
+            f'Jane Smith,+15557654321,{status}')
+
+
+class PatientImportTests(TestCase):
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content, encoding='utf-8'):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding=encoding, newline='') as f:
+            f.write(content)
+        return path
+
+    def import_csv(self, *rows, **kwargs):
+        path = self.write('patients.csv', '\n'.join((IMPORT_HEADER,) + rows) + '\n')
+        return import_patients(self.doctor, read_rows(path), **kwargs)
+
+    def test_valid_rows_are_created_and_invalid_ones_reported(self):
+        make_patient(self.doctor, 'Taken', email='taken@example.com')
+        result = self.import_csv(
+            import_row('Ann', 'ann@example.com', gender='Female', status='Inactive'),
+            import_row('Bob', 'bob@example.com', date_of_birth='not a date'),
+            import_row('Cid', 'ann@example.com'),
+            import_row('Dan', 'taken@example.com'),
+            import_row('Eve', 'eve@example.com', gender='X'),
+            import_row('Fay', 'fay@example.com'),
+            batch_size=2,
+        )
+        self.assertEqual((result.processed, result.created, result.failed), (6, 2, 4))
+        self.assertEqual([(error['line'], list(error['errors'])) for error in result.errors],
+                         [(3, ['date_of_birth']), (4, ['email']), (5, ['email']), (6, ['gender'])])
+
+        ann = Patient.objects.get(email='ann@example.com')
+        self.assertEqual((ann.doctor, ann.gender, ann.status), (self.doctor, 'F', 'inactive'))
+        self.assertEqual(Patient.objects.get(email='fay@example.com').status, 'active')
+        self.assertIn('fay', Patient.objects.get(email='fay@example.com').search_document)
+
+    def test_dry_run_creates_nothing(self):
+        result = self.import_csv(import_row('Ann', 'ann@example.com'), dry_run=True)
+        self.assertEqual((result.processed, result.failed), (1, 0))
+        self.assertFalse(Patient.objects.exists())
+
+    def test_unreadable_files(self):
+        with self.assertRaisesMessage(ValidationError, 'Missing column(s): email'):
+            list(read_rows(self.write('patients.csv', IMPORT_HEADER.replace('Email,', '') + '\n')))
+        latin = self.write('patients.csv', IMPORT_HEADER + '\n' + import_row('Zoé', 'zoe@example.com'), 'latin-1')
+        with self.assertRaisesMessage(ValidationError, 'not UTF-8'):
+            list(read_rows(latin))
+        with self.assertRaisesMessage(ValidationError, 'not a valid .xlsx'):
+            list(read_rows(self.write('patients.xlsx', 'not a workbook')))
+
+    def test_xlsx_numbers_and_dates(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(IMPORT_HEADER.split(','))
+        workbook.active.append(['Ann', 'Smith', 'ann@example.com', 15551234567, datetime(1990, 1, 1), 'F',
+                                '1 Main St', 'Springfield', 'IL', 62701, 'Jane Smith', '+15557654321', None])
+        path = os.path.join(self.directory.name, 'patients.xlsx')
+        workbook.save(path)
+
+        result = import_patients(self.doctor, read_rows(path))
+        self.assertEqual((result.created, result.errors), (1, []))
+        ann = Patient.objects.get()
+        self.assertEqual((ann.phone, ann.zip_code, ann.date_of_birth), ('15551234567', '62701', date(1990, 1, 1)))
+
+    def test_upload_endpoint(self):
+        self.client.force_login(self.doctor.user)
+        url = reverse('patients_import')
+        response = self.client.post(url, {'file': SimpleUploadedFile('patients.txt', b'')})
+        self.assertEqual(response.status_code, 400)
+
+        content = '\n'.join([IMPORT_HEADER, import_row('Ann', 'ann@example.com'), import_row('Bob', 'bob')])
+        with override_settings(PATIENT_IMPORT_DIR=self.directory.name, JOB_QUEUE_EAGER=True):
+            response = self.client.post(url, {'file': SimpleUploadedFile('patients.csv', content.encode())})
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual((status['status'], status['created'], status['failed']), ('done', 1, 1))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+        other = make_doctor('colleague')
+        self.client.force_login(other.user)
+        self.assertEqual(self.client.get(response.json()['status_url']).status_code, 404)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   DOCTOR_CACHE_TIMEOUT=60)
+class DoctorCacheTests(TestCase):
+    def test_cached_profile_holds_no_user(self):
+        doctor = make_doctor()
+        user = User.objects.get(id=doctor.user_id)
+        self.assertEqual(load_doctor(user).id, doctor.id)
+
+        with self.assertNumQueries(0):
+            cached = load_doctor(user)
+        self.assertIs(cached.user, user)
+        self.assertEqual(asyncio.run(aload_doctor(user)).user, user)
+        for key in cache._cache:
+            self.assertNotIn(user.password.encode(), cache._cache[key])
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def setUp(self):
+        self.configured = True
+        for target in ('Health.routers.replica_configured', 'Health.middleware.replica_configured'):
+            patcher = mock.patch(target, lambda: self.configured)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def serve(self, request, write=False):
+        """Run a request through the middleware, recording where a read goes"""
+        routed = {}
+
+        def view(request):
+            routed['read'] = self.router.db_for_read(Patient)
+            if write:
+                self.router.db_for_write(Patient)
+                routed['after_write'] = self.router.db_for_read(Patient)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return routed, response
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertIsNone(request_state.get())
+        self.assertEqual(self.router.db_for_read(Patient), PRIMARY)
+
+    def test_get_reads_from_the_replica_until_it_writes(self):
+        routed, response = self.serve(RequestFactory().get('/'), write=True)
+        self.assertEqual(routed, {'read': REPLICA, 'after_write': PRIMARY})
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 10)
+        self.assertIsNone(request_state.get())
+
+    def test_reads_stay_on_the_replica_without_writes(self):
+        routed, response = self.serve(RequestFactory().get('/'))
+        self.assertEqual(routed['read'], REPLICA)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_posts_and_sticky_users_are_pinned(self):
+        self.assertEqual(self.serve(RequestFactory().post('/'))[0]['read'], PRIMARY)
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.serve(request)[0]['read'], PRIMARY)
+
+    def test_sessions_are_always_read_from_the_primary(self):
+        token = request_state.set({'pinned': False, 'wrote': False})
+        try:
+            self.assertEqual(self.router.db_for_read(Session), PRIMARY)
+            self.assertEqual(self.router.db_for_read(Patient), REPLICA)
+        finally:
+            request_state.reset(token)
+
+    def test_no_replica_no_cookie(self):
+        self.configured = False
+        routed, response = self.serve(RequestFactory().get('/'), write=True)
+        self.assertEqual(routed['read'], PRIMARY)
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+
+class PatientSearchTests(TestCase):
+    def setUp(self):
+        doctor = make_doctor()
+        self.john = make_patient(doctor, 'John', last_name='Smith', email='john.smith@gmail.com', phone='+1 555 123 5678')
+        self.jane = make_patient(doctor, 'Jane', last_name='Doe', email='jdoe@yahoo.com', phone='+15559990000')
+        self.johanna = make_patient(doctor, 'Johanna', last_name='Kay', email='kay@mail.com', phone='+15551110000')
+        self.patients = doctor.patients.order_by('-created_at', '-id')
+
+    def search(self, query):
+        return {patient.first_name for patient in search_patients(self.patients, query)}
+
+    def test_word_prefixes(self):
+        self.assertEqual(self.search('joh'), {'John', 'Johanna'})
+        self.assertEqual(self.search('smi jo'), {'John'})
+        self.assertEqual(self.search('gmail'), {'John'})
+        self.assertEqual(self.search('zzz'), set())
+
+    def test_phone_digits_and_email_fragments_match_anywhere(self):
+        self.assertEqual(self.search('5678'), {'John'})
+        self.assertEqual(self.search('123-5678'), {'John'})
+        self.assertEqual(self.search('mail.com'), {'John', 'Johanna'})
+        self.assertEqual(self.search('@yahoo'), {'Jane'})
+
+    def test_index_matches_come_first(self):
+        # "mail" starts a word of Johanna's email but is inside John's
+        self.assertEqual(list(search_patients(self.patients, 'mail.com')), [self.johanna, self.john])
+
+
+class PrescriptionDownloadTests(TestCase):
+    def setUp(self):
+        self.doctor = make_doctor()
+        self.prescription = create_prescription(
+            self.doctor, make_patient(self.doctor), date(2030, 6, 3), 'After meals',
+            [{'name': 'Amoxicillin', 'dosage': '500mg', 'frequency': 'Twice a day', 'duration': '7 days'}])
+        self.url = reverse('prescription_download', args=[self.prescription.id])
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(PRESCRIPTION_PDF_CACHE_DIR=self.directory))
+        self.client.force_login(self.doctor.user)
+
+    def download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_served_from_the_cache_after_the_first_download(self):
+        self.assertTrue(self.download().startswith(b'%PDF'))
+        with mock.patch('Health.pdf.build_prescription_pdf') as build:
+            self.assertTrue(self.download().startswith(b'%PDF'))
+        build.assert_not_called()
+
+    def test_rendered_again_when_the_cached_file_disappears(self):
+        # Simulates the file being replaced or pruned after the cache lookup
+        with mock.patch('Health.pdf.cached_prescription_pdf', return_value=os.path.join(self.directory, 'gone.pdf')):
+            self.assertTrue(self.download().startswith(b'%PDF'))
+
+    def test_export_rejects_invalid_filters_by_name(self):
+        url = reverse('prescriptions_export')
+        for params, name in (({'from_date': '2025-02-30'}, 'from_date'), ({'to_date': 'tomorrow'}, 'to_date'),
+                             ({'patient': 'abc'}, 'patient')):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(f'Invalid {name}', response.json()['message'])
+
+        response = self.client.get(url, {'format': 'pdf', 'patient': self.prescription.patient_id,
+                                         'from_date': '2020-01-01', 'to_date': '2099-12-31'})
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+
+class JobClaimTests(TestCase):
+    def add_job(self, priority=0):
+        return Job.objects.create(name='Health.tasks.noop', priority=priority)
+
+    def test_two_workers_never_claim_the_same_job(self):
+        low, high = self.add_job(), self.add_job(priority=5)
+        with CaptureQueriesContext(connection) as queries:
+            first = claim_job('worker-1')
+        # Picked and locked by the first statement: no read lock to upgrade on SQLite
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertTrue(statements[0].startswith('UPDATE'))
+        second = claim_job('worker-2')
+
+        self.assertEqual((first.id, first.locked_by, first.attempts), (high.id, 'worker-1', 1))
+        self.assertEqual((second.id, second.locked_by), (low.id, 'worker-2'))
+        self.assertIsNone(claim_job('worker-1'))
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {'running'})
+
+
+class DirectConversationTests(TestCase):
+    def test_concurrent_first_messages_share_one_conversation(self):
+        doctor, colleague = User.objects.create_user('doctor'), User.objects.create_user('colleague')
+        existing = get_or_create_direct_conversation(colleague, doctor)
+        get = QuerySet.get
+        missed = []
+
+        def racing_get(queryset, *args, **kwargs):
+            # The other request's conversation was not visible yet when this one looked it up
+            if queryset.model is Conversation and not missed:
+                missed.append(kwargs)
+                raise Conversation.DoesNotExist
+            return get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'get', racing_get):
+            message, = send_message(doctor, 'Hello', recipient=colleague)
+
+        self.assertTrue(missed)
+        self.assertEqual(message.conversation_id, existing.id)
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(existing.memberships.count(), 2)
+        self.assertEqual(direct_conversation(doctor, colleague), existing)
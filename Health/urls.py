@@ -20,6 +20,8 @@ urlpatterns = [
     path('patients/<int:patient_id>/', views.patient_detail, name='patient_detail'),
     path('patients/<int:patient_id>/edit/', views.edit_patient, name='edit_patient'),
     path('patients/<int:patient_id>/delete/', views.delete_patient, name='delete_patient'),
+    path('patients/import/', views.patients_import, name='patients_import'),
+    path('api/patients/import/<str:import_id>/', views.patients_import_status, name='patients_import_status'),
     
     # Appointments
     path('appointments/', views.appointments_list, name='appointments_list'),
@@ -28,9 +30,12 @@ urlpatterns = [
     path('appointments/<int:appointment_id>/cancel/', views.cancel_appointment, name='cancel_appointment'),
     path('appointment/<int:pk>/status/<str:status>/', views.update_appointment_status, name='update_appointment_status'),
     path('appointment/<int:pk>/', views.appointment_detail, name='appointment_detail'),
+    path('api/appointments/check-slots/', views.check_appointment_slots, name='check_appointment_slots'),
+    path('api/availability/', views.availability, name='availability'),
 
     # Calendar
     path('calendar/', views.calendar_view, name='calendar'),
+    path('calendar/feed/', views.calendar_feed, name='calendar_feed'),
     
     # Consultations
     path('consultations/', views.consultations_list, name='consultations_list'),
@@ -41,6 +46,8 @@ urlpatterns = [
     # Prescriptions
     path('prescriptions/', views.prescription_list, name='prescription_list'),
     path('prescriptions/create/', views.create_prescription, name='create_prescription'),
+    path('prescriptions/export/', views.prescriptions_export, name='prescriptions_export'),
+    path('api/prescriptions/batch/', views.create_prescriptions_batch_view, name='create_prescriptions_batch'),
     path('prescriptions/<int:prescription_id>/view/', views.prescription_view, name='prescription_view'),
     path('prescriptions/<int:prescription_id>/delete/', views.prescription_delete, name='prescription_delete'),
 path('prescriptions/<int:prescription_id>/download/', views.prescription_download, name='prescription_download'),
@@ -55,6 +62,8 @@ path('prescriptions/<int:prescription_id>/download/', views.prescription_downloa
     path('settings/update-preferences/', views.update_preferences, name='update_preferences'),
     path('settings/delete-account/', views.delete_account, name='delete_account'),
       # Notification URLs
+    path('api/events/', views.event_stream, name='event_stream'),
+    path('api/inbox/summary/', views.inbox_summary_view, name='inbox_summary'),
     path('api/notifications/', views.get_notifications, name='get_notifications'),
     path('api/notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('api/notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
@@ -63,6 +72,10 @@ path('prescriptions/<int:prescription_id>/download/', views.prescription_downloa
     # Message URLs
     path('api/messages/', views.get_messages, name='get_messages'),
     path('api/messages/<int:message_id>/read/', views.mark_message_read, name='mark_message_read'),
+    path('api/messages/send/', views.send_message_view, name='send_message'),
+    path('api/conversations/', views.conversations_list, name='conversations_list'),
+    path('api/conversations/<int:conversation_id>/', views.conversation_messages, name='conversation_messages'),
+    path('api/conversations/<int:conversation_id>/read/', views.conversation_mark_read, name='conversation_mark_read'),
     
     # Full page views
     path('notifications/', views.notifications_page, name='notifications_page'),
@@ -18,22 +18,66 @@ AppointmentForm, ConsultationForm)
 from .models import Prescription, Patient
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse, Http404
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
 from django.utils import timezone
 import json
-from .models import Doctor, Patient, Prescription, Medicine
+import os
+import uuid
+from django.urls import reverse
+from .models import Doctor, Patient, Prescription, Medicine, Notification, Message, Conversation
 
 # PDF Generation imports
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from io import BytesIO
+from .pdf import prescription_fingerprint, open_prescription_pdf
+from .export import stream_zip, merged_pdf, file_chunks, async_chunks
+from .tasks import send_notification, render_prescription_pdf, delete_user_account, import_patients_file
+from .events import broker, format_event
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.http import http_date
+from .conversations import send_message, thread_list, serialize_thread, mark_thread_read
+from .inbox import (inbox_summary, get_counter, aget_counter, read_notification, read_message,
+mark_all_notifications_read as mark_notifications_read)
+from datetime import date
+from django.utils.cache import get_conditional_response
+from .scheduling import (month_appointments, appointments_in_range, group_by_day,
+appointments_etag, serialize_appointment, check_slots, appointment_list_queryset, filter_appointments,
+appointment_list_partitions, APPOINTMENT_LIST_ORDERING, APPOINTMENT_PARTITION_ORDERING)
+from .availability import find_free_slots
+from .stats import get_dashboard_stats, dashboard_lists
+from .cache import (doctor_cache_version, adoctor_cache_version, acached_for_doctor,
+acached_fragment, FRAGMENT_TIMEOUT)
+from .decorators import doctor_required, async_login_required
+from .search import search_patients
+from .images import store_profile_picture
+from .patient_import import import_format, import_dir, set_import_progress, get_import_progress
+from .pagination import (paginate, apaginate, cursor_query_string, is_cursor_mode, CursorPaginator,
+PartitionedCursorPaginator)
+from .prescriptions import create_prescription as create_prescription_with_medicines, create_prescriptions_batch
+
+# Widest range (in days) served by the calendar feed
+CALENDAR_FEED_MAX_DAYS = 62
+# Most slots accepted by one bulk availability check
+MAX_SLOTS_PER_CHECK = 200
+# Widest range (in days) searched by the free-slot finder
+AVAILABILITY_MAX_DAYS = 366
+# Most prescriptions accepted by one batch request
+MAX_PRESCRIPTIONS_PER_BATCH = 500
+# Most prescriptions rendered by one bulk export
+MAX_PRESCRIPTIONS_PER_EXPORT = 1000
+# Most prescriptions in one merged PDF (assembled in memory)
+MAX_PRESCRIPTIONS_PER_MERGED_PDF = 200
+# Event stream timings (seconds, except the reconnect delay)
+EVENTS_HEARTBEAT_INTERVAL = 20
+EVENTS_RESYNC_INTERVAL = 120
+EVENTS_STREAM_MAX_AGE = 300
+EVENTS_RETRY_MS = 3000
+# Conversation API page sizes
+CONVERSATIONS_PER_PAGE = 20
+CONVERSATION_MESSAGES_PER_PAGE = 50
 
 # Authentication Views
 def login_view(request):
@@ -123,38 +167,27 @@ def landing_page(request):
 
 # Dashboard View
 @login_required(login_url='login')
+@doctor_required
 def dashboard(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
-    
-    # Get statistics
-    total_patients = doctor.patients.count()
-    total_appointments = doctor.appointments.count()
-    total_consultations = doctor.consultations.count()
-    pending_follow_ups = doctor.patients.filter(status='pending').count()
+    doctor = request.doctor
     
-    # Get today's appointments
-    today = datetime.now().date()
-    todays_appointments = doctor.appointments.filter(
-        scheduled_date=today,
-        status='scheduled'
-    ).select_related('patient')[:4]
-    
-    # Get recent patients
-    recent_patients = doctor.patients.all()[:5]
+    # Get statistics (cached per doctor, reset on patient/appointment/consultation writes)
+    stats = get_dashboard_stats(doctor)
     
-    # Get appointment stats
-    appointments_today = doctor.appointments.filter(
-        scheduled_date=today
-    ).count()
+    # Get today's appointments and recent patients
+    today = stats['date']
+    todays_appointments, recent_patients = dashboard_lists(doctor, today)
     
+    # Both lists are lazy: they are not queried while their template fragment is cached
     context = {
-        'total_patients': total_patients,
-        'appointments_today': appointments_today,
-        'total_consultations': total_consultations,
-        'pending_follow_ups': pending_follow_ups,
+        'cache_version': doctor_cache_version(doctor.id),
+        'fragment_timeout': FRAGMENT_TIMEOUT,
+        'today': today,
+        'total_patients': stats['total_patients'],
+        'total_appointments': stats['total_appointments'],
+        'appointments_today': stats['appointments_today'],
+        'total_consultations': stats['total_consultations'],
+        'pending_follow_ups': stats['pending_follow_ups'],
         'todays_appointments': todays_appointments,
         'recent_patients': recent_patients,
         'doctor': doctor,
@@ -164,53 +197,58 @@ def dashboard(request):
 
 
 # Patient Views
-@login_required(login_url='login')
-def patients_list(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
-    
-    patients = doctor.patients.all()
-    
-    # Search functionality
+@async_login_required(login_url='login')
+@doctor_required
+async def patients_list(request):
+    doctor = request.doctor
     search_query = request.GET.get('search', '')
-    if search_query:
-        patients = patients.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(phone__icontains=search_query)
-        )
-    
-    # Filter by status
     status_filter = request.GET.get('status', '')
-    if status_filter:
-        patients = patients.filter(status=status_filter)
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(patients, 8)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+
+    # The patient table is cached per doctor version and query string
+    cache_version = await adoctor_cache_version(doctor.id)
+    fragment_query = request.GET.urlencode()
+    patients_table = await acached_fragment('patients_table', doctor.id, cache_version, fragment_query)
+
     context = {
-        'page_obj': page_obj,
-        'patients': page_obj.object_list,
         'doctor': doctor,
         'search_query': search_query,
         'status_filter': status_filter,
+        'cache_version': cache_version,
+        'fragment_query': fragment_query,
+        'fragment_timeout': FRAGMENT_TIMEOUT,
+        'patients_table': patients_table,
     }
+
+    if patients_table is None:
+        patients = doctor.patients.all().order_by('-created_at', '-id')
+
+        # Search functionality (full-text index, ranked by relevance)
+        if search_query:
+            # Checks that the index exists (a query)
+            patients = await sync_to_async(search_patients)(patients, search_query)
+
+        # Filter by status
+        if status_filter:
+            patients = patients.filter(status=status_filter)
+
+        # Pagination (ranked search results are paged by offset)
+        page_obj, cursor_mode = await apaginate(
+            request, patients, 8, ['-created_at', '-id'], allow_cursor=not search_query
+        )
+        context.update({
+            'page_obj': page_obj,
+            'patients': page_obj.object_list,
+            'cursor_mode': cursor_mode,
+            'cursor_query': cursor_query_string(request),
+        })
     
     return render(request, 'Patients/patients.html', context)
 
 
 @login_required(login_url='login')
+@doctor_required
 def add_patient(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     if request.method == 'POST':
         form = PatientForm(request.POST)
@@ -233,11 +271,12 @@ def add_patient(request):
 
 
 @login_required(login_url='login')
+@doctor_required
 def edit_patient(request, patient_id):
     patient = get_object_or_404(Patient, id=patient_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if patient.doctor != doctor:
+    if patient.doctor_id != doctor.id:
         return redirect('patients_list')
     
     if request.method == 'POST':
@@ -260,11 +299,12 @@ def edit_patient(request, patient_id):
 
 
 @login_required(login_url='login')
+@doctor_required
 def patient_detail(request, patient_id):
     patient = get_object_or_404(Patient, id=patient_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if patient.doctor != doctor:
+    if patient.doctor_id != doctor.id:
         return redirect('patients_list')
     
     appointments = patient.appointments.all().order_by('-scheduled_date')
@@ -281,11 +321,12 @@ def patient_detail(request, patient_id):
 
 
 @login_required(login_url='login')
+@doctor_required
 def delete_patient(request, patient_id):
     patient = get_object_or_404(Patient, id=patient_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if patient.doctor != doctor:
+    if patient.doctor_id != doctor.id:
         return redirect('patients_list')
     
     if request.method == 'POST':
@@ -301,72 +342,77 @@ def delete_patient(request, patient_id):
     return render(request, 'delete_patient.html', context)
 
 
-# Appointment Views
 @login_required(login_url='login')
-def appointments_list(request):
+@require_http_methods(["POST"])
+@doctor_required(api=True)
+def patients_import(request):
+    """
+    Upload a CSV/XLSX patient file and queue its import (see patient_import.py).
+    Poll the returned status_url for the progress.
+    """
+    doctor = request.doctor
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'message': 'No file uploaded'}, status=400)
     try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+        file_format = import_format(upload.name)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'message': e.message}, status=400)
+
+    # Upload temp files go away with the request; the worker reads this copy
+    import_id = uuid.uuid4().hex
+    os.makedirs(import_dir(), exist_ok=True)
+    path = os.path.join(import_dir(), f'{import_id}.{file_format}')
+    with open(path, 'wb') as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+
+    set_import_progress(import_id, doctor.id, 'queued')
+    import_patients_file.delay(import_id, doctor.id, path, file_format)
+    return JsonResponse({
+        'success': True,
+        'import_id': import_id,
+        'status_url': reverse('patients_import_status', args=[import_id]),
+    })
+
+
+@login_required(login_url='login')
+@doctor_required(api=True)
+def patients_import_status(request, import_id):
+    """Progress of a patient import: status, processed/created/failed counts and row errors"""
+    state = get_import_progress(import_id)
+    if state is None or state['doctor_id'] != request.doctor.id:
+        return JsonResponse({'success': False, 'message': 'Import not found'}, status=404)
+    state = {key: value for key, value in state.items() if key != 'doctor_id'}
+    return JsonResponse({'success': True, **state})
+
+
+# Appointment Views
+@async_login_required(login_url='login')
+@doctor_required
+async def appointments_list(request):
+    doctor = request.doctor
         
     today = now().date()
 
-    appointments = doctor.appointments.all().select_related('patient').annotate(
-        # 1️⃣ Status priority
-        status_priority=Case(
-            When(status='scheduled', then=Value(0)),
-            When(status='completed', then=Value(1)),
-            When(status='cancelled', then=Value(2)),
-            default=Value(3),
-            output_field=IntegerField(),
-        ),
-        # 2️⃣ Past vs future
-        is_past=Case(
-            When(scheduled_date__lt=today, then=Value(1)),
-            default=Value(0),
-            output_field=IntegerField(),
-        )
-    ).order_by(
-        'status_priority',   # scheduled → completed → cancelled
-        'is_past',           # future first
-        'scheduled_date',    # closest date
-        'scheduled_time'     # closest time
-    )
-    
-    # Filter by status
+    # Status, date range and patient name filters
     status_filter = request.GET.get('status', '')
-    if status_filter:
-        appointments = appointments.filter(status=status_filter)
-    
-    # Filter by date range
     date_filter = request.GET.get('date', '')
-    today = datetime.now().date()
-    
-    if date_filter == 'today':
-        appointments = appointments.filter(scheduled_date=today)
-    elif date_filter == 'tomorrow':
-        tomorrow = today + timedelta(days=1)
-        appointments = appointments.filter(scheduled_date=tomorrow)
-    elif date_filter == 'week':
-        week_end = today + timedelta(days=7)
-        appointments = appointments.filter(scheduled_date__range=[today, week_end])
-    elif date_filter == 'month':
-        month_end = today + timedelta(days=30)
-        appointments = appointments.filter(scheduled_date__range=[today, month_end])
-    
-    # Search
     search_query = request.GET.get('search', '')
-    if search_query:
-        appointments = appointments.filter(
-            Q(patient__first_name__icontains=search_query) |
-            Q(patient__last_name__icontains=search_query)
-        )
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(appointments, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+
+    # Scheduled, completed, cancelled, no-show; upcoming before past; then by date and time
+    if is_cursor_mode(request):
+        # One part of the list after the other, each read in index order
+        appointments = Appointment.objects.filter(doctor=doctor).select_related('patient')
+        appointments = filter_appointments(appointments, request.GET, datetime.now().date())
+        paginator = PartitionedCursorPaginator(appointment_list_partitions(appointments, today), 10,
+                                               APPOINTMENT_PARTITION_ORDERING)
+        page_obj, cursor_mode = await paginator.aget_page(request.GET.get('cursor')), True
+    else:
+        appointments = appointment_list_queryset(doctor, today)
+        appointments = filter_appointments(appointments, request.GET, datetime.now().date())
+        page_obj, cursor_mode = await apaginate(request, appointments, 10, APPOINTMENT_LIST_ORDERING,
+                                                allow_cursor=False)
     
     context = {
         'page_obj': page_obj,
@@ -375,6 +421,8 @@ def appointments_list(request):
         'status_filter': status_filter,
         'date_filter': date_filter,
         'search_query': search_query,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
     }
     
     return render(request, 'Appointments/appointments.html', context)
@@ -394,11 +442,9 @@ def update_appointment_status(request, pk, status):
 
 
 @login_required(login_url='login')
+@doctor_required
 def add_appointment(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     if request.method == 'POST':
         form = AppointmentForm(request.POST)
@@ -408,7 +454,7 @@ def add_appointment(request):
                 appointment.doctor = doctor  # Set doctor first
                 
                 # Check if patient belongs to this doctor
-                if appointment.patient.doctor != doctor:
+                if appointment.patient.doctor_id != doctor.id:
                     messages.error(request, 'You can only schedule appointments for your own patients.')
                     form.fields['patient'].queryset = doctor.patients.all()
                     return render(request, 'Appointments/add_appointment.html', {'form': form, 'doctor': doctor})
@@ -451,11 +497,12 @@ def appointment_detail(request, pk):
     return render(request, 'Appointments/appointment_detail.html', {'appointment': appointment})
 
 @login_required(login_url='login')
+@doctor_required
 def edit_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if appointment.doctor != doctor:
+    if appointment.doctor_id != doctor.id:
         messages.error(request, 'You can only edit your own appointments.')
         return redirect('appointments_list')
     
@@ -466,7 +513,7 @@ def edit_appointment(request, appointment_id):
                 updated_appointment = form.save(commit=False)
                 updated_appointment.doctor = doctor
                 
-                if updated_appointment.patient.doctor != doctor:
+                if updated_appointment.patient.doctor_id != doctor.id:
                     messages.error(request, 'You can only schedule appointments for your own patients.')
                     form.fields['patient'].queryset = doctor.patients.all()
                     return render(request, 'Appointments/add_appointment.html', {'form': form, 'appointment': appointment, 'doctor': doctor})
@@ -504,12 +551,13 @@ def edit_appointment(request, appointment_id):
     
     return render(request, 'Appointments/add_appointment.html', context)
 
-# @login_required(login_url='login')
+@login_required(login_url='login')
+@doctor_required
 def cancel_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if appointment.doctor != doctor:
+    if appointment.doctor_id != doctor.id:
         messages.error(request, 'You can only cancel your own appointments.')
         return redirect('appointments_list')
     
@@ -522,45 +570,139 @@ def cancel_appointment(request, appointment_id):
     
     return redirect('appointments_list')
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+@doctor_required(api=True)
+def check_appointment_slots(request):
+    """
+    API endpoint checking many proposed slots against the doctor's schedule
+    in a single query.
+    Expects JSON: {"slots": [{"date": "YYYY-MM-DD", "time": "HH:MM", "duration": 30}, ...]}
+    """
+    doctor = request.doctor
+    
+    try:
+        payload = json.loads(request.body or '{}')
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+    if not isinstance(payload, dict) or not isinstance(payload.get('slots', []), list):
+        return JsonResponse({'success': False, 'message': 'Expected {"slots": [...]}'}, status=400)
+
+    try:
+        slots = []
+        for slot in payload.get('slots', []):
+            if not isinstance(slot, dict):
+                raise ValueError('each slot must be an object')
+            duration = int(slot.get('duration', 30))
+            if duration <= 0:
+                raise ValueError('duration must be a positive number of minutes')
+            slots.append((
+                date.fromisoformat(slot['date']),
+                datetime.strptime(slot['time'], '%H:%M').time(),
+                duration,
+            ))
+    except (ValueError, KeyError, TypeError) as e:
+        return JsonResponse({'success': False, 'message': f'Invalid slots: {str(e)}'}, status=400)
+    
+    if len(slots) > MAX_SLOTS_PER_CHECK:
+        return JsonResponse({
+            'success': False,
+            'message': f'At most {MAX_SLOTS_PER_CHECK} slots can be checked at once'
+        }, status=400)
+    
+    results = check_slots(doctor, slots)
+    
+    return JsonResponse({
+        'success': True,
+        'slots': [
+            {
+                'date': slot[0].isoformat(),
+                'time': slot[1].strftime('%H:%M'),
+                'duration': slot[2],
+                'available': result['available'],
+                'conflict_id': result['conflict_id'],
+            }
+            for slot, result in zip(slots, results)
+        ]
+    })
+
+@login_required(login_url='login')
+@doctor_required(api=True)
+def availability(request):
+    """
+    API endpoint returning the first free slots of the doctor.
+    Query params: start, end (YYYY-MM-DD, default: today + 7 days),
+    duration (minutes, default 30), limit (default 10), step (minutes),
+    exclude (appointment id being edited)
+    """
+    doctor = request.doctor
+    
+    today = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else today
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else start + timedelta(days=7)
+        duration = int(request.GET.get('duration', 30))
+        limit = int(request.GET.get('limit', 10))
+        step = int(request.GET['step']) if request.GET.get('step') else None
+        exclude_id = int(request.GET['exclude']) if request.GET.get('exclude') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid parameters'}, status=400)
+    
+    if end < start or (end - start).days > AVAILABILITY_MAX_DAYS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Invalid range (at most {AVAILABILITY_MAX_DAYS} days)'
+        }, status=400)
+    if not 0 < duration <= 24 * 60 or not 0 < limit <= 100 or (step is not None and step <= 0):
+        return JsonResponse({'success': False, 'message': 'Invalid parameters'}, status=400)
+    
+    slots = find_free_slots(doctor, max(start, today), end, duration, limit=limit, step=step, exclude_id=exclude_id)
+    
+    return JsonResponse({
+        'success': True,
+        'duration': duration,
+        'slots': [
+            {
+                'date': day.isoformat(),
+                'start': start_time.strftime('%H:%M'),
+                'end': end_time.strftime('%H:%M'),
+            }
+            for day, start_time, end_time in slots
+        ]
+    })
+
 # Calendar View
 @login_required(login_url='login')
+@doctor_required
 def calendar_view(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     year = request.GET.get('year', datetime.now().year)
     month = request.GET.get('month', datetime.now().month)
     
     from calendar import monthcalendar, month_name
-    from datetime import date
     
     year = int(year)
     month = int(month)
     
     cal = monthcalendar(year, month)
     
+    # Load the whole visible grid with one range query, grouped by date
+    appointments_by_date, grid_start, grid_end = month_appointments(doctor, year, month)
+    
     # Create a dictionary for easier access
-    appointments_dict = {}
-    for day in range(1, 32):
-        try:
-            date_obj = date(year, month, day)
-            appointments = doctor.appointments.filter(
-                scheduled_date=date_obj,
-                status__in=['scheduled', 'completed']  # Only show scheduled and completed
-            ).select_related('patient').order_by('scheduled_time')
-            if appointments.exists():
-                appointments_dict[day] = list(appointments)
-        except ValueError:
-            break
+    appointments_dict = {
+        day.day: appts
+        for day, appts in appointments_by_date.items()
+        if day.year == year and day.month == month
+    }
     
-    # Get today's appointments
+    # Get today's appointments (already loaded when today is on the grid)
     today = datetime.now().date()
-    today_appointments = doctor.appointments.filter(
-        scheduled_date=today,
-        status__in=['scheduled', 'completed']
-    ).select_related('patient').order_by('scheduled_time')
+    if grid_start <= today <= grid_end:
+        today_appointments = appointments_by_date.get(today, [])
+    else:
+        today_appointments = appointments_in_range(doctor, today, today)
     
     context = {
         'doctor': doctor,
@@ -569,21 +711,65 @@ def calendar_view(request):
         'month_name': month_name[month],
         'calendar': cal,
         'appointments_dict': appointments_dict,
+        'grid_start': grid_start,
+        'grid_end': grid_end,
         'today': today,
-        'today_appointments': list(today_appointments),
+        'today_appointments': today_appointments,
     }
     
     return render(request, 'Appointments/calendar.html', context)
 
-# Consultation Views
+
 @login_required(login_url='login')
-def consultations_list(request):
+@doctor_required(api=True)
+def calendar_feed(request):
+    """
+    API endpoint returning the doctor's appointments between ?start= and ?end=
+    (ISO dates, inclusive) as JSON, with ETag support
+    """
+    doctor = request.doctor
+    
     try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'start and end must be dates (YYYY-MM-DD)'}, status=400)
+    
+    if end < start or (end - start).days > CALENDAR_FEED_MAX_DAYS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Invalid range (at most {CALENDAR_FEED_MAX_DAYS} days)'
+        }, status=400)
+    
+    appointments = appointments_in_range(doctor, start, end)
+    etag = appointments_etag(appointments)
+    
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    days = {}
+    for day, appts in group_by_day(appointments).items():
+        days[day.isoformat()] = [serialize_appointment(appointment) for appointment in appts]
+    
+    response = JsonResponse({
+        'success': True,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'count': len(appointments),
+        'days': days,
+    })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Consultation Views
+@async_login_required(login_url='login')
+@doctor_required
+async def consultations_list(request):
+    doctor = request.doctor
     
-    consultations = doctor.consultations.all().select_related('patient', 'appointment')
+    consultations = doctor.consultations.all().select_related('patient', 'appointment').order_by('-created_at', '-id')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -599,10 +785,7 @@ def consultations_list(request):
         )
     
     # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(consultations, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, cursor_mode = await apaginate(request, consultations, 10, ['-created_at', '-id'])
     
     context = {
         'page_obj': page_obj,
@@ -610,17 +793,17 @@ def consultations_list(request):
         'doctor': doctor,
         'status_filter': status_filter,
         'search_query': search_query,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
     }
     
     return render(request, 'Consultations/consultations.html', context)
 
 
 @login_required(login_url='login')
+@doctor_required
 def add_consultation(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     if request.method == 'POST':
         form = ConsultationForm(request.POST)
@@ -648,11 +831,12 @@ def add_consultation(request):
 
 
 @login_required(login_url='login')
+@doctor_required
 def edit_consultation(request, consultation_id):
     consultation = get_object_or_404(Consultation, id=consultation_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if consultation.doctor != doctor:
+    if consultation.doctor_id != doctor.id:
         return redirect('consultations_list')
     
     if request.method == 'POST':
@@ -675,13 +859,14 @@ def edit_consultation(request, consultation_id):
 
 
 @login_required(login_url='login')
+@doctor_required
 def consultation_detail(request, consultation_id):
     
     
     consultation = get_object_or_404(Consultation, id=consultation_id)
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     
-    if consultation.doctor != doctor:
+    if consultation.doctor_id != doctor.id:
         return redirect('consultations_list')
     
     context = {
@@ -697,11 +882,9 @@ def consultation_detail(request, consultation_id):
 # ============================================================
 
 @login_required(login_url='login')
+@doctor_required
 def create_prescription(request):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
 
     patients = doctor.patients.all()
 
@@ -714,24 +897,12 @@ def create_prescription(request):
         try:
             patient = Patient.objects.get(id=patient_id, doctor=doctor)
             
-            # Create prescription
-            prescription = Prescription.objects.create(
-                doctor=doctor,
-                patient=patient,
-                prescription_date=prescription_date,
-                notes=instructions
+            # Create prescription and medicines in one transaction
+            prescription = create_prescription_with_medicines(
+                doctor, patient, prescription_date, instructions, json.loads(medicines_data)
             )
-
-            # Parse and create medicines
-            medicines = json.loads(medicines_data)
-            for med in medicines:
-                Medicine.objects.create(
-                    prescription=prescription,
-                    name=med.get('name'),
-                    dosage=med.get('dosage'),
-                    frequency=med.get('frequency'),
-                    duration=med.get('duration')
-                )
+            # Warm the PDF cache so the first download is instant
+            render_prescription_pdf.delay(prescription.id)
 
             return JsonResponse({
                 'success': True,
@@ -744,6 +915,11 @@ def create_prescription(request):
                 'success': False,
                 'message': 'Patient not found'
             }, status=404)
+        except ValidationError as e:
+            return JsonResponse({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -758,20 +934,63 @@ def create_prescription(request):
 
 
 @login_required(login_url='login')
-def prescription_list(request):
+@require_http_methods(["POST"])
+@doctor_required(api=True)
+def create_prescriptions_batch_view(request):
+    """
+    API endpoint creating many prescriptions at once (e.g. renewing chronic
+    medications for a list of patients).
+    Expects JSON: {"prescriptions": [{"patient": 1, "prescription_date": "YYYY-MM-DD",
+    "instructions": "...", "medicines": [{"name": ..., "dosage": ..., "frequency": ..., "duration": ...}]}]}
+    """
+    doctor = request.doctor
+    
+    try:
+        entries = json.loads(request.body or '{}').get('prescriptions', [])
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Invalid JSON payload'}, status=400)
+    
+    if not entries:
+        return JsonResponse({'success': False, 'message': 'No prescriptions given'}, status=400)
+    if len(entries) > MAX_PRESCRIPTIONS_PER_BATCH:
+        return JsonResponse({
+            'success': False,
+            'message': f'At most {MAX_PRESCRIPTIONS_PER_BATCH} prescriptions per batch'
+        }, status=400)
+    
+    try:
+        prescriptions = create_prescriptions_batch(doctor, entries)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+    except (ValueError, TypeError, AttributeError) as e:
+        return JsonResponse({'success': False, 'message': f'Invalid payload: {str(e)}'}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(prescriptions)} prescription(s) created successfully!',
+        'prescription_ids': [prescription.id for prescription in prescriptions]
+    })
+
+
+def _date_param(params, name):
+    """Parse a YYYY-MM-DD query parameter into an aware midnight; ValueError names it"""
     try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+        return timezone.make_aware(datetime.strptime(params[name], '%Y-%m-%d'))
+    except ValueError:
+        raise ValueError(f'Invalid {name}: expected a date as YYYY-MM-DD')
 
-    # Get all prescriptions for this doctor
-    prescriptions = doctor.prescriptions.select_related('patient').prefetch_related('medicines').order_by('-created_at')
 
-    # Get filter parameters
-    search_query = request.GET.get('search', '').strip()
-    patient_filter = request.GET.get('patient', '')
-    from_date = request.GET.get('from_date', '')
-    to_date = request.GET.get('to_date', '')
+def filter_prescriptions(prescriptions, params):
+    """
+    Apply the prescription list filters (search, patient, from_date, to_date);
+    raises ValueError naming the invalid parameter
+    """
+    search_query = params.get('search', '').strip()
+    patient_filter = params.get('patient', '')
+    from_date = params.get('from_date', '')
+    to_date = params.get('to_date', '')
 
     # Apply search filter
     if search_query:
@@ -783,91 +1002,124 @@ def prescription_list(request):
 
     # Apply patient filter
     if patient_filter:
+        if not patient_filter.isdigit():
+            raise ValueError('Invalid patient: expected a patient id')
         prescriptions = prescriptions.filter(patient_id=patient_filter)
 
     # Apply date range filters
     if from_date:
-        prescriptions = prescriptions.filter(created_at__gte=from_date)
+        prescriptions = prescriptions.filter(created_at__gte=_date_param(params, 'from_date'))
     
     if to_date:
         # Add one day to include the entire end date
-        to_date_obj = datetime.strptime(to_date, '%Y-%m-%d')
-        to_date_obj = to_date_obj + timedelta(days=1)
-        prescriptions = prescriptions.filter(created_at__lt=to_date_obj)
+        prescriptions = prescriptions.filter(created_at__lt=_date_param(params, 'to_date') + timedelta(days=1))
+
+    return prescriptions
+
+
+@async_login_required(login_url='login')
+@doctor_required
+async def prescription_list(request):
+    doctor = request.doctor
 
-    # Calculate statistics
-    total_prescriptions = doctor.prescriptions.count()
-    
     today = timezone.now().date()
-    today_prescriptions = doctor.prescriptions.filter(
-        created_at__date=today
-    ).count()
-    
-    week_start = today - timedelta(days=today.weekday())
-    week_prescriptions = doctor.prescriptions.filter(
-        created_at__date__gte=week_start
-    ).count()
-    
-    unique_patients = doctor.prescriptions.values('patient').distinct().count()
 
-    # Get all patients for filter dropdown
-    all_patients = doctor.patients.all().order_by('first_name', 'last_name')
+    async def compute_stats():
+        week_start = today - timedelta(days=today.weekday())
+        return {
+            'total_prescriptions': await doctor.prescriptions.acount(),
+            'today_prescriptions': await doctor.prescriptions.filter(created_at__date=today).acount(),
+            'week_prescriptions': await doctor.prescriptions.filter(created_at__date__gte=week_start).acount(),
+            'unique_patients': await doctor.prescriptions.values('patient').distinct().acount(),
+        }
 
-    # Pagination
-    paginator = Paginator(prescriptions, 10)  # 10 prescriptions per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Calculate statistics (cached per doctor version and day)
+    stats = await acached_for_doctor(doctor.id, 'prescription_stats', compute_stats, today)
+
+    # The patient dropdown and the list are cached per doctor version and filters
+    cache_version = await adoctor_cache_version(doctor.id)
+    fragment_query = request.GET.urlencode()
+    selected_patient = request.GET.get('patient', '')
+    patient_options = await acached_fragment('prescription_patient_options', doctor.id, cache_version, selected_patient)
+    prescriptions_table = await acached_fragment('prescriptions_table', doctor.id, cache_version, fragment_query)
+
+    # Export links keep the current filters
+    export_params = request.GET.copy()
+    for param in ('page', 'cursor', 'pagination', 'format'):
+        export_params.pop(param, None)
 
     context = {
-        'prescriptions': page_obj,
-        'all_patients': all_patients,
-        'total_prescriptions': total_prescriptions,
-        'today_prescriptions': today_prescriptions,
-        'week_prescriptions': week_prescriptions,
-        'unique_patients': unique_patients,
+        'export_query': export_params.urlencode(),
         'doctor': doctor,
+        'cache_version': cache_version,
+        'fragment_query': fragment_query,
+        'fragment_timeout': FRAGMENT_TIMEOUT,
+        'selected_patient': selected_patient,
+        'patient_options': patient_options,
+        'prescriptions_table': prescriptions_table,
+        **stats,
     }
 
+    if patient_options is None:
+        # Get all patients for filter dropdown
+        context['all_patients'] = [
+            patient async for patient in doctor.patients.all().order_by('first_name', 'last_name')
+        ]
+
+    if prescriptions_table is None:
+        # Get all prescriptions for this doctor
+        prescriptions = (doctor.prescriptions.select_related('patient', 'doctor__user')
+                         .prefetch_related('medicines').order_by('-created_at', '-id'))
+
+        # Apply search, patient and date range filters
+        prescriptions = filter_prescriptions(prescriptions, request.GET)
+
+        # Pagination
+        page_obj, cursor_mode = await apaginate(request, prescriptions, 10, ['-created_at', '-id'])  # 10 prescriptions per page
+        context.update({
+            'prescriptions': page_obj,
+            'cursor_mode': cursor_mode,
+            'cursor_query': cursor_query_string(request),
+        })
+
     return render(request, 'Prescriptions/prescription_list.html', context)
 
 
 @login_required(login_url='login')
+@doctor_required
 def patient_prescriptions(request, patient_id):
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
         
     patient = get_object_or_404(Patient, id=patient_id, doctor=doctor)
-    prescriptions = patient.prescriptions.prefetch_related('medicines').order_by('-created_at')
+    prescriptions = patient.prescriptions.prefetch_related('medicines').order_by('-created_at', '-id')
 
     # Pagination
-    paginator = Paginator(prescriptions, 10)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    page_obj, cursor_mode = paginate(request, prescriptions, 10, ['-created_at', '-id'])
 
     context = {
         'patient': patient,
         'prescriptions': page_obj,
         'doctor': doctor,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
     }
 
     return render(request, 'Prescriptions/patient_prescriptions.html', context)
 
 
-@login_required(login_url='login')
-def prescription_view(request, prescription_id):
+@async_login_required(login_url='login')
+@doctor_required(api=True)
+async def prescription_view(request, prescription_id):
     """AJAX endpoint to get prescription details as JSON"""
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return JsonResponse({'error': 'Doctor not found'}, status=404)
+    doctor = request.doctor
 
-    prescription = get_object_or_404(
-        Prescription.objects.select_related('patient', 'doctor').prefetch_related('medicines'),
-        id=prescription_id,
-        doctor=doctor
-    )
+    try:
+        prescription = await (
+            Prescription.objects.select_related('patient', 'doctor__user').prefetch_related('medicines')
+            .aget(id=prescription_id, doctor=doctor)
+        )
+    except Prescription.DoesNotExist:
+        raise Http404('No Prescription matches the given query.')
 
     medicines_data = [
         {
@@ -893,15 +1145,13 @@ def prescription_view(request, prescription_id):
 
 
 @login_required(login_url='login')
+@doctor_required(api=True)
 def prescription_delete(request, prescription_id):
     """AJAX endpoint to delete a prescription"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
 
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Doctor not found'}, status=404)
+    doctor = request.doctor
 
     prescription = get_object_or_404(Prescription, id=prescription_id, doctor=doctor)
     
@@ -923,223 +1173,96 @@ def prescription_download(request, prescription_id):
     """
     Generate and download prescription as PDF using ReportLab
     """
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
+    doctor = request.doctor
+    if not doctor:
         return HttpResponse('Unauthorized', status=401)
     
     # Get prescription or return 404
     prescription = get_object_or_404(
-        Prescription.objects.select_related('patient', 'doctor').prefetch_related('medicines'),
+        Prescription.objects.select_related('patient', 'doctor__user').prefetch_related('medicines'),
         id=prescription_id,
         doctor=doctor
     )
     
-    # Create PDF in memory
-    buffer = BytesIO()
-    
-    # Create the PDF object using ReportLab
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Container for PDF elements
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1abc9c'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=6
-    )
-    
-    # Add clinic/hospital header
-    clinic_name = Paragraph("<b>MedCare Clinic</b>", title_style)
-    elements.append(clinic_name)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Add prescription title
-    prescription_title = Paragraph("MEDICAL PRESCRIPTION", heading_style)
-    elements.append(prescription_title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Patient and Doctor Information
-    info_data = [
-        ['Prescription ID:', f'#{prescription.id}', 'Date:', prescription.created_at.strftime('%B %d, %Y')],
-        ['Patient Name:', f'{prescription.patient.first_name} {prescription.patient.last_name}', 
-         'Patient ID:', f'#{prescription.patient.id}'],
-        ['Email:', prescription.patient.email, 'Phone:', getattr(prescription.patient, 'phone', 'N/A')],
-        ['Doctor:', f'Dr. {prescription.doctor.user.first_name} {prescription.doctor.user.last_name}', 
-         'Specialty:', getattr(prescription.doctor, 'specialty', 'General Medicine')],
-    ]
-    
-    info_table = Table(info_data, colWidths=[1.5*inch, 2.5*inch, 1.5*inch, 2*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
-        ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#ecf0f1')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7'))
-    ]))
-    
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.4*inch))
-    
-    # Medicines Section
-    medicines_header = Paragraph("PRESCRIBED MEDICATIONS", heading_style)
-    elements.append(medicines_header)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # Get prescription medicines
-    medicines = prescription.medicines.all()
-    
-    # Create medicines table
-    medicine_data = [['#', 'Medicine Name', 'Dosage', 'Frequency', 'Duration']]
-    
-    for idx, med in enumerate(medicines, 1):
-        medicine_data.append([
-            str(idx),
-            med.name,
-            med.dosage,
-            med.frequency,
-            med.duration
-        ])
-    
-    medicine_table = Table(medicine_data, colWidths=[0.5*inch, 2.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-    medicine_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1abc9c')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        
-        # Data rows
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-        ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 10),
-        ('TOPPADDING', (0, 1), (-1, -1), 10),
-        
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
-        
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
-    ]))
-    
-    elements.append(medicine_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Instructions/Notes
-    if prescription.notes:
-        notes_header = Paragraph("INSTRUCTIONS & NOTES", heading_style)
-        elements.append(notes_header)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        notes_text = Paragraph(prescription.notes, normal_style)
-        elements.append(notes_text)
-        elements.append(Spacer(1, 0.3*inch))
-    
-    # Footer with signature
-    elements.append(Spacer(1, 0.5*inch))
-    
-    signature_data = [
-        ['', ''],
-        ['_________________________', '_________________________'],
-        ['Doctor Signature', 'Date & Stamp'],
-    ]
-    
-    signature_table = Table(signature_data, colWidths=[3.5*inch, 3*inch])
-    signature_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#7f8c8d')),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    
-    elements.append(signature_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Disclaimer
-    disclaimer = Paragraph(
-        "<i>This is a computer-generated prescription. "
-        "Please consult your doctor before taking any medication.</i>",
-        ParagraphStyle(
-            'Disclaimer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.HexColor('#95a5a6'),
-            alignment=TA_CENTER
-        )
-    )
-    elements.append(disclaimer)
+    medicines = list(prescription.medicines.all())
+    etag = f'"{prescription_fingerprint(prescription, medicines)}"'
     
-    # Build PDF
-    doc.build(elements)
+    # Repeat downloads of an unchanged prescription are answered without a body
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
     
-    # Get the value of the BytesIO buffer and return it
-    pdf = buffer.getvalue()
-    buffer.close()
+    # Rendered only when this version of the prescription is not cached yet
+    pdf_file = open_prescription_pdf(prescription, medicines, fingerprint=etag.strip('"'))
     
     # Create response
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="prescription_{prescription.id}_{prescription.patient.last_name}.pdf"'
-    response.write(pdf)
+    response = FileResponse(
+        pdf_file,
+        as_attachment=True,
+        filename=f'prescription_{prescription.id}_{prescription.patient.last_name}.pdf',
+        content_type='application/pdf'
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
     
     return response
 
 
 @login_required(login_url='login')
+@doctor_required
+def prescriptions_export(request):
+    """
+    Export the filtered prescriptions (same filters as the list, e.g. a patient's
+    history or a date range) as a zip of PDFs (?format=zip) or one merged PDF
+    (?format=pdf), both sent while they are produced
+    """
+    doctor = request.doctor
+    export_format = request.GET.get('format', 'zip')
+    if export_format not in ('zip', 'pdf'):
+        return JsonResponse({'success': False, 'message': 'Unknown export format'}, status=400)
+
+    prescriptions = doctor.prescriptions.select_related('patient', 'doctor__user').order_by('-created_at', '-id')
+    try:
+        prescriptions = filter_prescriptions(prescriptions, request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    total = prescriptions.count()
+    if not total:
+        return JsonResponse({'success': False, 'message': 'No prescriptions to export'}, status=404)
+    limit = MAX_PRESCRIPTIONS_PER_MERGED_PDF if export_format == 'pdf' else MAX_PRESCRIPTIONS_PER_EXPORT
+    if total > limit:
+        return JsonResponse({
+            'success': False,
+            'message': f'At most {limit} prescriptions can be exported at once as {export_format.upper()}'
+        }, status=400)
+
+    filename = f'prescriptions_{timezone.localdate():%Y%m%d}'
+    # Under ASGI a sync iterator would be buffered whole before being sent
+    is_asgi = isinstance(request, ASGIRequest)
+    if export_format == 'pdf':
+        output = merged_pdf(prescriptions)
+        if not is_asgi:
+            return FileResponse(output, as_attachment=True, filename=f'{filename}.pdf',
+                                content_type='application/pdf')
+        response = StreamingHttpResponse(async_chunks(file_chunks(output)), content_type='application/pdf')
+        response['Content-Length'] = os.fstat(output.fileno()).st_size
+        response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
+        return response
+
+    chunks = stream_zip(prescriptions)
+    response = StreamingHttpResponse(async_chunks(chunks) if is_asgi else chunks, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+    return response
+
+
+@login_required(login_url='login')
+@doctor_required
 def settings_view(request):
     """
     Display settings page with all user preferences
     """
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     # Get statistics for account section
     total_patients = doctor.patients.count()
@@ -1157,13 +1280,21 @@ def settings_view(request):
 
 
 @login_required(login_url='login')
+@doctor_required(api=True)
 def update_profile(request):
     if request.method != 'POST':
         return JsonResponse({'success': False}, status=405)
     
     try:
-        doctor = Doctor.objects.get(user=request.user)
-        
+        doctor = request.doctor
+
+        # Stored first: an invalid image must not leave half the profile saved
+        if 'profile_picture' in request.FILES:
+            try:
+                doctor.profile_picture = store_profile_picture(request.FILES['profile_picture'])
+            except ValidationError as e:
+                return JsonResponse({'success': False, 'message': e.message}, status=400)
+
         # Update user fields
         user = request.user
         user.first_name = request.POST.get('first_name', '').strip()
@@ -1177,10 +1308,6 @@ def update_profile(request):
         doctor.specialty = request.POST.get('specialty', '')
         doctor.bio = request.POST.get('bio', '')
         
-        # ✅ CRITICAL: Handle file upload
-        if 'profile_picture' in request.FILES:
-            doctor.profile_picture = request.FILES['profile_picture']
-        
         doctor.save()
         
         return JsonResponse({'success': True})
@@ -1243,6 +1370,7 @@ def change_password(request):
 
 
 @login_required(login_url='login')
+@doctor_required(api=True)
 def update_notifications(request):
     """
     Update notification preferences
@@ -1251,7 +1379,7 @@ def update_notifications(request):
         return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
     
     try:
-        doctor = Doctor.objects.get(user=request.user)
+        doctor = request.doctor
         
         # Update notification preferences
         # Store as JSON in a preferences field or create a separate NotificationPreferences model
@@ -1272,8 +1400,6 @@ def update_notifications(request):
             'message': 'Notification preferences updated successfully'
         })
         
-    except Doctor.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Doctor not found'}, status=404)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -1282,6 +1408,7 @@ def update_notifications(request):
 
 
 @login_required(login_url='login')
+@doctor_required(api=True)
 def update_preferences(request):
     """
     Update display and general preferences
@@ -1290,7 +1417,7 @@ def update_preferences(request):
         return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
     
     try:
-        doctor = Doctor.objects.get(user=request.user)
+        doctor = request.doctor
         
         # Update display preferences
         preferences = {
@@ -1311,8 +1438,6 @@ def update_preferences(request):
             'message': 'Display preferences updated successfully'
         })
         
-    except Doctor.DoesNotExist:
-        return JsonResponse({'success': False, 'message': 'Doctor not found'}, status=404)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -1321,6 +1446,7 @@ def update_preferences(request):
 
 
 @login_required(login_url='login')
+@doctor_required(api=True)
 def delete_account(request):
     """
     Permanently delete user account and all associated data
@@ -1330,12 +1456,10 @@ def delete_account(request):
     
     try:
         user = request.user
-        doctor = Doctor.objects.get(user=user)
         
-        # Delete all associated data
-        # Patients, appointments, consultations, prescriptions will be deleted via CASCADE
-        doctor.delete()
-        user.delete()
+        # Deleted inline (not queued) so success is only reported once the
+        # patients, appointments, consultations and prescriptions are gone
+        delete_user_account(user.id)
         
         # Logout the user
         logout(request)
@@ -1351,30 +1475,105 @@ def delete_account(request):
             'message': f'Error deleting account: {str(e)}'
         }, status=500)
         
+async def _user_events(user_id):
+    """Yield SSE chunks for a user until EVENTS_STREAM_MAX_AGE is reached"""
+    subscription = broker.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    try:
+        counter = await aget_counter(user_id)
+        last_notification = counter.latest_notification_id
+        last_message = counter.latest_message_id
+
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        yield format_event('ready', {'notification': last_notification, 'message': last_message})
+
+        started = last_resync = loop.time()
+        while loop.time() - started < EVENTS_STREAM_MAX_AGE:
+            item = await subscription.get(EVENTS_HEARTBEAT_INTERVAL)
+            if item is None:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+            else:
+                event, data = item
+                if event == 'notification':
+                    last_notification = max(last_notification, data['id'])
+                elif event == 'message':
+                    last_message = max(last_message, data['id'])
+                yield format_event(event, data)
+
+            if loop.time() - last_resync >= EVENTS_RESYNC_INTERVAL:
+                # Rows created by other processes are not published here
+                last_resync = loop.time()
+                counter = await aget_counter(user_id)
+                latest_notification = counter.latest_notification_id
+                latest_message = counter.latest_message_id
+                if latest_notification > last_notification or latest_message > last_message:
+                    yield format_event('resync', {
+                        'notifications': latest_notification > last_notification,
+                        'messages': latest_message > last_message,
+                    })
+                last_notification = max(last_notification, latest_notification)
+                last_message = max(last_message, latest_message)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream pushing the current user's new notifications
+    and messages. The stream ends after EVENTS_STREAM_MAX_AGE seconds and the
+    browser reconnects on its own.
+    """
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return JsonResponse({'success': False, 'message': 'Authentication required'}, status=401)
+
+    if not isinstance(request, ASGIRequest):
+        # A never-ending response would hold a WSGI worker; 204 makes EventSource
+        # give up and the pages fall back to polling
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(_user_events(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required(login_url='login')
-def get_notifications(request):
+def inbox_summary_view(request):
+    """
+    API endpoint with the unread counts and latest ids of notifications and
+    messages (header badges). Unchanged polls get a 304.
+    """
+    summary, etag, last_modified = inbox_summary(request.user)
+
+    not_modified = get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if not_modified is not None:
+        return not_modified
+
+    response = JsonResponse({'success': True, **summary})
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@async_login_required(login_url='login')
+async def get_notifications(request):
     """
     API endpoint to get user notifications
     Returns JSON list of notifications
     """
     try:
-        notifications = Notification.objects.filter(user=request.user)[:20]  # Get last 20
+        notifications = Notification.objects.filter(user_id=request.user.pk)[:20]  # Get last 20
         
-        notifications_data = [
-            {
-                'id': notif.id,
-                'type': notif.notification_type,
-                'icon': notif.get_icon(),
-                'title': notif.title,
-                'message': notif.message,
-                'time': notif.get_time_since(),
-                'unread': not notif.is_read,
-                'link': notif.link or '#'
-            }
-            for notif in notifications
-        ]
+        notifications_data = [notif.as_dict() async for notif in notifications]
         
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+        unread_count = (await aget_counter(request.user.pk)).unread_notifications
         
         return JsonResponse({
             'success': True,
@@ -1389,28 +1588,18 @@ def get_notifications(request):
         }, status=500)
 
 
-@login_required(login_url='login')
-def get_messages(request):
+@async_login_required(login_url='login')
+async def get_messages(request):
     """
     API endpoint to get user messages
     Returns JSON list of messages
     """
     try:
-        messages = Message.objects.filter(recipient=request.user)[:20]  # Get last 20
+        messages = Message.objects.filter(recipient_id=request.user.pk).select_related('sender')[:20]  # Get last 20
         
-        messages_data = [
-            {
-                'id': msg.id,
-                'sender': f"{msg.sender.first_name} {msg.sender.last_name}",
-                'initials': f"{msg.sender.first_name[0]}{msg.sender.last_name[0]}".upper(),
-                'message': msg.message[:100],  # Truncate long messages
-                'time': msg.get_time_since(),
-                'unread': not msg.is_read
-            }
-            for msg in messages
-        ]
+        messages_data = [msg.as_dict() async for msg in messages]
         
-        unread_count = Message.objects.filter(recipient=request.user, is_read=False).count()
+        unread_count = (await aget_counter(request.user.pk)).unread_messages
         
         return JsonResponse({
             'success': True,
@@ -1433,8 +1622,8 @@ def mark_notification_read(request, notification_id):
     """
     try:
         notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            read_notification(request.user, notification.id)
         
         return JsonResponse({
             'success': True,
@@ -1460,7 +1649,7 @@ def mark_all_notifications_read(request):
     Mark all notifications as read for the current user
     """
     try:
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        mark_notifications_read(request.user)
         
         return JsonResponse({
             'success': True,
@@ -1481,9 +1670,12 @@ def mark_message_read(request, message_id):
     Mark a single message as read
     """
     try:
-        message = Message.objects.get(id=message_id, recipient=request.user)
-        message.is_read = True
-        message.save()
+        message = Message.objects.select_related('conversation').get(id=message_id, recipient=request.user)
+        if message.conversation_id:
+            # Reading a message of a thread moves the read cursor up to it
+            mark_thread_read(request.user, message.conversation, up_to_id=message.id)
+        elif not message.is_read:
+            read_message(request.user, message.id)
         
         return JsonResponse({
             'success': True,
@@ -1502,6 +1694,108 @@ def mark_message_read(request, message_id):
         }, status=500)
 
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def send_message_view(request):
+    """
+    API endpoint to send an internal message, to a user (starts or continues
+    the direct conversation) or to an existing conversation.
+    Accepts form data or JSON: recipient or conversation, message, optional subject
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or '{}')
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Invalid JSON payload'}, status=400)
+    else:
+        data = request.POST
+
+    recipient = conversation = None
+    try:
+        if data.get('conversation'):
+            conversation = Conversation.objects.get(id=int(data['conversation']), participants=request.user)
+        elif data.get('recipient'):
+            recipient = User.objects.get(id=int(data['recipient']), is_active=True)
+    except (Conversation.DoesNotExist, User.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({'success': False, 'message': 'Recipient not found'}, status=404)
+
+    try:
+        sent = send_message(request.user, data.get('message'), recipient=recipient,
+                            conversation=conversation, subject=(data.get('subject') or '').strip())
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'message': ' '.join(e.messages)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Message sent',
+        'conversation': sent[0].conversation_id if sent else getattr(conversation, 'id', None),
+        'message_ids': [message.id for message in sent]
+    })
+
+
+@login_required(login_url='login')
+def conversations_list(request):
+    """
+    API endpoint listing the user's conversations, most recent first, with
+    participants, last message and unread count (constant number of queries).
+    Paginated with ?cursor=
+    """
+    paginator = CursorPaginator(thread_list(request.user), CONVERSATIONS_PER_PAGE, ['-last_activity_at', '-id'])
+    page = paginator.get_page(request.GET.get('cursor'))
+
+    return JsonResponse({
+        'success': True,
+        'conversations': [serialize_thread(membership) for membership in page],
+        'next_cursor': page.next_cursor
+    })
+
+
+@login_required(login_url='login')
+def conversation_messages(request, conversation_id):
+    """
+    API endpoint returning the messages of a conversation, newest first
+    (paginated with ?cursor=)
+    """
+    conversation = get_object_or_404(Conversation, id=conversation_id, participants=request.user)
+    membership = conversation.memberships.get(user=request.user)
+
+    thread = (conversation.messages.select_related('sender')
+              .filter(Q(recipient=request.user) | Q(sender=request.user))
+              .order_by('-id'))
+    page = CursorPaginator(thread, CONVERSATION_MESSAGES_PER_PAGE, ['-id']).get_page(request.GET.get('cursor'))
+
+    messages_data = []
+    for message in page:
+        data = message.as_dict()
+        data['message'] = message.message
+        data['mine'] = message.sender_id == request.user.id
+        data['unread'] = not data['mine'] and message.id > membership.last_read_message_id
+        messages_data.append(data)
+
+    return JsonResponse({
+        'success': True,
+        'conversation': conversation.id,
+        'subject': conversation.subject,
+        'messages': messages_data,
+        'next_cursor': page.next_cursor
+    })
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def conversation_mark_read(request, conversation_id):
+    """
+    Mark a conversation read up to its last message
+    """
+    conversation = get_object_or_404(Conversation, id=conversation_id, participants=request.user)
+    changed = mark_thread_read(request.user, conversation)
+
+    return JsonResponse({
+        'success': True,
+        'message': f'{changed} message(s) marked as read'
+    })
+
+
 @login_required(login_url='login')
 def delete_notification(request, notification_id):
     """
@@ -1529,14 +1823,12 @@ def delete_notification(request, notification_id):
 
 
 @login_required(login_url='login')
+@doctor_required
 def notifications_page(request):
     """
     Full notifications page view
     """
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     context = {
         'doctor': doctor,
@@ -1546,14 +1838,12 @@ def notifications_page(request):
 
 
 @login_required(login_url='login')
+@doctor_required
 def messages_page(request):
     """
     Full messages page view
     """
-    try:
-        doctor = Doctor.objects.get(user=request.user)
-    except Doctor.DoesNotExist:
-        return redirect('login')
+    doctor = request.doctor
     
     context = {
         'doctor': doctor,
@@ -1567,10 +1857,8 @@ def create_appointment_notification(doctor, appointment):
     """
     Create notification when appointment is scheduled
     """
-    from .models import create_notification
-    
-    create_notification(
-        user=doctor.user,
+    send_notification.delay(
+        user_id=doctor.user_id,
         notification_type='appointment',
         title='Upcoming Appointment',
         message=f'You have an appointment with {appointment.patient.first_name} {appointment.patient.last_name} at {appointment.scheduled_time.strftime("%I:%M %p")}',
@@ -1583,10 +1871,8 @@ def create_patient_notification(doctor, patient):
     """
     Create notification when new patient registers
     """
-    from .models import create_notification
-    
-    create_notification(
-        user=doctor.user,
+    send_notification.delay(
+        user_id=doctor.user_id,
         notification_type='patient',
         title='New Patient Registration',
         message=f'{patient.first_name} {patient.last_name} has registered as a new patient',
@@ -1599,10 +1885,8 @@ def create_prescription_notification(doctor, prescription):
     """
     Create notification when prescription is created
     """
-    from .models import create_notification
-    
-    create_notification(
-        user=doctor.user,
+    send_notification.delay(
+        user_id=doctor.user_id,
         notification_type='prescription',
         title='New Prescription Created',
         message=f'Prescription #{prescription.id} created for {prescription.patient.first_name} {prescription.patient.last_name}',
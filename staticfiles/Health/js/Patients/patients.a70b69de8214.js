@@ -0,0 +1,71 @@
+// Patient import: upload the file, then poll the import's progress
+document.getElementById('importFile').addEventListener('change', function () {
+    const form = document.getElementById('importForm');
+    const status = document.getElementById('importStatus');
+    if (!this.files.length) {
+        return;
+    }
+
+    status.hidden = false;
+    status.className = 'import-status';
+    status.textContent = 'Uploading ' + this.files[0].name + '...';
+
+    fetch(form.action, {method: 'POST', body: new FormData(form)})
+        .then(response => response.json())
+        .then(data => {
+            form.reset();
+            if (!data.success) {
+                showImportStatus({status: 'failed', message: data.message});
+                return;
+            }
+            pollImport(data.status_url);
+        })
+        .catch(() => {
+            form.reset();
+            showImportStatus({status: 'failed', message: 'The upload failed.'});
+        });
+});
+
+function pollImport(url) {
+    fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            showImportStatus(data);
+            if (data.status === 'queued' || data.status === 'running') {
+                setTimeout(() => pollImport(url), 1000);
+            }
+        })
+        .catch(() => setTimeout(() => pollImport(url), 3000));
+}
+
+function showImportStatus(data) {
+    const status = document.getElementById('importStatus');
+    status.className = 'import-status' + (data.status === 'failed' ? ' failed' : '');
+
+    if (data.status === 'queued') {
+        status.textContent = 'Import queued...';
+    } else if (data.status === 'failed' && !data.processed) {
+        status.textContent = 'Import failed: ' + (data.message || 'unknown error');
+    } else {
+        const label = {done: 'Import finished', failed: 'Import stopped'}[data.status] || 'Importing';
+        status.textContent = label + ': ' + data.processed + ' row(s) read, ' + data.created
+            + ' patient(s) created, ' + data.failed + ' rejected.';
+    }
+
+    if (data.errors && data.errors.length) {
+        const list = document.createElement('ul');
+        data.errors.slice(0, 10).forEach(failure => {
+            const item = document.createElement('li');
+            item.textContent = 'Line ' + failure.line + ': ' + Object.entries(failure.errors)
+                .map(([field, messages]) => field + ': ' + messages.join(' ')).join('; ');
+            list.appendChild(item);
+        });
+        status.appendChild(list);
+    }
+    if (data.status === 'done' && data.created) {
+        const link = document.createElement('a');
+        link.href = window.location.pathname;
+        link.textContent = ' Show the patients';
+        status.appendChild(link);
+    }
+}
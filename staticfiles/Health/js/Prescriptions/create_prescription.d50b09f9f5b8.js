@@ -0,0 +1,279 @@
+    let medicines = [];
+
+    function escapeHtml(text) {
+        const element = document.createElement('div');
+        element.textContent = text;
+        return element.innerHTML;
+    }
+
+    function addMedicine() {
+        const name = document.getElementById('medicineName').value.trim();
+        const dosage = document.getElementById('medicineDosage').value.trim();
+        const frequency = document.getElementById('medicineFrequency').value.trim();
+        const duration = document.getElementById('medicineDuration').value.trim();
+
+        if (!name || !dosage || !frequency || !duration) {
+            alert('Please fill in all medicine fields');
+            return;
+        }
+
+        medicines.push({
+            name: name,
+            dosage: dosage,
+            frequency: frequency,
+            duration: duration
+        });
+
+        // Clear inputs
+        document.getElementById('medicineName').value = '';
+        document.getElementById('medicineDosage').value = '';
+        document.getElementById('medicineFrequency').value = '';
+        document.getElementById('medicineDuration').value = '';
+
+        updateMedicinesList();
+        document.getElementById('medicinesData').value = JSON.stringify(medicines);
+    }
+
+    function removeMedicine(index) {
+        medicines.splice(index, 1);
+        updateMedicinesList();
+        document.getElementById('medicinesData').value = JSON.stringify(medicines);
+    }
+
+    function updateMedicinesList() {
+        const medicinesList = document.getElementById('medicinesList');
+
+        if (medicines.length === 0) {
+            medicinesList.innerHTML = `
+                <div class="empty-medicines">
+                    <div class="empty-medicines-icon">💊</div>
+                    <p>No medicines added yet. Add medicines above.</p>
+                </div>
+            `;
+            return;
+        }
+
+        medicinesList.innerHTML = medicines.map((medicine, index) => `
+            <div class="medicine-item">
+                <div class="medicine-details">
+                    <div class="medicine-name">${medicine.name}</div>
+                    <div class="medicine-dosage"><strong>Dosage:</strong> ${medicine.dosage}</div>
+                    <div class="medicine-frequency"><strong>Frequency:</strong> ${medicine.frequency}</div>
+                    <div class="medicine-duration"><strong>Duration:</strong> ${medicine.duration}</div>
+                </div>
+                <button type="button" class="btn-remove" onclick="removeMedicine(${index})">Remove</button>
+            </div>
+        `).join('');
+    }
+
+    function previewPrescription() {
+        const patientSelect = document.getElementById('patient');
+        const patientId = patientSelect.value;
+
+        if (!patientId) {
+            alert('Please select a patient');
+            return;
+        }
+
+        if (medicines.length === 0) {
+            alert('Please add at least one medicine');
+            return;
+        }
+
+        const patientOption = patientSelect.options[patientSelect.selectedIndex];
+        const patientName = patientOption.text.split('(')[0].trim();
+        const prescriptionDate = document.getElementById('prescriptionDate').value;
+        const instructions = document.getElementById('instructions').value;
+
+        const medicinesHTML = medicines.map(med => `
+            <div class="medicine-row">
+                <div class="medicine-row-header">${med.name}</div>
+                <div class="medicine-row-details">
+                    Dosage: ${med.dosage} | Frequency: ${med.frequency} | Duration: ${med.duration}
+                </div>
+            </div>
+        `).join('');
+
+        const doctor = document.getElementById('prescriptionPreview').dataset;
+        const doctorName = escapeHtml(doctor.doctorName);
+
+        const prescriptionHTML = `
+            <div class="prescription-header">
+                <div class="hospital-name">MedCare Hospital</div>
+                <div class="hospital-info">
+                    📍 Address | 📞 Phone | 📧 ${escapeHtml(doctor.doctorEmail)}
+                </div>
+            </div>
+
+            <div class="prescription-title">PRESCRIPTION</div>
+
+            <div class="prescription-grid">
+                <div class="prescription-item">
+                    <div class="prescription-label">Patient Name:</div>
+                    <div class="prescription-value">${patientName}</div>
+                </div>
+                <div class="prescription-item">
+                    <div class="prescription-label">Doctor Name:</div>
+                    <div class="prescription-value">Dr. ${doctorName}</div>
+                </div>
+                <div class="prescription-item">
+                    <div class="prescription-label">Date:</div>
+                    <div class="prescription-value">${new Date(prescriptionDate).toLocaleDateString()}</div>
+                </div>
+                <div class="prescription-item">
+                    <div class="prescription-label">Specialty:</div>
+                    <div class="prescription-value">${escapeHtml(doctor.doctorSpecialty)}</div>
+                </div>
+            </div>
+
+            <div class="medicines-section">
+                <div class="medicines-title">💊 Medications</div>
+                ${medicinesHTML}
+            </div>
+
+            ${instructions ? `
+                <div class="notes-section">
+                    <div class="notes-title">📝 Instructions & Notes:</div>
+                    <div class="notes-content">${instructions}</div>
+                </div>
+            ` : ''}
+
+            <div class="signature-section">
+                <div class="signature-item">
+                    <div class="signature-line">Patient Signature</div>
+                </div>
+                <div class="signature-item">
+                    <div class="signature-line">Dr. ${doctorName}</div>
+                </div>
+            </div>
+
+            <div class="date-footer">
+                Generated on: ${new Date().toLocaleDateString()} | MedCare System
+            </div>
+
+            <div class="prescription-footer">
+                This is a digital prescription. For official use, please print this prescription.
+            </div>
+        `;
+
+        document.getElementById('prescriptionPreview').innerHTML = prescriptionHTML;
+        document.getElementById('previewModal').classList.add('show');
+    }
+
+    function closeModal() {
+        document.getElementById('previewModal').classList.remove('show');
+    }
+
+    function downloadPDF() {
+        const prescriptionContent = document.getElementById('prescriptionPreview').innerHTML;
+        const patientSelect = document.getElementById('patient');
+        const patientName = patientSelect.options[patientSelect.selectedIndex].text.split('(')[0].trim();
+        const filename = `Prescription_${patientName}_${new Date().toISOString().split('T')[0]}.pdf`;
+
+        const printWindow = window.open('', '', 'height=600,width=800');
+        printWindow.document.write(`
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <title>${filename}</title>
+                <style>
+                    body { font-family: Arial, sans-serif; margin: 20px; }
+                    ${getPreviewStyles()}
+                </style>
+            </head>
+            <body>
+                ${prescriptionContent}
+            </body>
+            </html>
+        `);
+        printWindow.document.close();
+
+        setTimeout(() => {
+            printWindow.print();
+            printWindow.close();
+        }, 250);
+    }
+
+    function getPreviewStyles() {
+        return `
+            .prescription-preview { background: white; padding: 40px; font-family: Arial, sans-serif; }
+            .prescription-header { text-align: center; margin-bottom: 30px; border-bottom: 2px solid #333; padding-bottom: 20px; }
+            .hospital-name { font-size: 24px; font-weight: bold; color: #1abc9c; margin-bottom: 5px; }
+            .hospital-info { font-size: 12px; color: #666; margin-bottom: 10px; }
+            .prescription-title { font-size: 18px; font-weight: bold; text-align: center; margin: 20px 0; }
+            .prescription-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-bottom: 20px; font-size: 13px; }
+            .prescription-item { border-bottom: 1px solid #eee; padding-bottom: 10px; }
+            .prescription-label { font-weight: bold; color: #333; }
+            .prescription-value { color: #666; margin-top: 5px; }
+            .medicines-section { margin-top: 30px; }
+            .medicines-title { font-size: 16px; font-weight: bold; color: #333; margin-bottom: 15px; border-bottom: 2px solid #1abc9c; padding-bottom: 10px; }
+            .medicine-row { padding: 12px 0; border-bottom: 1px solid #eee; font-size: 13px; }
+            .medicine-row-header { font-weight: bold; color: #333; }
+            .medicine-row-details { color: #666; margin-top: 5px; font-size: 12px; }
+            .notes-section { margin-top: 30px; padding: 15px; background: #f9fafb; border-radius: 5px; }
+            .notes-title { font-weight: bold; color: #333; margin-bottom: 10px; }
+            .notes-content { font-size: 12px; color: #666; line-height: 1.6; white-space: pre-wrap; }
+            .signature-section { margin-top: 40px; display: grid; grid-template-columns: 1fr 1fr; gap: 40px; }
+            .signature-item { text-align: center; }
+            .signature-line { border-top: 1px solid #333; margin-top: 50px; padding-top: 10px; font-size: 12px; font-weight: bold; }
+            .date-footer { text-align: center; margin-top: 30px; font-size: 12px; color: #666; }
+            .prescription-footer { text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 11px; color: #999; }
+        `;
+    }
+
+  function savePrescription() {
+    const patientId = document.getElementById('patient').value;
+    const prescriptionDate = document.getElementById('prescriptionDate').value;
+    const instructions = document.getElementById('instructions').value;
+
+    if (!patientId) {
+        alert('Please select a patient');
+        return;
+    }
+
+    if (medicines.length === 0) {
+        alert('Please add at least one medicine');
+        return;
+    }
+
+    // Get CSRF token
+    const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+
+    // Create form data
+    const formData = new FormData();
+    formData.append('patient', patientId);
+    formData.append('prescription_date', prescriptionDate);
+    formData.append('instructions', instructions);
+    formData.append('medicines_data', JSON.stringify(medicines));
+
+    // Send to server
+    const urls = document.getElementById('savePrescriptionBtn').dataset;
+    fetch(urls.url, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrftoken,
+        },
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Prescription saved successfully!');
+            window.location.href = urls.redirectUrl;
+        } else {
+            alert('Error: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('An error occurred while saving the prescription');
+    });
+}
+
+    // Close modal when clicking outside
+    window.onclick = function(event) {
+        const modal = document.getElementById('previewModal');
+        if (event.target === modal) {
+            modal.classList.remove('show');
+        }
+    }
@@ -0,0 +1,60 @@
+function printPrescription() {
+    window.print();
+}
+
+function downloadPrescriptionPDF() {
+    const preview = document.getElementById('prescriptionPreview');
+    const prescriptionContent = preview.innerHTML;
+    const filename = preview.dataset.filename;
+
+    const printWindow = window.open('', '', 'height=600,width=800');
+    printWindow.document.write(`
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                ${getPreviewStyles()}
+            </style>
+        </head>
+        <body>
+            ${prescriptionContent}
+        </body>
+        </html>
+    `);
+    printWindow.document.title = filename;
+    printWindow.document.close();
+
+    setTimeout(() => {
+        printWindow.print();
+        printWindow.close();
+    }, 250);
+}
+
+function getPreviewStyles() {
+    return `
+        .prescription-preview { background: white; padding: 40px; font-family: Arial, sans-serif; }
+        .prescription-header { text-align: center; margin-bottom: 30px; border-bottom: 2px solid #333; padding-bottom: 20px; }
+        .hospital-name { font-size: 24px; font-weight: bold; color: #1abc9c; margin-bottom: 5px; }
+        .hospital-info { font-size: 12px; color: #666; margin-bottom: 10px; }
+        .prescription-title { font-size: 18px; font-weight: bold; text-align: center; margin: 20px 0; }
+        .prescription-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-bottom: 20px; font-size: 13px; }
+        .prescription-item { border-bottom: 1px solid #eee; padding-bottom: 10px; }
+        .prescription-label { font-weight: bold; color: #333; }
+        .prescription-value { color: #666; margin-top: 5px; }
+        .medicines-section { margin-top: 30px; }
+        .medicines-title { font-size: 16px; font-weight: bold; color: #333; margin-bottom: 15px; border-bottom: 2px solid #1abc9c; padding-bottom: 10px; }
+        .medicine-row { padding: 12px 0; border-bottom: 1px solid #eee; font-size: 13px; }
+        .medicine-row:last-child { border-bottom: none; }
+        .medicine-row-header { font-weight: bold; color: #333; }
+        .medicine-row-details { color: #666; margin-top: 5px; font-size: 12px; }
+        .notes-section { margin-top: 30px; padding: 15px; background: #f9fafb; border-radius: 5px; }
+        .notes-title { font-weight: bold; color: #333; margin-bottom: 10px; }
+        .notes-content { font-size: 12px; color: #666; line-height: 1.6; white-space: pre-wrap; }
+        .signature-section { margin-top: 40px; display: grid; grid-template-columns: 1fr 1fr; gap: 40px; }
+        .signature-item { text-align: center; }
+        .signature-line { border-top: 1px solid #333; margin-top: 50px; padding-top: 10px; font-size: 12px; font-weight: bold; }
+        .date-footer { text-align: center; margin-top: 30px; font-size: 12px; color: #666; }
+        .prescription-footer { text-align: center; margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 11px; color: #999; }
+    `;
+}
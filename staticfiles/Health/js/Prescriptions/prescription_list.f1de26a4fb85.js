@@ -0,0 +1,241 @@
+function downloadPrescription(prescriptionId, button) {
+    // Show loading state
+    const textSpan = button.querySelector('.download-text');
+    const spinner = button.querySelector('.download-spinner');
+
+    textSpan.style.display = 'none';
+    spinner.style.display = 'inline-block';
+    button.disabled = true;
+    button.style.opacity = '0.7';
+
+    // Create a temporary link and trigger download
+    const downloadUrl = `/prescriptions/${prescriptionId}/download/`;
+
+    // Use fetch to check if the file is ready
+    fetch(downloadUrl, {
+        method: 'GET',
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+    })
+    .then(response => {
+        if (response.ok) {
+            // If successful, trigger actual download
+            const link = document.createElement('a');
+            link.href = downloadUrl;
+            link.download = `prescription_${prescriptionId}.pdf`;
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+
+            // Show success message
+            showNotification('PDF downloaded successfully!', 'success');
+        } else {
+            throw new Error('Download failed');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Failed to download prescription', 'error');
+    })
+    .finally(() => {
+        // Reset button state
+        textSpan.style.display = 'inline';
+        spinner.style.display = 'none';
+        button.disabled = false;
+        button.style.opacity = '1';
+    });
+}
+
+function viewPrescription(prescriptionId) {
+    // Fetch prescription details via AJAX
+    fetch(`/prescriptions/${prescriptionId}/view/`)
+        .then(response => response.json())
+        .then(data => {
+            displayPrescriptionDetails(data);
+            document.getElementById('viewModal').classList.add('show');
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Failed to load prescription details');
+        });
+}
+
+function displayPrescriptionDetails(prescription) {
+    const medicinesHTML = prescription.medicines.map(med => `
+        <div style="padding: 12px 0; border-bottom: 1px solid #eee;">
+            <div style="font-weight: bold; color: #333; margin-bottom: 5px;">${med.name}</div>
+            <div style="color: #666; font-size: 12px;">
+                Dosage: ${med.dosage} | Frequency: ${med.frequency} | Duration: ${med.duration}
+            </div>
+        </div>
+    `).join('');
+
+    const html = `
+        <div style="padding: 20px;">
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px; margin-bottom: 30px;">
+                <div>
+                    <strong style="color: #7f8c8d;">Patient:</strong>
+                    <div style="margin-top: 5px;">${prescription.patient_name}</div>
+                </div>
+                <div>
+                    <strong style="color: #7f8c8d;">Date:</strong>
+                    <div style="margin-top: 5px;">${prescription.date}</div>
+                </div>
+                <div>
+                    <strong style="color: #7f8c8d;">Doctor:</strong>
+                    <div style="margin-top: 5px;">Dr. ${prescription.doctor_name}</div>
+                </div>
+                <div>
+                    <strong style="color: #7f8c8d;">Email:</strong>
+                    <div style="margin-top: 5px;">${prescription.patient_email}</div>
+                </div>
+            </div>
+
+            <div style="margin-top: 30px;">
+                <h3 style="color: #1abc9c; border-bottom: 2px solid #1abc9c; padding-bottom: 10px;">💊 Medications</h3>
+                ${medicinesHTML}
+            </div>
+
+            ${prescription.notes ? `
+                <div style="margin-top: 30px; padding: 15px; background: #f9fafb; border-radius: 5px;">
+                    <strong style="color: #333;">📝 Instructions:</strong>
+                    <div style="margin-top: 10px; color: #666; white-space: pre-wrap;">${prescription.notes}</div>
+                </div>
+            ` : ''}
+
+            <div style="margin-top: 30px; display: flex; gap: 15px; justify-content: center;">
+                <button onclick="downloadPrescriptionFromModal(${prescription.id})" style="background: #e74c3c; color: white; padding: 12px 30px; border: none; border-radius: 5px; cursor: pointer; font-weight: 600;">
+                    📥 Download PDF
+                </button>
+                <button onclick="closeViewModal()" style="background: #ecf0f1; color: #2c3e50; padding: 12px 30px; border: none; border-radius: 5px; cursor: pointer; font-weight: 600;">
+                    Close
+                </button>
+            </div>
+        </div>
+    `;
+
+    document.getElementById('prescriptionDetails').innerHTML = html;
+}
+
+function downloadPrescriptionFromModal(prescriptionId) {
+    const downloadUrl = `/prescriptions/${prescriptionId}/download/`;
+    const link = document.createElement('a');
+    link.href = downloadUrl;
+    link.download = `prescription_${prescriptionId}.pdf`;
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+    showNotification('PDF download started!', 'success');
+}
+
+function closeViewModal() {
+    document.getElementById('viewModal').classList.remove('show');
+}
+
+function deletePrescription(prescriptionId) {
+    if (confirm('Are you sure you want to delete this prescription? This action cannot be undone.')) {
+        fetch(`/prescriptions/${prescriptionId}/delete/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showNotification('Prescription deleted successfully', 'success');
+                location.reload();
+            } else {
+                showNotification('Failed to delete prescription', 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('An error occurred while deleting the prescription', 'error');
+        });
+    }
+}
+
+function resetFilters() {
+    window.location.href = window.location.pathname;
+}
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+function showNotification(message, type) {
+    // Create notification element
+    const notification = document.createElement('div');
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        padding: 15px 25px;
+        background: ${type === 'success' ? '#1abc9c' : '#e74c3c'};
+        color: white;
+        border-radius: 5px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        z-index: 10000;
+        font-weight: 600;
+        animation: slideIn 0.3s ease;
+    `;
+    notification.textContent = message;
+
+    document.body.appendChild(notification);
+
+    // Remove after 3 seconds
+    setTimeout(() => {
+        notification.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+// Add animation styles
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes slideIn {
+        from {
+            transform: translateX(400px);
+            opacity: 0;
+        }
+        to {
+            transform: translateX(0);
+            opacity: 1;
+        }
+    }
+    @keyframes slideOut {
+        from {
+            transform: translateX(0);
+            opacity: 1;
+        }
+        to {
+            transform: translateX(400px);
+            opacity: 0;
+        }
+    }
+`;
+document.head.appendChild(style);
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const modal = document.getElementById('viewModal');
+    if (event.target === modal) {
+        modal.classList.remove('show');
+    }
+}
@@ -0,0 +1,380 @@
+// Notification System
+const notificationBell = document.getElementById('notificationBell');
+const notificationDropdown = document.getElementById('notificationDropdown');
+const notificationList = document.getElementById('notificationList');
+const notificationBadge = document.getElementById('notificationBadge');
+
+const messageIcon = document.getElementById('messageIcon');
+const messagesDropdown = document.getElementById('messagesDropdown');
+const messageList = document.getElementById('messageList');
+const messageBadge = document.getElementById('messageBadge');
+
+// Store notifications and messages
+let notifications = [];
+let messages = [];
+
+// Fetch notifications from API
+async function fetchNotifications() {
+    try {
+        const response = await fetch('/api/notifications/');
+        const data = await response.json();
+
+        if (data.success) {
+            notifications = data.notifications;
+            loadNotifications();
+        }
+    } catch (error) {
+        console.error('Error fetching notifications:', error);
+        // Show empty state if API fails
+        notifications = [];
+        loadNotifications();
+    }
+}
+
+// Fetch messages from API
+async function fetchMessages() {
+    try {
+        const response = await fetch('/api/messages/');
+        const data = await response.json();
+
+        if (data.success) {
+            messages = data.messages;
+            loadMessages();
+        }
+    } catch (error) {
+        console.error('Error fetching messages:', error);
+        // Show empty state if API fails
+        messages = [];
+        loadMessages();
+    }
+}
+
+// Load notifications
+function loadNotifications() {
+    if (notifications.length === 0) {
+        notificationList.innerHTML = `
+            <div class="empty-notifications">
+                <div class="empty-notifications-icon">🔔</div>
+                <div class="empty-notifications-text">No notifications</div>
+            </div>
+        `;
+        return;
+    }
+
+    notificationList.innerHTML = notifications.map(notif => `
+        <div class="notification-item ${notif.unread ? 'unread' : ''}" onclick="markAsRead(${notif.id})">
+            <div class="notification-icon ${notif.type}">
+                ${notif.icon}
+            </div>
+            <div class="notification-content">
+                <div class="notification-title">${notif.title}</div>
+                <div class="notification-message">${notif.message}</div>
+                <div class="notification-time">${notif.time}</div>
+            </div>
+        </div>
+    `).join('');
+}
+
+// Load messages
+function loadMessages() {
+    if (messages.length === 0) {
+        messageList.innerHTML = `
+            <div class="empty-notifications">
+                <div class="empty-notifications-icon">💬</div>
+                <div class="empty-notifications-text">No messages</div>
+            </div>
+        `;
+        return;
+    }
+
+    messageList.innerHTML = messages.map(msg => `
+        <div class="message-item ${msg.unread ? 'unread' : ''}" onclick="openMessage(${msg.id})">
+            <div class="message-avatar">${msg.initials}</div>
+            <div class="message-content">
+                <div class="message-header">
+                    <span class="message-sender">${msg.sender}</span>
+                    <span class="message-time">${msg.time}</span>
+                </div>
+                <div class="message-text">${msg.message}</div>
+            </div>
+        </div>
+    `).join('');
+}
+
+// Badges come from the inbox summary (server-side unread counts)
+function renderBadge(badge, count) {
+    if (count > 0) {
+        badge.textContent = count;
+        badge.style.display = 'flex';
+    } else {
+        badge.style.display = 'none';
+    }
+}
+
+// Lists to refresh when new items arrive (pages register their own with onInboxChange)
+let notificationsLoaded = false;
+let messagesLoaded = false;
+const inboxListeners = {
+    notifications: [() => { if (notificationsLoaded) fetchNotifications(); }],
+    messages: [() => { if (messagesLoaded) fetchMessages(); }],
+};
+const latestIds = { notification: null, message: null };
+
+function onInboxChange(kind, callback) {
+    inboxListeners[kind].push(callback);
+}
+
+// Fetch unread counts and latest ids; the browser revalidates with
+// If-None-Match so an unchanged inbox costs a 304
+async function fetchInboxSummary() {
+    try {
+        const response = await fetch('/api/inbox/summary/');
+        const data = await response.json();
+        if (!data.success) return;
+
+        renderBadge(notificationBadge, data.notifications.unread_count);
+        renderBadge(messageBadge, data.messages.unread_count);
+
+        if (latestIds.notification !== null && data.notifications.latest_id > latestIds.notification) {
+            inboxListeners.notifications.forEach(callback => callback());
+        }
+        if (latestIds.message !== null && data.messages.latest_id > latestIds.message) {
+            inboxListeners.messages.forEach(callback => callback());
+        }
+        latestIds.notification = data.notifications.latest_id;
+        latestIds.message = data.messages.latest_id;
+    } catch (error) {
+        console.error('Error fetching inbox summary:', error);
+    }
+}
+
+// Toggle notification dropdown
+notificationBell.addEventListener('click', function(e) {
+    e.stopPropagation();
+    notificationDropdown.classList.toggle('show');
+    messagesDropdown.classList.remove('show');
+    if (!notificationsLoaded) {
+        notificationsLoaded = true;
+        fetchNotifications();
+    }
+});
+
+// Toggle messages dropdown
+messageIcon.addEventListener('click', function(e) {
+    e.stopPropagation();
+    messagesDropdown.classList.toggle('show');
+    notificationDropdown.classList.remove('show');
+    if (!messagesLoaded) {
+        messagesLoaded = true;
+        fetchMessages();
+    }
+});
+
+// Close dropdowns when clicking outside
+document.addEventListener('click', function(e) {
+    if (!notificationDropdown.contains(e.target) && !notificationBell.contains(e.target)) {
+        notificationDropdown.classList.remove('show');
+    }
+    if (!messagesDropdown.contains(e.target) && !messageIcon.contains(e.target)) {
+        messagesDropdown.classList.remove('show');
+    }
+});
+
+// Mark notification as read
+async function markAsRead(id) {
+    try {
+        const response = await fetch(`/api/notifications/${id}/read/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Content-Type': 'application/json'
+            }
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            const notification = notifications.find(n => n.id === id);
+            fetchInboxSummary();
+            if (notification) {
+                notification.unread = false;
+                loadNotifications();
+
+                // Navigate to link if available
+                if (notification.link && notification.link !== '#') {
+                    window.location.href = notification.link;
+                }
+            }
+        }
+    } catch (error) {
+        console.error('Error marking notification as read:', error);
+    }
+}
+
+// Mark all notifications as read
+async function markAllAsRead() {
+    try {
+        const response = await fetch('/api/notifications/mark-all-read/', {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Content-Type': 'application/json'
+            }
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            notifications.forEach(n => n.unread = false);
+            loadNotifications();
+            fetchInboxSummary();
+            showToast('All notifications marked as read', 'success');
+        }
+    } catch (error) {
+        console.error('Error marking all as read:', error);
+        showToast('Failed to mark notifications as read', 'error');
+    }
+}
+
+// Open message
+async function openMessage(id) {
+    try {
+        const response = await fetch(`/api/messages/${id}/read/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Content-Type': 'application/json'
+            }
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            const message = messages.find(m => m.id === id);
+            if (message) {
+                message.unread = false;
+                loadMessages();
+            }
+            fetchInboxSummary();
+            // Here you would navigate to the full message view
+            showToast('Message opened', 'info');
+        }
+    } catch (error) {
+        console.error('Error opening message:', error);
+    }
+}
+
+// Get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Show toast notification
+function showToast(message, type = 'info') {
+    const toastContainer = document.querySelector('.toast-messages') || createToastContainer();
+    const toast = document.createElement('div');
+    toast.className = `toast-message ${type}`;
+    toast.innerHTML = `
+        <span>${message}</span>
+        <button type="button" class="close-toast" onclick="this.parentElement.remove()">×</button>
+    `;
+    toastContainer.appendChild(toast);
+
+    // Auto-remove after 5 seconds
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease forwards';
+        setTimeout(() => toast.remove(), 300);
+    }, 5000);
+}
+
+function createToastContainer() {
+    const container = document.createElement('div');
+    container.className = 'toast-messages';
+    document.body.appendChild(container);
+    return container;
+}
+
+// Live updates: the server pushes new notifications and messages over
+// one event stream per tab; polling is only used when streaming is unavailable
+let pollTimer = null;
+
+function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(fetchInboxSummary, 60000);
+}
+
+function connectEventStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    const source = new EventSource('/api/events/');
+
+    // 'ready' is sent on every (re)connection; 'resync' when rows were
+    // created by another process. Either way the summary tells what changed.
+    ['ready', 'notification', 'message', 'resync'].forEach(event => {
+        source.addEventListener(event, fetchInboxSummary);
+    });
+
+    source.onerror = () => {
+        // CLOSED means the server refused the stream; otherwise the browser retries
+        if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+}
+
+// Load data on page load
+document.addEventListener('DOMContentLoaded', function() {
+    fetchInboxSummary();
+    connectEventStream();
+});
+
+// Auto-hide toast messages after 5 seconds
+setTimeout(function() {
+    const toasts = document.querySelectorAll('.toast-message');
+    toasts.forEach(toast => {
+        toast.style.animation = 'slideOut 0.3s ease forwards';
+        setTimeout(() => toast.remove(), 300);
+    });
+}, 5000);
+
+// Allow manual close of toast messages
+document.querySelectorAll('.close-toast').forEach(btn => {
+    btn.addEventListener('click', function() {
+        this.parentElement.style.animation = 'slideOut 0.3s ease forwards';
+        setTimeout(() => this.parentElement.remove(), 300);
+    });
+});
+
+// Simulate real-time notifications (optional - remove in production)
+setInterval(() => {
+    // This simulates receiving a new notification every 30 seconds
+    // In production, replace this with WebSocket or polling
+    const types = ['appointment', 'patient', 'system'];
+    const randomType = types[Math.floor(Math.random() * types.length)];
+    const icons = { appointment: '📅', patient: '👤', system: '⚙️' };
+
+    // Uncomment to test real-time notifications
+    // notifications.unshift({
+    //     id: Date.now(),
+    //     type: randomType,
+    //     icon: icons[randomType],
+    //     title: 'New Notification',
+    //     message: 'This is a test notification',
+    //     time: 'Just now',
+    //     unread: true
+    // });
+    // loadNotifications();
+    // showToast('New notification received!', 'info');
+}, 30000);
@@ -0,0 +1,230 @@
+let allMessages = [];
+let currentMessageId = null;
+
+// Fetch messages on page load
+async function fetchMessages() {
+    try {
+        const response = await fetch('/api/messages/');
+        const data = await response.json();
+
+        if (data.success) {
+            allMessages = data.messages;
+            displayMessageList();
+        }
+    } catch (error) {
+        console.error('Error fetching messages:', error);
+    }
+}
+
+// Display message list
+function displayMessageList() {
+    const container = document.getElementById('messageList');
+
+    if (allMessages.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state" style="padding: 40px 20px;">
+                <div class="empty-icon" style="font-size: 48px;">💬</div>
+                <div class="empty-title" style="font-size: 16px;">No Messages</div>
+                <div class="empty-message" style="font-size: 12px;">Your messages will appear here</div>
+            </div>
+        `;
+        return;
+    }
+
+    container.innerHTML = allMessages.map(msg => `
+        <div class="message-list-item ${msg.unread ? 'unread' : ''} ${currentMessageId === msg.id ? 'active' : ''}"
+             onclick="viewMessage(${msg.id})">
+            <div class="message-avatar">${msg.initials}</div>
+            <div class="message-preview">
+                <div class="message-preview-header">
+                    <span class="message-sender-name">${msg.sender}</span>
+                    <span class="message-preview-time">${msg.time}</span>
+                </div>
+                <div class="message-preview-text">${msg.message}</div>
+            </div>
+            ${msg.unread ? '<div class="unread-dot"></div>' : ''}
+        </div>
+    `).join('');
+}
+
+// View message
+async function viewMessage(id) {
+    currentMessageId = id;
+    const message = allMessages.find(m => m.id === id);
+
+    if (!message) return;
+
+    // Mark as read
+    if (message.unread) {
+        await markMessageAsRead(id);
+        message.unread = false;
+    }
+
+    // Update UI
+    displayMessageList();
+
+    // Show message content
+    document.getElementById('messageViewEmpty').style.display = 'none';
+    document.getElementById('messageViewContent').style.display = 'flex';
+
+    // Update header
+    document.getElementById('currentAvatar').textContent = message.initials;
+    document.getElementById('currentSender').textContent = message.sender;
+    document.getElementById('currentStatus').textContent = 'Active recently';
+
+    // Display message thread (for now, just show the single message)
+    document.getElementById('messageThread').innerHTML = `
+        <div class="message-thread">
+            <div class="message-bubble">
+                <div class="message-bubble-header">
+                    <div class="message-bubble-avatar">${message.initials}</div>
+                    <span class="message-bubble-name">${message.sender}</span>
+                    <span class="message-bubble-time">${message.time}</span>
+                </div>
+                <div class="message-bubble-content">
+                    ${message.message}
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+// Mark message as read
+async function markMessageAsRead(id) {
+    try {
+        await fetch(`/api/messages/${id}/read/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken')
+            }
+        });
+    } catch (error) {
+        console.error('Error marking message as read:', error);
+    }
+}
+
+// Send message
+async function sendMessage(event) {
+    event.preventDefault();
+
+    const input = document.getElementById('messageInput');
+    const messageText = input.value.trim();
+
+    if (!messageText) return;
+
+    // Here you would send the message to the API
+    // For now, just add it to the thread
+    const thread = document.getElementById('messageThread');
+    const bubble = document.createElement('div');
+    bubble.className = 'message-bubble sent';
+    bubble.innerHTML = `
+        <div class="message-bubble-header">
+            <div class="message-bubble-avatar"></div>
+            <span class="message-bubble-name">You</span>
+            <span class="message-bubble-time">Just now</span>
+        </div>
+        <div class="message-bubble-content">
+            ${messageText}
+        </div>
+    `;
+    bubble.querySelector('.message-bubble-avatar').textContent = event.target.dataset.initials;
+    thread.querySelector('.message-thread').appendChild(bubble);
+
+    // Clear input
+    input.value = '';
+    input.focus();
+
+    // Scroll to bottom
+    thread.scrollTop = thread.scrollHeight;
+
+    showToast('Message sent!', 'success');
+}
+
+// Delete conversation
+function deleteConversation() {
+    if (!currentMessageId) return;
+
+    if (confirm('Are you sure you want to delete this conversation?')) {
+        // API call would go here
+        allMessages = allMessages.filter(m => m.id !== currentMessageId);
+        currentMessageId = null;
+        displayMessageList();
+        document.getElementById('messageViewEmpty').style.display = 'flex';
+        document.getElementById('messageViewContent').style.display = 'none';
+        showToast('Conversation deleted', 'success');
+    }
+}
+
+// Search messages
+document.getElementById('messageSearch').addEventListener('input', function(e) {
+    const search = e.target.value.toLowerCase();
+    const filtered = allMessages.filter(m => 
+        m.sender.toLowerCase().includes(search) ||
+        m.message.toLowerCase().includes(search)
+    );
+
+    const container = document.getElementById('messageList');
+    container.innerHTML = filtered.map(msg => `
+        <div class="message-list-item ${msg.unread ? 'unread' : ''} ${currentMessageId === msg.id ? 'active' : ''}"
+             onclick="viewMessage(${msg.id})">
+            <div class="message-avatar">${msg.initials}</div>
+            <div class="message-preview">
+                <div class="message-preview-header">
+                    <span class="message-sender-name">${msg.sender}</span>
+                    <span class="message-preview-time">${msg.time}</span>
+                </div>
+                <div class="message-preview-text">${msg.message}</div>
+            </div>
+            ${msg.unread ? '<div class="unread-dot"></div>' : ''}
+        </div>
+    `).join('');
+});
+
+// Show toast
+function showToast(message, type = 'info') {
+    const toast = document.createElement('div');
+    toast.className = `toast-message ${type}`;
+    toast.style.cssText = `
+        position: fixed;
+        top: 90px;
+        right: 20px;
+        padding: 15px 20px;
+        background: ${type === 'success' ? '#27ae60' : type === 'error' ? '#e74c3c' : '#3498db'};
+        color: white;
+        border-radius: 5px;
+        font-weight: 600;
+        z-index: 10000;
+        animation: slideIn 0.3s ease;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+    `;
+    toast.textContent = message;
+    document.body.appendChild(toast);
+
+    setTimeout(() => {
+        toast.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => toast.remove(), 300);
+    }, 3000);
+}
+
+// Get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Load messages on page load
+document.addEventListener('DOMContentLoaded', function() {
+    fetchMessages();
+    // Refreshed when the event stream opened in base.html reports new items
+    onInboxChange('messages', fetchMessages);
+});